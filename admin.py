@@ -1,19 +1,17 @@
 from flask import Blueprint, render_template, session, redirect, url_for, current_app, request, jsonify
+import base64
 import json
-import os
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 
-admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
+from concurrency import run_parallel
+from learning_catalogue import catalogue, invalidate_catalogue
+from user_stats import invalidate_user_stats
+from user_store import get_user_by_id, invalidate_user, user_cache
+from words_store import VersionConflict, words_store
+from write_queue import write_queue
 
-def get_user_by_id(user_id):
-    """Get user by ID from Supabase"""
-    supabase = current_app.config['SUPABASE']
-    try:
-        result = supabase.table('users').select('*').eq('id', user_id).execute()
-        return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error getting user by ID: {e}")
-        return None
+admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 def is_admin():
     """Check if current user is admin"""
@@ -35,31 +33,220 @@ def dashboard():
     if not current_user or current_user.get('role') != 'Admin':
         return "Access denied - Admin only", 403
     
-    supabase = current_app.config['SUPABASE']
-    
-    # Fetch all data
-    try:
-        users = supabase.table('users').select('*').order('created_at', desc=True).execute()
-        rooms = supabase.table('rooms').select('*').order('created_at', desc=True).execute()
-        game_sessions = supabase.table('game_sessions').select('*').order('created_at', desc=True).execute()
-        
-        # Load words from JSON
-        words_path = os.path.join('static', 'models', 'words.json')
-        with open(words_path, 'r', encoding='utf-8') as f:
-            words_data = json.load(f)
-        
+    # Users, rooms and game sessions are loaded page by page by the
+    # dashboard script (see /api/summary and the paginated list APIs)
+    try:
+        _, words_version, _ = words_store.snapshot()
         return render_template('admin_dashboard.html',
                              user=current_user,
-                             users=users.data,
-                             rooms=rooms.data,
-                             game_sessions=game_sessions.data,
-                             words=words_data['words'])
+                             words=words_store.words(),
+                             words_version=words_version)
     except Exception as e:
         print(f"Error loading admin dashboard: {e}")
         import traceback
         traceback.print_exc()
         return f"Error loading dashboard: {str(e)}", 500
 
+# PAGINATED LISTS AND SUMMARY
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 200
+SUMMARY_DAYS = 30
+SUMMARY_CACHE_SECONDS = 60
+
+# Never send password hashes to the browser
+USER_LIST_COLUMNS = 'id, username, role, grade, profile_picture, created_at'
+
+_summary_cache = {'at': 0.0, 'data': None}
+
+def encode_cursor(row):
+    """Opaque cursor for the (created_at, id) position of a row"""
+    return base64.urlsafe_b64encode(json.dumps([row['created_at'], row['id']]).encode()).decode()
+
+class InvalidCursor(ValueError):
+    pass
+
+def decode_cursor(cursor):
+    """(created_at ISO timestamp, int id) from a cursor; InvalidCursor if it is not one we issued"""
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        # Both values go into a filter string, so only a real timestamp and id pass
+        created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00')).isoformat()
+        if isinstance(row_id, bool) or not isinstance(row_id, int):
+            raise ValueError('id is not an integer')
+    except Exception as e:
+        raise InvalidCursor('Invalid cursor') from e
+    return created_at, row_id
+
+def keyset_page(table, columns='*'):
+    """
+    One page of a table, newest first, from the ?limit= and ?cursor= args
+
+    Pages are keyed on (created_at, id) rather than offsets, so every page
+    costs the same index range scan however deep the admin scrolls.
+    """
+    supabase = current_app.config['SUPABASE']
+    limit = min(max(request.args.get('limit', ADMIN_PAGE_SIZE, type=int), 1), ADMIN_MAX_PAGE_SIZE)
+    
+    query = supabase.table(table).select(columns).order('created_at', desc=True).order('id', desc=True)
+    cursor = request.args.get('cursor')
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")')
+    
+    # One extra row tells whether there is a next page
+    rows = query.limit(limit + 1).execute().data or []
+    return {
+        'items': rows[:limit],
+        'next_cursor': encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    }
+
+def count_rows(supabase, table, column=None, value=None):
+    query = supabase.table(table).select('id', count='exact')
+    if column:
+        query = query.eq(column, value)
+    return query.limit(1).execute().count or 0
+
+def fetch_since(supabase, table, columns, since, page_size=1000):
+    """All rows created since `since`, in pages of the API's max row count"""
+    rows = []
+    while True:
+        page = supabase.table(table).select(columns).gte('created_at', since).order('created_at').order('id') \
+            .range(len(rows), len(rows) + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+def build_summary(supabase, days=SUMMARY_DAYS):
+    """
+    Totals, users per role, average score and per-day activity
+
+    Uses the admin_dashboard_summary database function when it exists, so
+    the grouping happens in Postgres:
+
+        create or replace function admin_dashboard_summary(p_days int default 30)
+        returns json language sql stable as $$
+          with sessions as (
+            select created_at::date as day, count(*) as sessions, avg(score) as average_score
+            from game_sessions where created_at >= now() - make_interval(days => p_days) group by 1
+          ), games as (
+            select created_at::date as day, count(*) as games
+            from rooms where created_at >= now() - make_interval(days => p_days) group by 1
+          )
+          select json_build_object(
+            'totals', json_build_object(
+              'users', (select count(*) from users),
+              'rooms', (select count(*) from rooms),
+              'game_sessions', (select count(*) from game_sessions)),
+            'roles', (select coalesce(json_object_agg(role, n), '{}') from
+                      (select role, count(*) as n from users group by role) r),
+            'average_score', (select avg(score) from game_sessions),
+            'activity', (select coalesce(json_agg(a order by a.day), '[]') from (
+              select day, coalesce(s.sessions, 0) as sessions, s.average_score, coalesce(g.games, 0) as games
+              from sessions s full join games g using (day)) a)
+          );
+        $$;
+
+    Without it, totals come from exact counts and the averages and activity
+    from the last `days` days of rows.
+    """
+    try:
+        result = supabase.rpc('admin_dashboard_summary', {'p_days': days}).execute()
+        if result.data:
+            return dict(result.data, source='database')
+    except Exception as e:
+        print(f"admin_dashboard_summary unavailable, aggregating here: {e}")
+    
+    since = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
+    roles = ('Admin', 'Teacher', 'Student')
+    tables = ('users', 'rooms', 'game_sessions')
+    
+    # The counts and row windows are independent queries; run them together
+    calls = {
+        'sessions': lambda: fetch_since(supabase, 'game_sessions', 'score, created_at', since),
+        'games': lambda: fetch_since(supabase, 'rooms', 'created_at', since)
+    }
+    calls.update({f'total:{table}': (lambda table=table: count_rows(supabase, table)) for table in tables})
+    calls.update({f'role:{role}': (lambda role=role: count_rows(supabase, 'users', 'role', role)) for role in roles})
+    fetched = run_parallel(calls)
+    if fetched.errors:
+        raise next(iter(fetched.errors.values()))
+    sessions = fetched.get('sessions')
+    games = fetched.get('games')
+    
+    activity = {}
+    for row in sessions:
+        day = activity.setdefault(row['created_at'][:10], {'sessions': 0, 'games': 0, 'score_total': 0})
+        day['sessions'] += 1
+        day['score_total'] += row.get('score') or 0
+    for row in games:
+        activity.setdefault(row['created_at'][:10], {'sessions': 0, 'games': 0, 'score_total': 0})['games'] += 1
+    
+    return {
+        'totals': {table: fetched.get(f'total:{table}') for table in tables},
+        'roles': {role: fetched.get(f'role:{role}') for role in roles},
+        'average_score': sum(row.get('score') or 0 for row in sessions) / len(sessions) if sessions else None,
+        'activity': [
+            {
+                'day': day,
+                'sessions': values['sessions'],
+                'games': values['games'],
+                'average_score': values['score_total'] / values['sessions'] if values['sessions'] else None
+            }
+            for day, values in sorted(activity.items())
+        ],
+        'source': 'recent_rows',
+        'days': days
+    }
+
+@admin_bp.route('/api/summary', methods=['GET'])
+def dashboard_summary():
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        if _summary_cache['data'] is None or time.time() - _summary_cache['at'] > SUMMARY_CACHE_SECONDS:
+            _summary_cache['data'] = build_summary(current_app.config['SUPABASE'])
+            _summary_cache['at'] = time.time()
+        return jsonify(_summary_cache['data'])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/api/users', methods=['GET'])
+def list_users():
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        return jsonify(keyset_page('users', USER_LIST_COLUMNS))
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/api/rooms', methods=['GET'])
+def list_rooms():
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        return jsonify(keyset_page('rooms'))
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/api/game_sessions', methods=['GET'])
+def list_game_sessions():
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        return jsonify(keyset_page('game_sessions'))
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # USER MANAGEMENT APIs
 @admin_bp.route('/api/users', methods=['POST'])
 def add_user():
@@ -93,6 +280,7 @@ def update_user(user_id):
             'role': data['role'],
             'grade': data.get('grade', '')
         }).eq('id', user_id).execute()
+        invalidate_user(user_id)
         return jsonify({'success': True, 'data': result.data})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -106,6 +294,7 @@ def delete_user(user_id):
     
     try:
         result = supabase.table('users').delete().eq('id', user_id).execute()
+        invalidate_user(user_id)
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -120,7 +309,13 @@ def delete_room(room_id):
     supabase = current_app.config['SUPABASE']
     
     try:
+        # The creator's and players' stats count this room until rebuilt
+        room = supabase.table('rooms').select('id, creator_id').eq('id', room_id).execute().data
+        players = supabase.table('game_sessions').select('user_id').eq('room_id', room_id).execute().data or []
+
         result = supabase.table('rooms').delete().eq('id', room_id).execute()
+        invalidate_user_stats([row['creator_id'] for row in room] + [row['user_id'] for row in players],
+                              supabase, room_id=room[0]['id'] if room else None)
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -134,22 +329,90 @@ def delete_game_session(session_id):
     supabase = current_app.config['SUPABASE']
     
     try:
+        game_session = supabase.table('game_sessions').select('user_id').eq('id', session_id).execute().data
+
         result = supabase.table('game_sessions').delete().eq('id', session_id).execute()
+        invalidate_user_stats([row['user_id'] for row in game_session], supabase)
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# FSL MODEL STATS API
+@admin_bp.route('/api/fsl_stats', methods=['GET'])
+def fsl_stats():
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    predictor = getattr(current_app, 'fsl_predictor', None)
+    if predictor is None:
+        return jsonify({'loaded': False})
+    
+    return jsonify({
+        'loaded': True,
+        'model_type': predictor.model_type,
+        'version': predictor.version,
+        'classes': predictor.class_names,
+        'cascade': predictor.cascade_stats(),
+        'shadow': predictor.shadow.stats() if predictor.shadow is not None else None
+    })
+
+@admin_bp.route('/api/write_queue', methods=['GET'])
+def write_queue_stats():
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    return jsonify(write_queue.stats())
+
+@admin_bp.route('/api/user_cache', methods=['GET'])
+def user_cache_stats():
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    return jsonify(user_cache.stats())
+
+@admin_bp.route('/api/db_transport', methods=['GET'])
+def db_transport_stats():
+    """Supabase connection pool utilization, wait times and circuit breaker state"""
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    transport = current_app.config.get('SUPABASE_TRANSPORT')
+    if transport is None:
+        return jsonify({'enabled': False, 'backend': current_app.config.get('DATABASE_BACKEND')})
+    return jsonify({'enabled': True, **transport.stats()})
+
+@admin_bp.route('/api/learning_catalogue', methods=['GET', 'DELETE'])
+def learning_catalogue_cache():
+    """Catalogue cache stats; DELETE drops it after materials were edited in Supabase"""
+    if not is_admin():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    if request.method == 'DELETE':
+        invalidate_catalogue(request.args.get('category'))
+    return jsonify(catalogue.stats())
+
 # WORDS MANAGEMENT APIs
+# Edits may send If-Match with the version they were made against; a stale
+# version gets 412 instead of changing a word another admin just moved
+def expected_words_version():
+    tags = request.if_match.as_set()
+    return next(iter(tags)) if len(tags) == 1 else None
+
+def words_changed(version):
+    response = jsonify({'success': True, 'version': version})
+    response.set_etag(version)
+    return response
+
 @admin_bp.route('/api/words', methods=['GET'])
 def get_words():
     if not is_admin():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        words_path = os.path.join('static', 'models', 'words.json')
-        with open(words_path, 'r', encoding='utf-8') as f:
-            words_data = json.load(f)
-        return jsonify(words_data)
+        _, version, _ = words_store.snapshot()
+        response = jsonify({'words': words_store.words(), 'version': version})
+        response.set_etag(version)
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -161,19 +424,9 @@ def add_word():
     data = request.json
     
     try:
-        words_path = os.path.join('static', 'models', 'words.json')
-        with open(words_path, 'r', encoding='utf-8') as f:
-            words_data = json.load(f)
-        
-        words_data['words'].append({
-            'word': data['word'],
-            'emoji': data['emoji']
-        })
-        
-        with open(words_path, 'w', encoding='utf-8') as f:
-            json.dump(words_data, f, ensure_ascii=False, indent=2)
-        
-        return jsonify({'success': True})
+        return words_changed(words_store.add(data['word'], data['emoji'], expected_words_version()))
+    except VersionConflict as e:
+        return jsonify({'error': str(e)}), 412
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -185,22 +438,11 @@ def update_word(index):
     data = request.json
     
     try:
-        words_path = os.path.join('static', 'models', 'words.json')
-        with open(words_path, 'r', encoding='utf-8') as f:
-            words_data = json.load(f)
-        
-        if 0 <= index < len(words_data['words']):
-            words_data['words'][index] = {
-                'word': data['word'],
-                'emoji': data['emoji']
-            }
-            
-            with open(words_path, 'w', encoding='utf-8') as f:
-                json.dump(words_data, f, ensure_ascii=False, indent=2)
-            
-            return jsonify({'success': True})
-        else:
-            return jsonify({'error': 'Index out of range'}), 400
+        return words_changed(words_store.update(index, data['word'], data['emoji'], expected_words_version()))
+    except IndexError:
+        return jsonify({'error': 'Index out of range'}), 400
+    except VersionConflict as e:
+        return jsonify({'error': str(e)}), 412
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -210,18 +452,10 @@ def delete_word(index):
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        words_path = os.path.join('static', 'models', 'words.json')
-        with open(words_path, 'r', encoding='utf-8') as f:
-            words_data = json.load(f)
-        
-        if 0 <= index < len(words_data['words']):
-            words_data['words'].pop(index)
-            
-            with open(words_path, 'w', encoding='utf-8') as f:
-                json.dump(words_data, f, ensure_ascii=False, indent=2)
-            
-            return jsonify({'success': True})
-        else:
-            return jsonify({'error': 'Index out of range'}), 400
+        return words_changed(words_store.delete(index, expected_words_version()))
+    except IndexError:
+        return jsonify({'error': 'Index out of range'}), 400
+    except VersionConflict as e:
+        return jsonify({'error': str(e)}), 412
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
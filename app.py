@@ -3,6 +3,7 @@ from flask_socketio import SocketIO
 from dotenv import load_dotenv
 import os
 from supabase import create_client, Client
+from db_transport import attach_transport
 from auth import auth_bp
 from translator import translator_bp, detector
 from home import home_bp
@@ -10,6 +11,9 @@ from room import room_bp
 from learn import learn_bp
 from user_profile import profile_bp
 from admin import admin_bp
+from video_transcriber import transcribe_bp
+from batch_api import batch_bp
+from words_store import words_bp
 from socketio_events import init_all_socketio_events
 
 # Load environment variables
@@ -19,31 +23,47 @@ def create_app():
     app = Flask(__name__)
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', '08ca468790472700391c35315b83d61b49b3f832b9d928659ae5ec5ba6a7cc61')
     
-    supabase_url = os.getenv('SUPABASE_URL')
-    supabase_key = os.getenv('SUPABASE_KEY')
+    # FSL word frames: minimum seconds between accepted frames per user, and
+    # whether to raise it automatically while frames take longer than the budget
+    app.config['FSL_MIN_FRAME_INTERVAL'] = float(os.getenv('FSL_MIN_FRAME_INTERVAL', '0'))
+    app.config['FSL_MAX_FRAME_INTERVAL'] = float(os.getenv('FSL_MAX_FRAME_INTERVAL', '1.0'))
+    app.config['FSL_FRAME_TIME_BUDGET'] = float(os.getenv('FSL_FRAME_TIME_BUDGET', '0.25'))
+    app.config['FSL_ADAPTIVE_FRAME_RATE'] = os.getenv('FSL_ADAPTIVE_FRAME_RATE', 'true').lower() == 'true'
     
-    if not supabase_url or not supabase_key:
-        raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
+    # Candidate FSL model scored in the background on a sample of live predictions
+    app.config['FSL_SHADOW_MODEL_DIR'] = os.getenv('FSL_SHADOW_MODEL_DIR')
+    app.config['FSL_SHADOW_SAMPLE_RATE'] = float(os.getenv('FSL_SHADOW_SAMPLE_RATE', '0.1'))
+    
+    # 'supabase', or 'sqlite' to run offline against LOCAL_DB_PATH (load tests)
+    app.config['DATABASE_BACKEND'] = os.getenv('DATABASE_BACKEND', 'supabase').lower()
     
-    # Create Supabase client
-    print("Creating Supabase client (using gevent)...")
     supabase = None
-    try:
-        supabase = create_client(supabase_url, supabase_key)
+    if app.config['DATABASE_BACKEND'] == 'sqlite':
+        from local_store import LocalClient, LOCAL_DB_PATH
+        supabase = LocalClient(LOCAL_DB_PATH)
         app.config['SUPABASE'] = supabase
-        print("Supabase client created successfully")
+        print(f"Using local SQLite database {LOCAL_DB_PATH} instead of Supabase")
+    else:
+        supabase_url = os.getenv('SUPABASE_URL')
+        supabase_key = os.getenv('SUPABASE_KEY')
         
-        # Test connection
-        print("Testing Supabase connection...")
-        test_result = supabase.table('users').select('id').limit(1).execute()
-        print("Supabase connection test PASSED!")
+        if not supabase_url or not supabase_key:
+            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
         
-    except Exception as e:
-        print(f"Supabase initialization failed: {e}")
-        print(f"Error type: {type(e).__name__}")
-        import traceback
-        traceback.print_exc()
-        app.config['SUPABASE'] = None
+        # Create Supabase client
+        print("Creating Supabase client (using gevent)...")
+        try:
+            supabase = create_client(supabase_url, supabase_key)
+            # Bounded keep-alive pool, timeouts and a circuit breaker for DB calls
+            app.config['SUPABASE_TRANSPORT'] = attach_transport(supabase)
+            app.config['SUPABASE'] = supabase
+            print("Supabase client created successfully")
+        except Exception as e:
+            print(f"Supabase initialization failed: {e}")
+            print(f"Error type: {type(e).__name__}")
+            import traceback
+            traceback.print_exc()
+            app.config['SUPABASE'] = None
     
     # Use gevent instead of eventlet
     socketio = SocketIO(
@@ -62,12 +82,19 @@ def create_app():
     app.register_blueprint(learn_bp)
     app.register_blueprint(profile_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(transcribe_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(words_bp)
     
     initialize_fsl_model(app)
     
     # Initialize SocketIO events
     init_all_socketio_events(socketio, supabase, detector)
     
+    # Test the connection without holding up startup; /health reports it too
+    if supabase is not None:
+        socketio.start_background_task(test_database_connection, supabase)
+    
     # ============================================
     # HEALTH CHECK ENDPOINT
     # ============================================
@@ -92,6 +119,7 @@ def create_app():
             
             return jsonify({
                 "status": "healthy",
+                "backend": app.config['DATABASE_BACKEND'],
                 "supabase": "connected",
                 "test_query": "success",
                 "query_time_ms": round(query_time * 1000, 2),
@@ -110,6 +138,16 @@ def create_app():
     print("App created successfully - ready to accept connections")
     return app, socketio
 
+def test_database_connection(supabase):
+    """Run one query and log whether the database answered"""
+    print("Testing database connection...")
+    try:
+        supabase.table('users').select('id').limit(1).execute()
+        print("Database connection test PASSED!")
+    except Exception as e:
+        print(f"Database connection test FAILED: {e}")
+        print(f"Error type: {type(e).__name__}")
+
 def initialize_fsl_model(app):
     """Initialize FSL words predictor"""
     try:
@@ -119,6 +157,7 @@ def initialize_fsl_model(app):
         
         if os.path.exists(model_dir):
             app.fsl_predictor = SimpleFSLPredictor(model_dir)
+            initialize_shadow_model(app)
             return True
         else:
             print(f"⚠️ FSL model directory not found: {model_dir}")
@@ -130,6 +169,29 @@ def initialize_fsl_model(app):
         app.fsl_predictor = None
         return False
 
+def initialize_shadow_model(app):
+    """Attach the candidate FSL model for shadow evaluation, if configured"""
+    shadow_dir = app.config.get('FSL_SHADOW_MODEL_DIR')
+    if not shadow_dir:
+        return False
+    
+    try:
+        from simple_fsl_trainer import SimpleFSLPredictor
+        from fsl_shadow import ShadowEvaluator
+        
+        candidate = SimpleFSLPredictor(shadow_dir)
+        if candidate.feature_names != app.fsl_predictor.feature_names:
+            print(f"⚠️ Shadow model {shadow_dir} uses different features, not attached")
+            return False
+        
+        app.fsl_predictor.shadow = ShadowEvaluator(candidate, sample_rate=app.config['FSL_SHADOW_SAMPLE_RATE'])
+        print(f"Shadow evaluation of {shadow_dir} on {app.config['FSL_SHADOW_SAMPLE_RATE']:.0%} of predictions")
+        return True
+        
+    except Exception as e:
+        print(f"⚠️ Error initializing shadow model: {e}")
+        return False
+
 app, socketio = create_app()
 
 if __name__ == '__main__':
@@ -2,6 +2,9 @@ from flask import Blueprint, render_template, request, jsonify, redirect, url_fo
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
+import user_store
+from user_store import get_user_by_id
+
 auth_bp = Blueprint('auth', __name__)
 
 def create_user(username, password, role, profile_picture, grade):
@@ -25,24 +28,8 @@ def create_user(username, password, role, profile_picture, grade):
         return None
 
 def get_user_by_username(username):
-    """Get user by username from Supabase (case-insensitive)"""
-    supabase = current_app.config['SUPABASE']
-    try:
-        result = supabase.table('users').select('*').eq('username', username.lower()).execute()
-        return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error getting user: {e}")
-        return None
-
-def get_user_by_id(user_id):
-    """Get user by ID from Supabase"""
-    supabase = current_app.config['SUPABASE']
-    try:
-        result = supabase.table('users').select('*').eq('id', user_id).execute()
-        return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error getting user by ID: {e}")
-        return None
+    """Get user by username (case-insensitive)"""
+    return user_store.get_user_by_username(username.lower())
 
 # Routes
 @auth_bp.route('/')
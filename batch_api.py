@@ -0,0 +1,129 @@
+from flask import Blueprint, Response, request, current_app, jsonify, stream_with_context
+import hmac
+import io
+import json
+import os
+import time
+import numpy as np
+from typing import Dict
+
+from admin import is_admin
+
+batch_bp = Blueprint('batch', __name__, url_prefix='/api/batch')
+
+# Bearer token for scripted clients; admins can also call the API from their session
+BATCH_API_TOKEN = os.getenv('BATCH_API_TOKEN')
+MAX_BATCH_BYTES = int(os.getenv('BATCH_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# Items featurized and scored per predict_proba call. Results are streamed
+# after every chunk so long batches do not hold the worker or the response.
+CHUNK_SIZE = int(os.getenv('BATCH_CHUNK_SIZE', '1024'))
+
+
+def _authorized() -> bool:
+    # Constant-time comparison, so response timing does not reveal the token
+    if BATCH_API_TOKEN and hmac.compare_digest(request.headers.get('Authorization', '').encode(),
+                                               f'Bearer {BATCH_API_TOKEN}'.encode()):
+        return True
+    return bool(is_admin())
+
+
+def _load_arrays(body: bytes) -> Dict[str, np.ndarray]:
+    """Arrays from a .npy body (taken as 'landmarks') or a .npz body"""
+    loaded = np.load(io.BytesIO(body), allow_pickle=False)
+    if isinstance(loaded, np.lib.npyio.NpzFile):
+        with loaded:
+            return {name: loaded[name] for name in loaded.files}
+    return {'landmarks': loaded}
+
+
+@batch_bp.route('/predict', methods=['POST'])
+def batch_predict():
+    """
+    Score many landmark items in one request: ?model=words|letters
+
+    The body is a .npy array of landmarks, or a .npz with 'landmarks' and
+    optionally 'hand_counts' and 'lengths' (words only):
+      words:   (N, T, 2, 21, 3) right-aligned sequences, as pack_batch builds them
+      letters: (N, 2, 21, 3) or (N, 21, 3) single frames
+    Missing hands are zeros. The response is NDJSON: one line per item in
+    input order ({"index", "prediction", "confidence" 0-1}), then a summary line.
+    """
+    if not _authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    model = request.args.get('model', 'words')
+    if model not in ('words', 'letters'):
+        return jsonify({'error': f'Unknown model: {model}'}), 400
+
+    if request.content_length is not None and request.content_length > MAX_BATCH_BYTES:
+        return jsonify({'error': f'Batch larger than {MAX_BATCH_BYTES} bytes'}), 413
+
+    body = request.get_data(cache=False)
+    if len(body) > MAX_BATCH_BYTES:
+        return jsonify({'error': f'Batch larger than {MAX_BATCH_BYTES} bytes'}), 413
+
+    try:
+        arrays = _load_arrays(body)
+    except Exception as e:
+        return jsonify({'error': f'Body is not a .npy/.npz file: {e}'}), 400
+
+    landmarks = arrays.get('landmarks')
+    hand_counts = arrays.get('hand_counts')
+    lengths = arrays.get('lengths')
+    if landmarks is None or not np.issubdtype(landmarks.dtype, np.number):
+        return jsonify({'error': "Missing numeric 'landmarks' array"}), 400
+
+    if model == 'words':
+        predictor = getattr(current_app, 'fsl_predictor', None)
+        if predictor is None:
+            return jsonify({'error': 'FSL model not available'}), 503
+        if landmarks.ndim != 5 or landmarks.shape[2:] != (2, 21, 3):
+            return jsonify({'error': 'words expects landmarks of shape (N, T, 2, 21, 3)'}), 400
+        num_items, num_frames = landmarks.shape[:2]
+        if hand_counts is not None and hand_counts.shape != (num_items, num_frames):
+            return jsonify({'error': 'hand_counts must have shape (N, T)'}), 400
+        if lengths is not None and lengths.shape != (num_items,):
+            return jsonify({'error': 'lengths must have shape (N,)'}), 400
+
+        def score(start, stop):
+            results = predictor.predict_batch(
+                landmarks[start:stop],
+                None if hand_counts is None else hand_counts[start:stop],
+                None if lengths is None else lengths[start:stop]
+            )
+            # predict() reports word confidence as a percentage
+            for result in results:
+                result['confidence'] = result['confidence'] / 100
+            return results
+    else:
+        from translator import detector
+        if landmarks.shape[-2:] != (21, 3) or landmarks.ndim not in (3, 4) or \
+                (landmarks.ndim == 4 and landmarks.shape[1] != 2):
+            return jsonify({'error': 'letters expects landmarks of shape (N, 2, 21, 3) or (N, 21, 3)'}), 400
+        num_items = len(landmarks)
+
+        def score(start, stop):
+            return detector.predict_batch(landmarks[start:stop])
+
+    def generate():
+        start_time = time.time()
+        counts = {}
+        for start in range(0, num_items, CHUNK_SIZE):
+            stop = min(start + CHUNK_SIZE, num_items)
+            for offset, result in enumerate(score(start, stop)):
+                counts[result['prediction']] = counts.get(result['prediction'], 0) + 1
+                yield json.dumps({'index': start + offset, **result}) + '\n'
+            # Let the gevent hub serve other requests between chunks
+            time.sleep(0)
+
+        elapsed = time.time() - start_time
+        yield json.dumps({'summary': {
+            'model': model,
+            'items': num_items,
+            'seconds': round(elapsed, 3),
+            'items_per_second': round(num_items / elapsed, 1) if elapsed > 0 else None,
+            'predictions': counts
+        }}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
@@ -0,0 +1,71 @@
+import contextvars
+import os
+import time
+from typing import Any, Callable, Dict, NamedTuple
+
+try:
+    import gevent
+    from gevent.pool import Pool
+except ImportError:  # plain threads outside the gevent server (CLI, tests)
+    gevent = None
+
+# Seconds a single fanned-out call may take before it is abandoned
+FANOUT_TIMEOUT = float(os.getenv('FANOUT_TIMEOUT', '10'))
+FANOUT_MAX_CONCURRENCY = 8
+
+
+class FanOut(NamedTuple):
+    """Results by call name; calls that raised or timed out are in errors instead"""
+    results: Dict[str, Any]
+    errors: Dict[str, BaseException]
+
+    def get(self, name: str, default=None):
+        return self.results.get(name, default)
+
+
+def run_parallel(calls: Dict[str, Callable[[], Any]], timeout: float = FANOUT_TIMEOUT,
+                 max_concurrency: int = FANOUT_MAX_CONCURRENCY) -> FanOut:
+    """
+    Run independent zero-argument calls concurrently and wait for all of them
+
+    Each call runs in its own greenlet from a gevent pool (threads without
+    gevent) inside a copy of the caller's context, so Flask's current_app
+    and request still work. A call that takes longer than `timeout` is
+    abandoned and reported as a TimeoutError.
+    """
+    results, errors = {}, {}
+    if not calls:
+        return FanOut(results, errors)
+
+    if gevent is not None:
+        def run(name, call, context):
+            # Failures are collected here rather than reported by the hub
+            try:
+                with gevent.Timeout(timeout, TimeoutError(f"{name} timed out after {timeout}s")):
+                    results[name] = context.run(call)
+            except Exception as e:
+                errors[name] = e
+
+        pool = Pool(size=min(max_concurrency, len(calls)))
+        for name, call in calls.items():
+            pool.spawn(run, name, call, contextvars.copy_context())
+        pool.join()
+    else:
+        from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+        executor = ThreadPoolExecutor(max_workers=min(max_concurrency, len(calls)))
+        futures = {name: executor.submit(contextvars.copy_context().run, call)
+                   for name, call in calls.items()}
+        deadline = time.monotonic() + timeout
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                errors[name] = TimeoutError(f"{name} timed out after {timeout}s")
+            except Exception as e:
+                errors[name] = e
+        # Abandoned calls finish in the background; nobody waits for them
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for name, error in errors.items():
+        print(f"Parallel call {name} failed: {error}")
+    return FanOut(results, errors)
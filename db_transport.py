@@ -0,0 +1,259 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import httpx
+
+# Connection pool and timeouts for Supabase (PostgREST) requests. Requests
+# beyond SUPABASE_MAX_CONNECTIONS wait up to SUPABASE_POOL_TIMEOUT for a
+# slot; that wait is what the pool metrics report.
+SUPABASE_MAX_CONNECTIONS = int(os.getenv('SUPABASE_MAX_CONNECTIONS', '20'))
+SUPABASE_MAX_KEEPALIVE = int(os.getenv('SUPABASE_MAX_KEEPALIVE', '10'))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv('SUPABASE_KEEPALIVE_EXPIRY', '30'))
+SUPABASE_HTTP2 = os.getenv('SUPABASE_HTTP2', 'true').lower() == 'true'
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv('SUPABASE_CONNECT_TIMEOUT', '5'))
+SUPABASE_TIMEOUT = float(os.getenv('SUPABASE_TIMEOUT', '10'))
+SUPABASE_POOL_TIMEOUT = float(os.getenv('SUPABASE_POOL_TIMEOUT', '5'))
+
+# Consecutive failures (connection errors, timeouts, 502/503/504) that open
+# the circuit, and seconds it stays open before one trial request
+SUPABASE_BREAKER_THRESHOLD = int(os.getenv('SUPABASE_BREAKER_THRESHOLD', '5'))
+SUPABASE_BREAKER_COOLDOWN = float(os.getenv('SUPABASE_BREAKER_COOLDOWN', '30'))
+
+DEGRADED_STATUS_CODES = (502, 503, 504)
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request while Supabase is considered down"""
+
+
+class CircuitBreaker:
+    """closed -> open after `threshold` consecutive failures -> half_open after `cooldown` -> closed on success"""
+
+    def __init__(self, threshold: int = SUPABASE_BREAKER_THRESHOLD, cooldown: float = SUPABASE_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = 'half_open'
+                self._trial_running = False
+            if self.state == 'closed':
+                return True
+            # Half open: a single trial request decides whether to close again
+            if self.state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record(self, success: bool):
+        with self._lock:
+            self._trial_running = False
+            if success:
+                if self.state != 'closed':
+                    print("Supabase circuit closed: requests succeed again")
+                self.state = 'closed'
+                self.failures = 0
+                return
+
+            self.failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.threshold):
+                self.state = 'open'
+                self.opened += 1
+                self._opened_at = time.monotonic()
+                print(f"Supabase circuit open after {self.failures} failures; "
+                      f"failing fast for {self.cooldown}s")
+
+    def cancel(self):
+        """The request allowed through was never sent"""
+        with self._lock:
+            self._trial_running = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'times_opened': self.opened,
+                'retry_in_seconds': round(max(0.0, self.cooldown - (time.monotonic() - self._opened_at)), 1)
+                if self.state == 'open' else 0.0
+            }
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that gives the pool slot back once it has been read and closed"""
+
+    def __init__(self, stream, on_close, on_error):
+        self._stream = stream
+        self._on_close = on_close
+        self._on_error = on_error
+
+    def __iter__(self):
+        try:
+            yield from self._stream
+        except Exception:
+            # e.g. a read timeout part way through the body
+            self._on_error()
+            raise
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            if self._on_close is not None:
+                on_close, self._on_close = self._on_close, None
+                on_close()
+
+
+class PooledTransport(httpx.BaseTransport):
+    """
+    httpx transport with a bounded, instrumented connection pool and a circuit breaker
+
+    At most max_connections requests are in flight; the rest wait for a
+    slot (PoolTimeout after pool_timeout). A slot is held until the response
+    body is closed, so in-flight counts match the connections in use.
+    """
+
+    def __init__(self, max_connections: int = SUPABASE_MAX_CONNECTIONS,
+                 max_keepalive: int = SUPABASE_MAX_KEEPALIVE,
+                 keepalive_expiry: float = SUPABASE_KEEPALIVE_EXPIRY,
+                 http2: bool = SUPABASE_HTTP2, pool_timeout: float = SUPABASE_POOL_TIMEOUT,
+                 breaker: Optional[CircuitBreaker] = None, transport: Optional[httpx.BaseTransport] = None,
+                 metrics_window: int = 1000):
+        self.max_connections = max_connections
+        self.pool_timeout = pool_timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.breaker = breaker or CircuitBreaker()
+        self._transport = transport or httpx.HTTPTransport(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive,
+                                keepalive_expiry=keepalive_expiry),
+            http2=self.http2
+        )
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.counts = {'requests': 0, 'failures': 0, 'degraded_responses': 0, 'rejected': 0, 'pool_timeouts': 0}
+        self._waits = deque(maxlen=metrics_window)
+        self._latencies = deque(maxlen=metrics_window)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not self.breaker.allow():
+            with self._lock:
+                self.counts['rejected'] += 1
+            raise CircuitOpenError("Supabase circuit is open; request not sent", request=request)
+
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            self.breaker.cancel()
+            with self._lock:
+                self.counts['pool_timeouts'] += 1
+                self._waits.append(time.perf_counter() - start)
+            raise httpx.PoolTimeout(f"No Supabase connection free within {self.pool_timeout}s", request=request)
+
+        sent_at = time.perf_counter()
+        with self._lock:
+            self._waits.append(sent_at - start)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.counts['requests'] += 1
+
+        def release():
+            with self._lock:
+                self.in_flight -= 1
+                self._latencies.append(time.perf_counter() - sent_at)
+            self._slots.release()
+
+        def fail():
+            with self._lock:
+                self.counts['failures'] += 1
+            self.breaker.record(False)
+
+        try:
+            response = self._transport.handle_request(request)
+        except Exception:
+            release()
+            fail()
+            raise
+
+        degraded = response.status_code in DEGRADED_STATUS_CODES
+        if degraded:
+            with self._lock:
+                self.counts['degraded_responses'] += 1
+        self.breaker.record(not degraded)
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release, fail),
+            extensions=response.extensions
+        )
+
+    def close(self):
+        self._transport.close()
+
+    def stats(self) -> Dict:
+        def summary(seconds):
+            if not seconds:
+                return None
+            ordered = sorted(seconds)
+            return {
+                'mean': round(sum(ordered) / len(ordered) * 1000, 2),
+                'p50': round(ordered[len(ordered) // 2] * 1000, 2),
+                'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+                'max': round(ordered[-1] * 1000, 2)
+            }
+
+        with self._lock:
+            return {
+                'max_connections': self.max_connections,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'utilization': self.in_flight / self.max_connections,
+                'http2': self.http2,
+                **self.counts,
+                'pool_wait_ms': summary(list(self._waits)),
+                'latency_ms': summary(list(self._latencies)),
+                'breaker': self.breaker.stats()
+            }
+
+
+def attach_transport(client, transport: Optional[PooledTransport] = None) -> PooledTransport:
+    """
+    Route a Supabase client's database requests through a PooledTransport
+
+    Replaces the PostgREST session (used by every table() and rpc() call)
+    with one that keeps the same base URL and auth headers. The client
+    rebuilds that session only on Supabase Auth events, which the app does
+    not use.
+    """
+    transport = transport or PooledTransport()
+    postgrest = client.postgrest
+    previous = postgrest.session
+    postgrest.session = httpx.Client(
+        base_url=previous.base_url,
+        headers=previous.headers,
+        timeout=httpx.Timeout(SUPABASE_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT, pool=SUPABASE_POOL_TIMEOUT),
+        transport=transport,
+        follow_redirects=True
+    )
+    previous.close()
+    print(f"Supabase transport: {transport.max_connections} connections, "
+          f"HTTP/2 {'on' if transport.http2 else 'off'}, {SUPABASE_TIMEOUT}s timeout")
+    return transport
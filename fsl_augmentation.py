@@ -0,0 +1,217 @@
+import json
+import os
+import numpy as np
+from typing import Dict, Iterator, Optional, Tuple
+
+from fsl_frame_adapter import load_landmark_dataset, pack_batch
+from improved_fsl_feature_extractor import ImprovedFSLFeatureExtractor
+
+
+class FSLAugmenter:
+    """
+    Batched augmentation of recorded FSL motion sequences
+
+    Works on right-aligned (N, T, 2, 21, 3) landmark batches from
+    fsl_frame_adapter.pack_batch. Every transform draws one set of random
+    parameters per sequence and is applied to the whole batch with NumPy
+    operations. Missing hands/landmarks (zeros) stay zero.
+    """
+
+    def __init__(self, seed: int = 42, **config):
+        self.rng = np.random.default_rng(seed)
+
+        # Augmentation configuration
+        self.config = {
+            'max_rotation': np.pi / 12,     # in-plane rotation, radians
+            'max_scale': 0.1,               # relative size change
+            'max_translation': 0.05,        # per-sequence offset (normalized image units)
+            'translation_jitter': 0.003,    # per-frame offset std
+            'max_time_warp': 0.4,           # log of the time-warp exponent
+            'hand_dropout': 0.05            # probability of losing a hand in a frame
+        }
+        self.config.update(config)
+
+    def augment(self, landmarks: np.ndarray, hand_counts: np.ndarray,
+                lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """One random augmentation of every sequence in the batch"""
+        landmarks, hand_counts = self.time_warp(landmarks, hand_counts, lengths)
+        landmarks, hand_counts = self.drop_hands(landmarks, hand_counts)
+        landmarks = self.transform(landmarks)
+        return landmarks, hand_counts
+
+    def transform(self, landmarks: np.ndarray) -> np.ndarray:
+        """Rotate and scale each sequence about its centre, then translate and jitter it"""
+        num_sequences, num_frames = landmarks.shape[:2]
+        present = np.any(landmarks != 0, axis=-1, keepdims=True)
+        xy = landmarks[..., :2].astype(np.float64)
+
+        count = present.sum(axis=(1, 2, 3))
+        center = (xy * present).sum(axis=(1, 2, 3)) / np.maximum(count, 1)
+        center = center[:, None, None, None, :]
+
+        angle = self.rng.uniform(-self.config['max_rotation'], self.config['max_rotation'], num_sequences)
+        scale = 1 + self.rng.uniform(-self.config['max_scale'], self.config['max_scale'], num_sequences)
+        cos = (np.cos(angle) * scale)[:, None, None, None]
+        sin = (np.sin(angle) * scale)[:, None, None, None]
+
+        dx, dy = xy[..., 0] - center[..., 0], xy[..., 1] - center[..., 1]
+        offset = self.rng.uniform(-self.config['max_translation'], self.config['max_translation'], (num_sequences, 1, 1, 1, 2))
+        jitter = self.rng.normal(0, self.config['translation_jitter'], (num_sequences, num_frames, 1, 1, 2))
+        shift = center + offset + jitter
+
+        out = np.empty(landmarks.shape, dtype=np.float32)
+        out[..., 0] = cos * dx - sin * dy + shift[..., 0]
+        out[..., 1] = sin * dx + cos * dy + shift[..., 1]
+        out[..., 2] = landmarks[..., 2] * scale[:, None, None, None]
+        return np.where(present, out, np.float32(0))
+
+    def time_warp(self, landmarks: np.ndarray, hand_counts: np.ndarray,
+                  lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Re-time each sequence with a random monotonic warp that keeps its first
+        and last frame. A hand is interpolated only between frames that both
+        contain it; otherwise the nearest frame is used.
+        """
+        num_sequences, num_frames = landmarks.shape[:2]
+        lengths = np.asarray(lengths)
+        start = (num_frames - lengths)[:, None]
+
+        exponent = np.exp(self.rng.uniform(-self.config['max_time_warp'], self.config['max_time_warp'], num_sequences))
+        local = np.clip(np.arange(num_frames)[None, :] - start, 0, None) / np.maximum(lengths - 1, 1)[:, None]
+        source = np.clip(local, 0, 1) ** exponent[:, None] * (lengths - 1)[:, None] + start
+
+        lower = np.floor(source).astype(np.intp)
+        upper = np.minimum(lower + 1, num_frames - 1)
+        weight = (source - lower).astype(np.float32)
+        nearest = np.where(weight < 0.5, lower, upper)
+
+        def frames(index):
+            return np.take_along_axis(landmarks, index[:, :, None, None, None], axis=1)
+
+        present = np.any(landmarks != 0, axis=(3, 4))
+        both = (np.take_along_axis(present, lower[:, :, None], axis=1) &
+                np.take_along_axis(present, upper[:, :, None], axis=1))[..., None, None]
+        w = weight[:, :, None, None, None]
+        warped = np.where(both, frames(lower) * (1 - w) + frames(upper) * w, frames(nearest))
+
+        # Keep the padding in front of shorter sequences empty
+        real = np.arange(num_frames)[None, :] >= start
+        warped = np.where(real[:, :, None, None, None], warped, 0)
+        return warped.astype(np.float32), np.where(real, np.take_along_axis(hand_counts, nearest, axis=1), 0)
+
+    def drop_hands(self, landmarks: np.ndarray, hand_counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Randomly remove a hand from individual frames, as a missed detection would"""
+        present = np.any(landmarks != 0, axis=(3, 4))
+        dropped = present & (self.rng.random(present.shape) < self.config['hand_dropout'])
+        landmarks = np.where(dropped[..., None, None], np.float32(0), landmarks)
+        return landmarks, np.maximum(hand_counts - dropped.sum(axis=-1), 0)
+
+    def feature_batches(self, landmarks: np.ndarray, hand_counts: np.ndarray, lengths: np.ndarray,
+                        labels: np.ndarray, copies: int, batch_size: int = 256,
+                        extractor: Optional[ImprovedFSLFeatureExtractor] = None
+                        ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Stream (features, labels, sources, copy_index) batches: copy 0 is the
+        recorded sequences themselves, copies 1..copies are augmented. sources
+        is the index of the recorded sequence each row came from.
+        """
+        extractor = extractor or ImprovedFSLFeatureExtractor()
+        num_sequences = len(lengths)
+
+        for copy_index in range(copies + 1):
+            for start in range(0, num_sequences, batch_size):
+                stop = min(start + batch_size, num_sequences)
+                batch_landmarks, batch_counts = landmarks[start:stop], hand_counts[start:stop]
+                if copy_index:
+                    batch_landmarks, batch_counts = self.augment(batch_landmarks, batch_counts, lengths[start:stop])
+
+                features = extractor.extract_batch_features(batch_landmarks, batch_counts, lengths=lengths[start:stop])
+                yield (features, labels[start:stop], np.arange(start, stop),
+                       np.full(stop - start, copy_index, dtype=np.int32))
+
+    def write_features(self, dataset_path: str, output_dir: str, copies: int = 10,
+                       batch_size: int = 256) -> Dict:
+        """
+        Augment a recorded dataset (JSON file or compact landmark dataset
+        directory) and write its features to output_dir
+
+        Writes features.npy, labels.npy and feature_names.json like the
+        feature extractor CLI, plus sources.npy and copy_index.npy so the
+        trainer can keep every copy of a recording on the same side of the
+        train/test split. features.npy is filled through a memory map, so
+        the rows never have to fit in memory at once.
+        """
+        sequences, labels = [], []
+        if os.path.isdir(dataset_path):
+            # Compact landmark dataset from fsl_dataset_builder.py
+            for sign_name, sequence in load_landmark_dataset(dataset_path):
+                if len(sequence) >= 5:
+                    sequences.append(sequence)
+                    labels.append(sign_name)
+        else:
+            with open(dataset_path, 'r') as f:
+                dataset = json.load(f)
+            for sign_name, recordings in dataset.items():
+                for recording in recordings:
+                    if len(recording.get('frames') or []) >= 5:
+                        sequences.append(recording['frames'])
+                        labels.append(sign_name)
+
+        if not sequences:
+            raise ValueError("No valid sequences found in dataset for augmentation.")
+
+        landmarks, hand_counts, lengths = pack_batch(sequences)
+        labels = np.array(labels)
+        extractor = ImprovedFSLFeatureExtractor()
+        num_rows = len(sequences) * (copies + 1)
+        print(f"Augmenting {len(sequences)} sequences x {copies + 1} copies = {num_rows} rows")
+
+        os.makedirs(output_dir, exist_ok=True)
+        open_memmap = np.lib.format.open_memmap
+        X = open_memmap(os.path.join(output_dir, "features.npy"), mode='w+', dtype=np.float32,
+                        shape=(num_rows, len(extractor.feature_names)))
+        y = open_memmap(os.path.join(output_dir, "labels.npy"), mode='w+', dtype=labels.dtype, shape=(num_rows,))
+        sources = open_memmap(os.path.join(output_dir, "sources.npy"), mode='w+', dtype=np.int32, shape=(num_rows,))
+        copy_index = open_memmap(os.path.join(output_dir, "copy_index.npy"), mode='w+', dtype=np.int32, shape=(num_rows,))
+
+        row = 0
+        for features, batch_labels, batch_sources, batch_copies in self.feature_batches(
+                landmarks, hand_counts, lengths, labels, copies, batch_size, extractor):
+            end = row + len(features)
+            X[row:end] = features
+            y[row:end] = batch_labels
+            sources[row:end] = batch_sources
+            copy_index[row:end] = batch_copies
+            row = end
+            if batch_sources[-1] == len(sequences) - 1:
+                print(f"  Copy {batch_copies[0]}/{copies}: {end}/{num_rows} rows")
+
+        for array in (X, y, sources, copy_index):
+            array.flush()
+
+        with open(os.path.join(output_dir, "feature_names.json"), 'w') as f:
+            json.dump(extractor.feature_names, f, indent=2)
+
+        print(f"Augmented features saved to {output_dir}")
+        return {'sequences': len(sequences), 'copies': copies, 'rows': num_rows}
+
+
+# CLI interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='FSL training data augmentation')
+    parser.add_argument('--dataset', required=True, help='Dataset JSON file or landmark dataset directory')
+    parser.add_argument('--output', default='fsl_features_augmented', help='Output directory')
+    parser.add_argument('--copies', type=int, default=10, help='Augmented copies per recorded sequence')
+    parser.add_argument('--batch-size', type=int, default=256, help='Sequences augmented per batch')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+
+    args = parser.parse_args()
+
+    augmenter = FSLAugmenter(seed=args.seed)
+    augmenter.write_features(args.dataset, args.output, copies=args.copies, batch_size=args.batch_size)
+
+# Usage instructions:
+# python fsl_augmentation.py --dataset fsl_motion_data/fsl_dataset.json --output fsl_features_augmented --copies 50
+# python simple_fsl_trainer.py --features-dir fsl_features_augmented
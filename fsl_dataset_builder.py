@@ -0,0 +1,209 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+from fsl_frame_adapter import MANIFEST_FILE, PackedSequence, pack_hand_landmarks, read_manifest, save_packed_sequence
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v')
+
+# Per-process MediaPipe tracker, created once per pool worker by _init_worker
+_worker = {}
+
+
+def _init_worker():
+    import mediapipe as mp
+    _worker['hands'] = mp.solutions.hands.Hands(
+        static_image_mode=False,
+        max_num_hands=2,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.5
+    )
+
+
+def content_hash(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-1 of a file's bytes (clips are identified by content, not by name)"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_clips(videos_dir: str) -> List[Tuple[str, str]]:
+    """(label, path) of every video in videos_dir/<label>/, sorted"""
+    clips = []
+    for label in sorted(os.listdir(videos_dir)):
+        label_dir = os.path.join(videos_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for name in sorted(os.listdir(label_dir)):
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                clips.append((label, os.path.join(label_dir, name)))
+    return clips
+
+
+def _process_clip(video_path: str, output_path: str, sample_fps: float, min_frames: int) -> Dict:
+    """Extract hand landmarks from one clip into a compact .npz (not written under min_frames)"""
+    import cv2
+
+    hands = _worker['hands']
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, round(fps / sample_fps))
+
+    landmarks, hand_counts, timestamps = [], [], []
+    frame_index = 0
+    reset = False
+
+    while True:
+        if frame_index % step:
+            if not capture.grab():
+                break
+            frame_index += 1
+            continue
+
+        ok, frame = capture.read()
+        if not ok:
+            break
+
+        # The tracker persists across clips: one black frame makes it drop
+        # the previous clip's hands before this clip starts
+        if not reset:
+            hands.process(np.zeros_like(frame))
+            reset = True
+
+        results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        packed = pack_hand_landmarks(results.multi_hand_landmarks, frame_index / fps)
+        landmarks.append(packed.landmarks)
+        hand_counts.append(packed.hand_count)
+        timestamps.append(packed.timestamp)
+        frame_index += 1
+
+    capture.release()
+
+    if len(landmarks) >= min_frames:
+        sequence = PackedSequence(np.stack(landmarks), np.array(hand_counts), np.array(timestamps))
+        save_packed_sequence(output_path, sequence)
+
+    return {
+        'frames': len(landmarks),
+        'hands_frames': int(np.count_nonzero(hand_counts)),
+        'sample_fps': fps / step
+    }
+
+
+def build_dataset(videos_dir: str, output_dir: str, workers: int = None, sample_fps: float = 3.0,
+                  min_frames: int = 5, retry_failed: bool = False) -> Dict:
+    """
+    Convert a directory of labeled clips (videos_dir/<label>/<clip>) into a
+    compact landmark dataset in output_dir
+
+    Every clip becomes clips/<content hash>.npz and a manifest.jsonl entry,
+    appended as soon as the clip is done. Clips that cannot be decoded or
+    have fewer than min_frames frames get a 'failed' entry with the error.
+    Rerunning skips clips whose hash is already in the manifest (failed ones
+    too, unless retry_failed), so an interrupted build resumes where it
+    stopped and renamed or duplicated clips are not processed twice.
+    """
+    clips_dir = os.path.join(output_dir, 'clips')
+    os.makedirs(clips_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+
+    known = read_manifest(output_dir)
+    if retry_failed:
+        known = {clip_hash: entry for clip_hash, entry in known.items() if entry['status'] == 'ok'}
+    done = sum(1 for entry in known.values() if entry['status'] == 'ok')
+
+    clips = find_clips(videos_dir)
+    pending = {}
+    skipped = 0
+    for label, path in clips:
+        clip_hash = content_hash(path)
+        if clip_hash in known or clip_hash in pending:
+            previous = known.get(clip_hash) or pending[clip_hash]
+            if previous['label'] != label:
+                print(f"  Warning: {path} has the same content as a '{previous['label']}' clip, skipping")
+            skipped += 1
+            continue
+        pending[clip_hash] = {'label': label, 'source': os.path.relpath(path, videos_dir)}
+
+    print(f"Found {len(clips)} clips: {skipped} already processed or failed, {len(pending)} to process")
+    if not pending:
+        return {'clips': done, 'added': 0, 'skipped': skipped, 'failed': 0}
+
+    workers = workers or min(len(pending), os.cpu_count() or 1)
+    start_time = time.time()
+    added = failed = frames = 0
+
+    # spawn: MediaPipe does not survive fork
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker) as pool, open(manifest_path, 'a') as manifest:
+        futures = {
+            pool.submit(_process_clip, os.path.join(videos_dir, info['source']),
+                        os.path.join(clips_dir, f"{clip_hash}.npz"), sample_fps, min_frames): clip_hash
+            for clip_hash, info in pending.items()
+        }
+
+        def record(entry):
+            manifest.write(json.dumps(entry) + '\n')
+            manifest.flush()
+
+        for future in as_completed(futures):
+            clip_hash = futures[future]
+            info = pending[clip_hash]
+            try:
+                stats = future.result()
+            except Exception as e:
+                print(f"  Error processing {info['source']}: {e}")
+                record({'hash': clip_hash, 'label': info['label'], 'source': info['source'],
+                        'status': 'failed', 'error': str(e)})
+                failed += 1
+                continue
+
+            if stats['frames'] < min_frames:
+                print(f"  Warning: {info['source']} has only {stats['frames']} frames, skipping")
+                record({'hash': clip_hash, 'label': info['label'], 'source': info['source'],
+                        'status': 'failed', 'error': f"only {stats['frames']} frames (minimum {min_frames})",
+                        **stats})
+                failed += 1
+                continue
+
+            record({'hash': clip_hash, 'label': info['label'], 'source': info['source'], 'status': 'ok',
+                    'file': f"clips/{clip_hash}.npz", **stats})
+            added += 1
+            frames += stats['frames']
+            print(f"  [{added + failed}/{len(pending)}] {info['label']}: {info['source']} ({stats['frames']} frames)")
+
+    elapsed = time.time() - start_time
+    print(f"Processed {added} clips ({frames} frames) in {elapsed:.1f}s on {workers} workers")
+    return {'clips': done + added, 'added': added, 'skipped': skipped, 'failed': failed}
+
+
+# CLI interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build an FSL landmark dataset from labeled video clips')
+    parser.add_argument('--videos', required=True, help='Directory with one sub-directory of clips per sign')
+    parser.add_argument('--output', default='fsl_landmark_dataset', help='Dataset directory (resumed if it exists)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per core)')
+    parser.add_argument('--sample-fps', type=float, default=3.0,
+                        help='Frames per second to keep (the live client captures ~3 FPS)')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='Process clips the manifest records as failed again')
+
+    args = parser.parse_args()
+
+    build_dataset(args.videos, args.output, workers=args.workers, sample_fps=args.sample_fps,
+                  retry_failed=args.retry_failed)
+
+# Usage instructions:
+# python fsl_dataset_builder.py --videos recordings/ --output fsl_landmark_dataset
+# python improved_fsl_feature_extractor.py --dataset fsl_landmark_dataset --output fsl_features_improved
@@ -0,0 +1,265 @@
+import json
+import os
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+NUM_HANDS = 2
+NUM_LANDMARKS = 21
+NUM_COORDS = 3
+
+# Index of a compact landmark dataset directory (see load_landmark_dataset)
+MANIFEST_FILE = 'manifest.jsonl'
+
+
+class PackedFrame(NamedTuple):
+    """One frame converted to arrays: (2, 21, 3) landmarks, detected hand count, timestamp"""
+    landmarks: np.ndarray
+    hand_count: int
+    timestamp: float
+
+
+class PackedSequence:
+    """
+    Sequence of frames as arrays:
+    - landmarks: (T, 2, 21, 3) float32, missing hands/landmarks are zeros
+    - hand_counts: (T,) number of hands reported in each frame
+    - timestamps: (T,) capture time in seconds (NaN when unknown)
+    """
+    __slots__ = ('landmarks', 'hand_counts', 'timestamps')
+
+    def __init__(self, landmarks: np.ndarray, hand_counts: np.ndarray, timestamps: Optional[np.ndarray] = None):
+        self.landmarks = landmarks
+        self.hand_counts = hand_counts
+        if timestamps is None:
+            timestamps = np.full(landmarks.shape[0], np.nan)
+        self.timestamps = timestamps
+
+    def __len__(self):
+        return self.landmarks.shape[0]
+
+
+def pack_frame_into(frame: Union[Dict, PackedFrame], out: np.ndarray) -> PackedFrame:
+    """Write a legacy dict frame into `out` (shape (2, 21, 3)) without touching the input"""
+    if isinstance(frame, PackedFrame):
+        out[:] = frame.landmarks
+        return PackedFrame(out, frame.hand_count, frame.timestamp)
+
+    out.fill(0)
+    hands = frame.get('hands') or []
+    for hand_idx, hand in enumerate(hands[:NUM_HANDS]):
+        landmarks = hand.get('landmarks') or []
+        for landmark_idx, landmark in enumerate(landmarks[:NUM_LANDMARKS]):
+            out[hand_idx, landmark_idx, 0] = float(landmark.get('x', 0))
+            out[hand_idx, landmark_idx, 1] = float(landmark.get('y', 0))
+            out[hand_idx, landmark_idx, 2] = float(landmark.get('z', 0))
+
+    timestamp = frame.get('timestamp')
+    return PackedFrame(out, len(hands), float(timestamp) if timestamp is not None else np.nan)
+
+
+def pack_hand_landmarks(multi_hand_landmarks, timestamp: float = np.nan,
+                        out: Optional[np.ndarray] = None) -> PackedFrame:
+    """
+    Pack MediaPipe `results.multi_hand_landmarks` directly, without building
+    the legacy dict frame (same content as extract_fsl_landmarks_from_frame)
+    """
+    if out is None:
+        out = np.zeros((NUM_HANDS, NUM_LANDMARKS, NUM_COORDS), dtype=np.float32)
+    else:
+        out.fill(0)
+    hands = multi_hand_landmarks or []
+    for hand_idx, hand in enumerate(hands[:NUM_HANDS]):
+        for landmark_idx, landmark in enumerate(hand.landmark[:NUM_LANDMARKS]):
+            out[hand_idx, landmark_idx] = (landmark.x, landmark.y, landmark.z)
+    return PackedFrame(out, len(hands), float(timestamp))
+
+
+def pack_frame(frame: Union[Dict, PackedFrame]) -> PackedFrame:
+    """Convert a legacy {'hands': [{'landmarks': [...]}]} frame to a PackedFrame"""
+    if isinstance(frame, PackedFrame):
+        return frame
+    out = np.zeros((NUM_HANDS, NUM_LANDMARKS, NUM_COORDS), dtype=np.float32)
+    return pack_frame_into(frame, out)
+
+
+def pack_sequence(frames: Union[PackedSequence, Sequence[Union[Dict, PackedFrame]]]) -> PackedSequence:
+    """Convert a list of legacy or packed frames to a PackedSequence (no-op if already packed)"""
+    if isinstance(frames, PackedSequence):
+        return frames
+
+    num_frames = len(frames)
+    landmarks = np.zeros((num_frames, NUM_HANDS, NUM_LANDMARKS, NUM_COORDS), dtype=np.float32)
+    hand_counts = np.zeros(num_frames, dtype=np.int32)
+    timestamps = np.full(num_frames, np.nan)
+
+    for i, frame in enumerate(frames):
+        packed = pack_frame_into(frame, landmarks[i])
+        hand_counts[i] = packed.hand_count
+        timestamps[i] = packed.timestamp
+
+    return PackedSequence(landmarks, hand_counts, timestamps)
+
+
+class FrameBuffer:
+    """
+    Fixed-capacity sliding window of packed frames
+
+    Frames are converted to arrays once, in append(). Storage is mirrored
+    (every frame is written to slot i and i + capacity), so sequence() can
+    always return a contiguous, chronological view without copying. The
+    view is only valid until the next append()/clear().
+    """
+
+    def __init__(self, capacity: int = 30):
+        self.capacity = capacity
+        self._landmarks = np.zeros((2 * capacity, NUM_HANDS, NUM_LANDMARKS, NUM_COORDS), dtype=np.float32)
+        self._hand_counts = np.zeros(2 * capacity, dtype=np.int32)
+        self._timestamps = np.full(2 * capacity, np.nan)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, frame: Union[Dict, PackedFrame]):
+        """Add a frame, dropping the oldest one once the buffer is full"""
+        slot = self._next
+        packed = pack_frame_into(frame, self._landmarks[slot])
+        mirror = slot + self.capacity
+        self._landmarks[mirror] = self._landmarks[slot]
+        self._hand_counts[slot] = self._hand_counts[mirror] = packed.hand_count
+        self._timestamps[slot] = self._timestamps[mirror] = packed.timestamp
+
+        self._next = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def clear(self):
+        self._next = 0
+        self._size = 0
+
+    def sequence(self, last: Optional[int] = None) -> PackedSequence:
+        """Chronological view of the newest `last` frames (all buffered frames by default)"""
+        count = self._size if last is None else min(last, self._size)
+        # The newest frame lives at _next - 1 and its mirror at _next - 1 + capacity,
+        # so the window always ends at _next + capacity without wrapping
+        end = self._next + self.capacity
+        start = end - count
+        return PackedSequence(
+            self._landmarks[start:end],
+            self._hand_counts[start:end],
+            self._timestamps[start:end]
+        )
+
+
+def pack_batch(sequences: Sequence[Union[PackedSequence, Sequence[Dict]]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pack sequences of different lengths into one right-aligned batch:
+    (N, T, 2, 21, 3) landmarks, (N, T) hand counts and (N,) lengths, where T
+    is the longest sequence and shorter ones are zero-padded at the start
+    (the layout ImprovedFSLFeatureExtractor.extract_batch_features expects)
+    """
+    packed = [pack_sequence(sequence) for sequence in sequences]
+    lengths = np.array([len(sequence) for sequence in packed], dtype=np.int32)
+    num_frames = int(lengths.max()) if len(packed) else 0
+
+    landmarks = np.zeros((len(packed), num_frames, NUM_HANDS, NUM_LANDMARKS, NUM_COORDS), dtype=np.float32)
+    hand_counts = np.zeros((len(packed), num_frames), dtype=np.int32)
+    for i, sequence in enumerate(packed):
+        if len(sequence):
+            landmarks[i, num_frames - len(sequence):] = sequence.landmarks
+            hand_counts[i, num_frames - len(sequence):] = sequence.hand_counts
+
+    return landmarks, hand_counts, lengths
+
+
+def resample_sequence(sequence: PackedSequence, fps: float, max_frames: Optional[int] = None) -> PackedSequence:
+    """
+    Interpolate a sequence onto a fixed `fps` time grid ending at its newest frame
+
+    The span is rounded to the nearest whole number of steps, so a client
+    capturing slightly faster than `fps` (e.g. every 333 ms at 3 FPS) gets
+    one grid frame per captured frame; a grid time up to half a step before
+    the oldest frame takes that frame. At most `max_frames` grid frames are
+    produced (oldest ones are dropped). A hand's landmarks are interpolated linearly between two frames that both
+    contain it; where either side is missing that hand, the nearest frame in
+    time is used, so dropped detections are never blended toward zero.
+    Sequences without usable timestamps (unknown or not increasing) are
+    returned unchanged.
+    """
+    timestamps = sequence.timestamps
+    num_frames = len(sequence)
+    if num_frames < 2 or fps <= 0 or not np.all(np.isfinite(timestamps)) or np.any(np.diff(timestamps) <= 0):
+        return sequence
+
+    step = 1.0 / fps
+    count = int(np.round((timestamps[-1] - timestamps[0]) / step)) + 1
+    if max_frames is not None:
+        count = min(count, max_frames)
+    grid = timestamps[-1] - step * np.arange(count - 1, -1, -1)
+
+    # Frames on either side of every grid time: timestamps[left] <= t <= timestamps[right]
+    right = np.clip(np.searchsorted(timestamps, grid), 1, num_frames - 1)
+    left = right - 1
+    weight = np.clip((grid - timestamps[left]) / (timestamps[right] - timestamps[left]), 0, 1)
+    nearest = np.where(weight < 0.5, left, right)
+
+    landmarks = sequence.landmarks
+    hand_present = np.any(landmarks != 0, axis=(2, 3))
+    both = (hand_present[left] & hand_present[right])[:, :, None, None]
+    w = weight[:, None, None, None].astype(np.float32)
+    interpolated = landmarks[left] * (1 - w) + landmarks[right] * w
+    resampled = np.where(both, interpolated, landmarks[nearest]).astype(np.float32)
+
+    return PackedSequence(resampled, sequence.hand_counts[nearest], grid)
+
+
+def save_packed_sequence(path: str, sequence: PackedSequence):
+    """Write a sequence as a compact .npz (written to a temp file, then renamed into place)"""
+    temp_path = path + '.tmp.npz'
+    np.savez_compressed(
+        temp_path,
+        landmarks=sequence.landmarks.astype(np.float32),
+        hand_counts=sequence.hand_counts.astype(np.int8),
+        timestamps=sequence.timestamps.astype(np.float64)
+    )
+    os.replace(temp_path, path)
+
+
+def load_packed_sequence(path: str) -> PackedSequence:
+    """Read a sequence written by save_packed_sequence"""
+    with np.load(path) as data:
+        return PackedSequence(data['landmarks'], data['hand_counts'].astype(np.int32), data['timestamps'])
+
+
+def read_manifest(dataset_dir: str) -> Dict[str, Dict]:
+    """
+    Latest manifest.jsonl entry per clip hash ({} without a manifest)
+
+    Entries are appended, so a clip that failed and was retried has several;
+    the last one is current. Entries without a 'status' predate it and are 'ok'.
+    """
+    entries = {}
+    manifest_path = os.path.join(dataset_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return entries
+    with open(manifest_path, 'r') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entry.setdefault('status', 'ok')
+                entries[entry['hash']] = entry
+    return entries
+
+
+def load_landmark_dataset(dataset_dir: str) -> List[Tuple[str, PackedSequence]]:
+    """
+    (label, sequence) pairs of a compact landmark dataset: a manifest.jsonl
+    with one {'hash', 'label', 'file', ...} entry per clip, next to the
+    .npz files it names (see fsl_dataset_builder.py). Clips recorded as
+    failed are left out.
+    """
+    return [
+        (entry['label'], load_packed_sequence(os.path.join(dataset_dir, entry['file'])))
+        for entry in read_manifest(dataset_dir).values()
+        if entry['status'] == 'ok'
+    ]
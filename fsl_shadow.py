@@ -0,0 +1,134 @@
+import random
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import Dict, Optional
+
+try:
+    from gevent.threadpool import ThreadPool
+except ImportError:  # plain threads outside the gevent server (CLI, notebooks)
+    ThreadPool = None
+
+
+class ShadowEvaluator:
+    """
+    Scores a candidate FSL model on a sample of live feature rows
+
+    The primary SimpleFSLPredictor hands every feature row it predicted on
+    to submit(), which only copies the row and queues it on a native
+    worker thread; the caller never waits for the candidate. When the
+    worker is still busy the row is dropped and counted instead of queued,
+    so a slow candidate cannot build up a backlog.
+
+    The worker only reads the candidate: it scales into a fresh row rather
+    than the candidate's preallocated buffers, and its cascade stage counts
+    are returned with the result and added up here under the lock.
+    """
+
+    def __init__(self, candidate, sample_rate: float = 0.1, latency_window: int = 1000,
+                 seed: Optional[int] = None):
+        self.candidate = candidate
+        self.sample_rate = sample_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._busy = False
+
+        # A gevent ThreadPool runs the candidate in a real OS thread, so the
+        # forest does not hold up the event loop serving the sockets
+        if ThreadPool is not None:
+            self._pool = ThreadPool(1)
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            self._pool = ThreadPoolExecutor(max_workers=1)
+
+        self.counts = {'offered': 0, 'sampled': 0, 'dropped': 0, 'errors': 0, 'agreed': 0}
+        self._confidence_delta = 0.0
+        self._abs_confidence_delta = 0.0
+        self._latencies = deque(maxlen=latency_window)
+        self._disagreements = {}
+        self._stage_hits = {'stage1': 0, 'full': 0}
+
+    def submit(self, features: np.ndarray, prediction: str, confidence: float) -> bool:
+        """Offer one unscaled feature row and the primary's answer (confidence 0-1)"""
+        with self._lock:
+            self.counts['offered'] += 1
+            if self._random.random() >= self.sample_rate:
+                return False
+            if self._busy:
+                self.counts['dropped'] += 1
+                return False
+            self._busy = True
+
+        row = np.array(features, dtype=np.float64).reshape(1, -1)
+        if ThreadPool is not None:
+            self._pool.spawn(self._score, row).rawlink(
+                lambda result: self._record(result.get() if result.successful() else None, prediction, confidence))
+        else:
+            self._pool.submit(self._score, row).add_done_callback(
+                lambda future: self._record(future.result() if not future.exception() else None, prediction, confidence))
+        return True
+
+    def _score(self, row: np.ndarray):
+        """Runs on the worker thread: (label, confidence, latency in seconds, cascade stage hits)"""
+        start = time.perf_counter()
+        candidate = self.candidate
+        stage_hits = {'stage1': 0, 'full': 0}
+        probs = candidate._predict_rows_proba((row - candidate._scaler_mean) / candidate._scaler_scale, stage_hits)[0]
+        best = int(probs.argmax())
+        return candidate.class_name(best), float(probs[best]), time.perf_counter() - start, stage_hits
+
+    def _record(self, outcome, prediction: str, confidence: float):
+        with self._lock:
+            self._busy = False
+            if outcome is None:
+                self.counts['errors'] += 1
+                return
+
+            label, candidate_confidence, latency, stage_hits = outcome
+            self.counts['sampled'] += 1
+            for stage, hits in stage_hits.items():
+                self._stage_hits[stage] += hits
+            self._latencies.append(latency)
+            delta = candidate_confidence - confidence
+            self._confidence_delta += delta
+            self._abs_confidence_delta += abs(delta)
+            if label == prediction:
+                self.counts['agreed'] += 1
+            else:
+                pair = (prediction, label)
+                self._disagreements[pair] = self._disagreements.get(pair, 0) + 1
+
+    def stats(self, top_disagreements: int = 10) -> Dict:
+        """Agreement, confidence deltas (candidate - primary, 0-1) and candidate latency"""
+        with self._lock:
+            counts = dict(self.counts)
+            sampled = counts['sampled']
+            latencies_ms = np.array(self._latencies) * 1000
+            disagreements = sorted(self._disagreements.items(), key=lambda item: item[1], reverse=True)
+            cascade = self.candidate.cascade
+
+            return {
+                'model_dir': self.candidate.model_dir,
+                'version': self.candidate.version,
+                'sample_rate': self.sample_rate,
+                **counts,
+                'agreement_rate': counts['agreed'] / sampled if sampled else None,
+                'mean_confidence_delta': self._confidence_delta / sampled if sampled else None,
+                'mean_abs_confidence_delta': self._abs_confidence_delta / sampled if sampled else None,
+                'latency_ms': {
+                    'mean': float(latencies_ms.mean()),
+                    'p50': float(np.percentile(latencies_ms, 50)),
+                    'p95': float(np.percentile(latencies_ms, 95)),
+                    'max': float(latencies_ms.max())
+                } if len(latencies_ms) else None,
+                'cascade': {
+                    'stage1_hits': self._stage_hits['stage1'],
+                    'full_forest_hits': self._stage_hits['full'],
+                    'stage1_rate': self._stage_hits['stage1'] / sampled if sampled else 0.0
+                } if cascade else None,
+                'top_disagreements': [
+                    {'primary': primary, 'candidate': candidate, 'count': count}
+                    for (primary, candidate), count in disagreements[:top_disagreements]
+                ]
+            }
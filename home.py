@@ -1,22 +1,14 @@
-from flask import Blueprint, render_template, session, redirect, url_for, current_app, request
+from flask import Blueprint, render_template, session, redirect, url_for, request
 import random
 from string import ascii_uppercase
 
+from user_store import get_user_by_id
+
 home_bp = Blueprint('home', __name__, url_prefix='/home')
 
 rooms = {}
 game_states = {}
 
-def get_user_by_id(user_id):
-    """Get user by ID from Supabase"""
-    supabase = current_app.config['SUPABASE']
-    try:
-        result = supabase.table('users').select('*').eq('id', user_id).execute()
-        return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error getting user by ID: {e}")
-        return None
-
 def generate_unique_code(length):
     while True:
         code = ""
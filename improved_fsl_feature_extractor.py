@@ -1,12 +1,70 @@
 import json
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 from scipy import signal
-from scipy.spatial.distance import euclidean
 import os
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 import pickle
 
+from fsl_frame_adapter import PackedSequence, load_landmark_dataset, pack_batch, pack_sequence
+
+
+def _present(points: np.ndarray) -> np.ndarray:
+    """True where a point is not at the origin, i.e. `not np.allclose(point, 0)` over the last axis"""
+    return np.any(np.abs(points) > 1e-8, axis=-1)
+
+
+def _masked_mean(values: np.ndarray, mask: np.ndarray, axis) -> np.ndarray:
+    """Mean of the masked-in values along `axis`, 0 where nothing is masked in"""
+    count = mask.sum(axis=axis)
+    total = np.where(mask, values, 0.0).sum(axis=axis)
+    return np.divide(total, count, out=np.zeros(np.shape(total)), where=count > 0)
+
+
+def _masked_std(values: np.ndarray, mask: np.ndarray, axis) -> np.ndarray:
+    """Population std of the masked-in values along `axis`, 0 where nothing is masked in"""
+    mean = np.expand_dims(_masked_mean(values, mask, axis), axis)
+    return np.sqrt(_masked_mean((values - mean) ** 2, mask, axis))
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator, 0 where the denominator is 0"""
+    numerator, denominator = np.broadcast_arrays(numerator, denominator)
+    return np.divide(numerator, denominator, out=np.zeros(numerator.shape), where=denominator != 0)
+
+
+def _compact(valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Order that moves the valid entries of the last axis to the front (keeping
+    their order), the mask of the first `count` slots, and `count` itself.
+    Batched equivalent of building a Python list of only the valid entries.
+    """
+    order = np.argsort(~valid, axis=-1, kind='stable')
+    count = valid.sum(axis=-1)
+    mask = np.arange(valid.shape[-1]) < count[..., None]
+    return order, mask, count
+
+
+def _turn_angles(ax, ay, bx, by) -> Tuple[np.ndarray, np.ndarray]:
+    """Angle between vectors a and b, and whether both are non-zero"""
+    norm_a = np.hypot(ax, ay)
+    norm_b = np.hypot(bx, by)
+    ok = (norm_a > 0) & (norm_b > 0)
+    cos_angle = _safe_divide(ax * bx + ay * by, norm_a * norm_b)
+    return np.arccos(np.clip(cos_angle, -1, 1)), ok
+
+
+def _masked_corr(a: np.ndarray, b: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """max(0, Pearson correlation) of the masked-in values, 0 if either side is constant"""
+    std_a = _masked_std(a, mask, -1)
+    std_b = _masked_std(b, mask, -1)
+    mean_a = _masked_mean(a, mask, -1)[..., None]
+    mean_b = _masked_mean(b, mask, -1)[..., None]
+    cov = _masked_mean((a - mean_a) * (b - mean_b), mask, -1)
+    ok = (std_a > 0) & (std_b > 0)
+    corr = _safe_divide(cov, np.where(ok, std_a * std_b, 0))
+    return np.clip(corr, 0, 1)
+
 class ImprovedFSLFeatureExtractor:
     def __init__(self):
         self.feature_names = []
@@ -85,7 +143,14 @@ class ImprovedFSLFeatureExtractor:
         ])
     
     def extract_features_from_dataset(self, dataset_path: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
-        """Extract features from the entire dataset"""
+        """Extract features from the entire dataset
+        
+        `dataset_path` is a dataset JSON file or a compact landmark dataset
+        directory built by fsl_dataset_builder.py.
+        """
+        if os.path.isdir(dataset_path):
+            return self.extract_features_from_landmark_dataset(dataset_path)
+        
         with open(dataset_path, 'r') as f:
             dataset = json.load(f)
         
@@ -120,795 +185,305 @@ class ImprovedFSLFeatureExtractor:
         
         return X, y, self.feature_names
     
-    def extract_sequence_features(self, frames: List[Dict]) -> Optional[np.ndarray]:
-        """Extract enhanced features from a single sequence"""
-        if not frames or len(frames) < 5:
-            return None
-        
-        try:
-            landmarks_sequence = self.preprocess_sequence(frames)
-            if landmarks_sequence is None:
-                return None
-            
-            features = []
-            
-            # Spatial features (30)
-            if self.config['spatial_features']:
-                spatial_features = self.extract_spatial_features(landmarks_sequence)
-                features.extend(spatial_features)
-            
-            # Enhanced temporal features (12)
-            if self.config['temporal_features']:
-                temporal_features = self.extract_enhanced_temporal_features(landmarks_sequence)
-                features.extend(temporal_features)
-            
-            # Geometric features (4)
-            if self.config['geometric_features']:
-                geometric_features = self.extract_geometric_features(landmarks_sequence)
-                features.extend(geometric_features)
-            
-            # Statistical features (8)
-            if self.config['statistical_features']:
-                statistical_features = self.extract_statistical_features(landmarks_sequence)
-                features.extend(statistical_features)
-            
-            # NEW: Enhanced trajectory features (16)
-            if self.config['trajectory_features']:
-                trajectory_features = self.extract_trajectory_features(landmarks_sequence)
-                features.extend(trajectory_features)
-            
-            # Global motion features (6)
-            global_features = self.extract_global_features(landmarks_sequence, frames)
-            features.extend(global_features)
-            
-            return np.array(features)
-            
-        except Exception as e:
-            print(f"Error in extract_sequence_features: {e}")
-            return None
-    
-    def preprocess_sequence(self, frames: List[Dict]) -> Optional[np.ndarray]:
-        """Convert raw frame data to structured landmarks array"""
-        try:
-            sequence_landmarks = []
-            
-            for frame in frames:
-                frame_landmarks = []
-                hands = frame.get('hands', [])
-                
-                # Ensure exactly 2 hands (pad with zeros if needed)
-                while len(hands) < 2:
-                    hands.append({'landmarks': [{'x': 0, 'y': 0, 'z': 0}] * 21})
-                
-                for hand in hands[:2]:
-                    hand_landmarks = []
-                    landmarks = hand.get('landmarks', [])
-                    
-                    # Ensure exactly 21 landmarks per hand
-                    while len(landmarks) < 21:
-                        landmarks.append({'x': 0, 'y': 0, 'z': 0})
-                    
-                    for landmark in landmarks[:21]:
-                        hand_landmarks.append([
-                            float(landmark.get('x', 0)),
-                            float(landmark.get('y', 0)),
-                            float(landmark.get('z', 0))
-                        ])
-                    
-                    frame_landmarks.append(hand_landmarks)
-                
-                sequence_landmarks.append(frame_landmarks)
-            
-            landmarks_array = np.array(sequence_landmarks, dtype=np.float32)
-            landmarks_array = self.smooth_sequence(landmarks_array)
-            landmarks_array = self.normalize_sequence(landmarks_array)
-            
-            return landmarks_array
-            
-        except Exception as e:
-            print(f"Error in preprocess_sequence: {e}")
-            return None
-    
-    def smooth_sequence(self, landmarks_array: np.ndarray) -> np.ndarray:
-        """Apply smoothing filter to reduce noise"""
-        if landmarks_array.shape[0] < self.config['smoothing_window']:
-            return landmarks_array
-        
-        try:
-            window = np.ones(self.config['smoothing_window']) / self.config['smoothing_window']
-            smoothed = landmarks_array.copy()
-            
-            for hand in range(landmarks_array.shape[1]):
-                for landmark in range(landmarks_array.shape[2]):
-                    for coord in range(landmarks_array.shape[3]):
-                        sequence = landmarks_array[:, hand, landmark, coord]
-                        if np.any(sequence != 0):
-                            smoothed_seq = np.convolve(sequence, window, mode='same')
-                            smoothed[:, hand, landmark, coord] = smoothed_seq
-            
-            return smoothed
-        except Exception as e:
-            print(f"Error in smoothing: {e}")
-            return landmarks_array
-    
-    def normalize_sequence(self, landmarks_array: np.ndarray) -> np.ndarray:
-        """Normalize landmarks relative to wrist position"""
-        try:
-            normalized = landmarks_array.copy()
-            
-            for frame in range(landmarks_array.shape[0]):
-                for hand in range(landmarks_array.shape[1]):
-                    wrist = landmarks_array[frame, hand, 0]
-                    if np.any(wrist != 0):
-                        normalized[frame, hand, :, :] = landmarks_array[frame, hand, :, :] - wrist
-            
-            return normalized
-        except Exception as e:
-            print(f"Error in normalization: {e}")
-            return landmarks_array
-    
-    def extract_spatial_features(self, landmarks_sequence: np.ndarray) -> List[float]:
-        """Extract spatial features (same as before but more robust)"""
-        features = []
-        
-        for hand_idx in range(2):
-            try:
-                if hand_idx >= landmarks_sequence.shape[1]:
-                    features.extend([0] * 15)
-                    continue
-                
-                hand_landmarks = landmarks_sequence[:, hand_idx, :, :2]
-                
-                if not np.any(hand_landmarks):
-                    features.extend([0] * 15)
-                    continue
-                
-                # Hand span
-                thumb_tip = hand_landmarks[:, 4]
-                pinky_tip = hand_landmarks[:, 20]
-                hand_spans = []
-                for i in range(len(thumb_tip)):
-                    if not (np.allclose(thumb_tip[i], 0) or np.allclose(pinky_tip[i], 0)):
-                        hand_spans.append(euclidean(thumb_tip[i], pinky_tip[i]))
-                features.append(np.mean(hand_spans) if hand_spans else 0)
-                
-                # Finger spread
-                finger_tips = [4, 8, 12, 16, 20]
-                spreads = []
-                for frame in range(landmarks_sequence.shape[0]):
-                    frame_spreads = []
-                    for i in range(len(finger_tips)-1):
-                        tip1 = hand_landmarks[frame, finger_tips[i]]
-                        tip2 = hand_landmarks[frame, finger_tips[i+1]]
-                        if not (np.allclose(tip1, 0) or np.allclose(tip2, 0)):
-                            frame_spreads.append(euclidean(tip1, tip2))
-                    if frame_spreads:
-                        spreads.append(np.mean(frame_spreads))
-                features.append(np.mean(spreads) if spreads else 0)
-                
-                # Hand orientation
-                wrist = hand_landmarks[:, 0]
-                middle_mcp = hand_landmarks[:, 9]
-                orientations = []
-                for frame in range(len(wrist)):
-                    if not (np.allclose(wrist[frame], 0) or np.allclose(middle_mcp[frame], 0)):
-                        vec = middle_mcp[frame] - wrist[frame]
-                        angle = np.arctan2(vec[1], vec[0])
-                        orientations.append(angle)
-                
-                avg_orientation = np.mean(orientations) if orientations else 0
-                std_orientation = np.std(orientations) if orientations else 0
-                features.extend([avg_orientation, std_orientation])
-                
-                # Palm position statistics
-                palm_center = np.mean(hand_landmarks, axis=2)
-                palm_positions = []
-                for frame in range(len(palm_center)):
-                    if not np.allclose(palm_center[frame], 0):
-                        palm_positions.append(palm_center[frame])
-                
-                if palm_positions:
-                    palm_positions = np.array(palm_positions)
-                    features.extend([
-                        np.mean(palm_positions[:, 0]), np.mean(palm_positions[:, 1]),
-                        np.std(palm_positions[:, 0]), np.std(palm_positions[:, 1]),
-                        np.max(palm_positions[:, 0]) - np.min(palm_positions[:, 0]),
-                        np.max(palm_positions[:, 1]) - np.min(palm_positions[:, 1])
-                    ])
-                else:
-                    features.extend([0] * 6)
-                
-                # Finger bends (simplified)
-                finger_indices = [[1,2,3,4], [5,6,7,8], [9,10,11,12], [13,14,15,16], [17,18,19,20]]
-                finger_bends = []
-                
-                for finger in finger_indices:
-                    finger_landmarks = hand_landmarks[:, finger, :]
-                    bends = []
-                    for frame in range(landmarks_sequence.shape[0]):
-                        base = finger_landmarks[frame, 0]
-                        tip = finger_landmarks[frame, -1]
-                        if not (np.allclose(base, 0) or np.allclose(tip, 0)):
-                            bend = euclidean(base, tip)
-                            bends.append(bend)
-                    finger_bends.append(np.mean(bends) if bends else 0)
-                
-                features.extend(finger_bends)
-                
-            except Exception as e:
-                print(f"Error in spatial features for hand {hand_idx}: {e}")
-                features.extend([0] * 15)
-        
-        # Ensure exactly 30 features
-        while len(features) < 30:
-            features.append(0)
-        return features[:30]
-    
-    def extract_enhanced_temporal_features(self, landmarks_sequence: np.ndarray) -> List[float]:
-        """Extract enhanced temporal features with better motion analysis"""
-        features = []
-        
-        for hand_idx in range(2):
-            try:
-                if hand_idx >= landmarks_sequence.shape[1] or landmarks_sequence.shape[0] < 2:
-                    features.extend([0] * 6)
-                    continue
-                
-                wrist_positions = landmarks_sequence[:, hand_idx, 0, :2]
-                
-                # Calculate velocities
-                velocities = []
-                for i in range(1, len(wrist_positions)):
-                    if not (np.allclose(wrist_positions[i], 0) or np.allclose(wrist_positions[i-1], 0)):
-                        velocity = euclidean(wrist_positions[i], wrist_positions[i-1])
-                        velocities.append(velocity)
-                
-                if velocities:
-                    features.extend([
-                        np.mean(velocities),  # avg velocity
-                        np.std(velocities)    # velocity consistency
-                    ])
-                else:
-                    features.extend([0, 0])
-                
-                # Calculate accelerations
-                accelerations = []
-                if len(velocities) > 1:
-                    for i in range(1, len(velocities)):
-                        acceleration = abs(velocities[i] - velocities[i-1])
-                        accelerations.append(acceleration)
-                
-                if accelerations:
-                    features.extend([
-                        np.mean(accelerations),  # avg acceleration
-                        np.max(accelerations)    # max acceleration
-                    ])
-                else:
-                    features.extend([0, 0])
-                
-                # Velocity change patterns
-                velocity_changes = len([i for i in range(1, len(velocities)) if abs(velocities[i] - velocities[i-1]) > np.std(velocities) * 0.5]) if len(velocities) > 1 else 0
-                features.append(velocity_changes)
-                
-                # Movement smoothness
-                if len(velocities) > 2:
-                    smooth_ratio = 1 - (np.std(velocities) / (np.mean(velocities) + 1e-8))
-                    features.append(max(0, smooth_ratio))
-                else:
-                    features.append(0)
-                
-            except Exception as e:
-                print(f"Error in temporal features for hand {hand_idx}: {e}")
-                features.extend([0] * 6)
-        
-        # Ensure exactly 12 features
-        while len(features) < 12:
-            features.append(0)
-        return features[:12]
-    
-    def extract_geometric_features(self, landmarks_sequence: np.ndarray) -> List[float]:
-        """Extract geometric features"""
-        features = []
-        
-        for hand_idx in range(2):
-            try:
-                if hand_idx >= landmarks_sequence.shape[1]:
-                    features.extend([0, 0])
-                    continue
-                
-                hand_landmarks = landmarks_sequence[:, hand_idx, :, :2]
-                if not np.any(hand_landmarks):
-                    features.extend([0, 0])
-                    continue
-                
-                # Thumb-index distance
-                thumb_index_dists = []
-                for i in range(len(hand_landmarks)):
-                    if not (np.allclose(hand_landmarks[i, 4], 0) or np.allclose(hand_landmarks[i, 8], 0)):
-                        dist = euclidean(hand_landmarks[i, 4], hand_landmarks[i, 8])
-                        thumb_index_dists.append(dist)
-                features.append(np.mean(thumb_index_dists) if thumb_index_dists else 0)
-                
-                # Wrist-middle distance
-                wrist_middle_dists = []
-                for i in range(len(hand_landmarks)):
-                    if not (np.allclose(hand_landmarks[i, 0], 0) or np.allclose(hand_landmarks[i, 12], 0)):
-                        dist = euclidean(hand_landmarks[i, 0], hand_landmarks[i, 12])
-                        wrist_middle_dists.append(dist)
-                features.append(np.mean(wrist_middle_dists) if wrist_middle_dists else 0)
-                
-            except Exception as e:
-                print(f"Error in geometric features for hand {hand_idx}: {e}")
-                features.extend([0, 0])
-        
-        # Ensure exactly 4 features
-        while len(features) < 4:
-            features.append(0)
-        return features[:4]
-    
-    def extract_statistical_features(self, landmarks_sequence: np.ndarray) -> List[float]:
-        """Extract statistical features"""
-        features = []
-        
-        for hand_idx in range(2):
-            try:
-                if hand_idx >= landmarks_sequence.shape[1]:
-                    features.extend([0, 0, 0, 0])
-                    continue
-                
-                hand_landmarks = landmarks_sequence[:, hand_idx, :, :2].reshape(-1, 2)
-                if not np.any(hand_landmarks):
-                    features.extend([0, 0, 0, 0])
-                    continue
-                
-                # Filter out zero landmarks
-                valid_landmarks = hand_landmarks[~np.all(hand_landmarks == 0, axis=1)]
-                
-                if len(valid_landmarks) > 0:
-                    features.extend([
-                        np.mean(valid_landmarks[:, 0]),
-                        np.mean(valid_landmarks[:, 1]),
-                        np.std(valid_landmarks[:, 0]),
-                        np.std(valid_landmarks[:, 1])
-                    ])
-                else:
-                    features.extend([0, 0, 0, 0])
-                
-            except Exception as e:
-                print(f"Error in statistical features for hand {hand_idx}: {e}")
-                features.extend([0, 0, 0, 0])
-        
-        # Ensure exactly 8 features
-        while len(features) < 8:
-            features.append(0)
-        return features[:8]
-    
-    def extract_trajectory_features(self, landmarks_sequence: np.ndarray) -> List[float]:
-        """NEW: Extract enhanced trajectory features to distinguish gesture shapes"""
-        features = []
-        
-        for hand_idx in range(2):
-            try:
-                if hand_idx >= landmarks_sequence.shape[1]:
-                    features.extend([0] * 8)
-                    continue
-                
-                # Use wrist position for trajectory analysis
-                wrist_positions = landmarks_sequence[:, hand_idx, 0, :2]
-                
-                # Filter out zero positions
-                valid_positions = []
-                for pos in wrist_positions:
-                    if not np.allclose(pos, 0):
-                        valid_positions.append(pos)
-                
-                if len(valid_positions) < 5:
-                    features.extend([0] * 8)
-                    continue
-                
-                valid_positions = np.array(valid_positions)
-                
-                # 1. Circularity score
-                circularity = self.calculate_circularity(valid_positions)
-                features.append(circularity)
-                
-                # 2. Angularity score (corner detection)
-                angularity = self.calculate_angularity(valid_positions)
-                features.append(angularity)
-                
-                # 3. Corner count
-                corner_count = self.count_corners(valid_positions)
-                features.append(corner_count)
-                
-                # 4. Path regularity
-                regularity = self.calculate_path_regularity(valid_positions)
-                features.append(regularity)
-                
-                # 5. Direction changes
-                direction_changes = self.count_direction_changes(valid_positions)
-                features.append(direction_changes)
-                
-                # 6. Straightness index
-                straightness = self.calculate_straightness(valid_positions)
-                features.append(straightness)
-                
-                # 7. Curvature variance
-                curvature_variance = self.calculate_curvature_variance(valid_positions)
-                features.append(curvature_variance)
-                
-                # 8. Symmetry score
-                symmetry = self.calculate_symmetry_score(valid_positions)
-                features.append(symmetry)
-                
-            except Exception as e:
-                print(f"Error in trajectory features for hand {hand_idx}: {e}")
-                features.extend([0] * 8)
-        
-        # Ensure exactly 16 features
-        while len(features) < 16:
-            features.append(0)
-        return features[:16]
-    
-    def calculate_circularity(self, positions: np.ndarray) -> float:
-        """Calculate how circular a path is (1.0 = perfect circle, 0.0 = not circular)"""
-        if len(positions) < 5:
-            return 0.0
+    def extract_features_from_landmark_dataset(self, dataset_dir: str,
+                                               batch_size: int = 256) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """Extract features from a compact landmark dataset, a batch of clips at a time"""
+        recordings = [(label, sequence) for label, sequence in load_landmark_dataset(dataset_dir) if len(sequence) >= 5]
+        if not recordings:
+            raise ValueError("No valid sequences found in dataset for feature extraction.")
         
-        try:
-            center = np.mean(positions, axis=0)
-            radii = [np.linalg.norm(pos - center) for pos in positions]
-            
-            if np.mean(radii) == 0:
-                return 0.0
-            
-            # Circularity = 1 - coefficient of variation of radii
-            circularity = 1 - (np.std(radii) / np.mean(radii))
-            return max(0, min(1, circularity))
-        except:
-            return 0.0
-    
-    def calculate_angularity(self, positions: np.ndarray) -> float:
-        """Calculate how angular/sharp a path is (good for detecting squares)"""
-        if len(positions) < 4:
-            return 0.0
+        print(f"Extracting enhanced features from {len(recordings)} clips...")
         
-        try:
-            sharp_angles = 0
-            for i in range(2, len(positions)):
-                v1 = positions[i-1] - positions[i-2]
-                v2 = positions[i] - positions[i-1]
-                
-                norm1, norm2 = np.linalg.norm(v1), np.linalg.norm(v2)
-                if norm1 > 0 and norm2 > 0:
-                    cos_angle = np.dot(v1, v2) / (norm1 * norm2)
-                    cos_angle = np.clip(cos_angle, -1, 1)
-                    angle = np.arccos(cos_angle)
-                    
-                    # Count sharp angles (< 120 degrees)
-                    if angle < 2 * np.pi / 3:
-                        sharp_angles += 1
-            
-            return sharp_angles / max(1, len(positions) - 2)
-        except:
-            return 0.0
-    
-    def count_corners(self, positions: np.ndarray) -> float:
-        """Count distinct corners in the path"""
-        if len(positions) < 6:
-            return 0.0
+        batches = []
+        for start in range(0, len(recordings), batch_size):
+            landmarks, hand_counts, lengths = pack_batch([sequence for _, sequence in recordings[start:start + batch_size]])
+            batches.append(self.extract_batch_features(landmarks, hand_counts, lengths=lengths))
         
-        try:
-            corners = 0
-            angle_threshold = np.pi / 3  # 60 degrees
-            
-            for i in range(2, len(positions) - 2):
-                v1 = positions[i] - positions[i-2]
-                v2 = positions[i+2] - positions[i]
-                
-                norm1, norm2 = np.linalg.norm(v1), np.linalg.norm(v2)
-                if norm1 > 0 and norm2 > 0:
-                    cos_angle = np.dot(v1, v2) / (norm1 * norm2)
-                    cos_angle = np.clip(cos_angle, -1, 1)
-                    angle = np.arccos(cos_angle)
-                    
-                    if angle > angle_threshold:
-                        corners += 1
-            
-            return min(corners, 8)  # Cap at 8 to normalize
-        except:
-            return 0.0
-    
-    def calculate_path_regularity(self, positions: np.ndarray) -> float:
-        """Calculate how regular/consistent the path spacing is"""
-        if len(positions) < 3:
-            return 0.0
+        X = np.concatenate(batches)
+        y = np.array([label for label, _ in recordings])
         
-        try:
-            distances = []
-            for i in range(1, len(positions)):
-                dist = np.linalg.norm(positions[i] - positions[i-1])
-                distances.append(dist)
-            
-            if len(distances) == 0 or np.mean(distances) == 0:
-                return 0.0
-            
-            regularity = 1 - (np.std(distances) / np.mean(distances))
-            return max(0, min(1, regularity))
-        except:
-            return 0.0
-    
-    def count_direction_changes(self, positions: np.ndarray) -> float:
-        """Count significant direction changes"""
-        if len(positions) < 3:
-            return 0.0
+        print(f"Extracted {X.shape[0]} feature vectors with {X.shape[1]} features each")
         
-        try:
-            direction_changes = 0
-            threshold = np.pi / 6  # 30 degrees
-            
-            for i in range(1, len(positions) - 1):
-                v1 = positions[i] - positions[i-1]
-                v2 = positions[i+1] - positions[i]
-                
-                norm1, norm2 = np.linalg.norm(v1), np.linalg.norm(v2)
-                if norm1 > 0 and norm2 > 0:
-                    cos_angle = np.dot(v1, v2) / (norm1 * norm2)
-                    cos_angle = np.clip(cos_angle, -1, 1)
-                    angle = np.arccos(cos_angle)
-                    
-                    if angle > threshold:
-                        direction_changes += 1
-            
-            return min(direction_changes, 20) / 20.0  # Normalize
-        except:
-            return 0.0
+        return X, y, self.feature_names
     
-    def calculate_straightness(self, positions: np.ndarray) -> float:
-        """Calculate how straight the overall path is"""
-        if len(positions) < 2:
-            return 0.0
+    def extract_sequence_features(self, frames: Union[List[Dict], PackedSequence], out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Extract enhanced features from a single sequence
+
+        `frames` may be a list of legacy frame dicts or a PackedSequence from
+        fsl_frame_adapter; packed input is used as-is. If `out` is given, the features are written into it (it must hold
+        len(self.feature_names) values) and `out` is returned instead of a
+        freshly allocated array.
+        """
+        if not frames or len(frames) < 5:
+            return None
         
         try:
-            total_path_length = sum(np.linalg.norm(positions[i] - positions[i-1]) 
-                                  for i in range(1, len(positions)))
-            direct_distance = np.linalg.norm(positions[-1] - positions[0])
+            packed = pack_sequence(frames)
+            features = self.extract_batch_features(packed.landmarks[None], packed.hand_counts[None])
+            if features is None:
+                return None
             
-            if total_path_length == 0:
-                return 0.0
+            if out is not None:
+                out[:] = features[0]
+                return out
             
-            straightness = direct_distance / total_path_length
-            return min(1, straightness)
-        except:
-            return 0.0
-    
-    def calculate_curvature_variance(self, positions: np.ndarray) -> float:
-        """Calculate variance in curvature along the path"""
-        if len(positions) < 4:
-            return 0.0
-        
-        try:
-            curvatures = []
-            for i in range(1, len(positions) - 1):
-                v1 = positions[i] - positions[i-1]
-                v2 = positions[i+1] - positions[i]
-                
-                # Calculate curvature approximation
-                cross_product = np.cross(v1, v2)
-                v1_norm = np.linalg.norm(v1)
-                
-                if v1_norm > 0:
-                    curvature = abs(cross_product) / (v1_norm ** 3)
-                    curvatures.append(curvature)
+            return features[0]
             
-            return np.std(curvatures) if curvatures else 0.0
-        except:
-            return 0.0
+        except Exception as e:
+            print(f"Error in extract_sequence_features: {e}")
+            return None
     
-    def calculate_symmetry_score(self, positions: np.ndarray) -> float:
-        """Calculate how symmetric the path is"""
-        if len(positions) < 4:
-            return 0.0
-        
-        try:
-            center = np.mean(positions, axis=0)
-            
-            # Check symmetry by comparing distances from center
-            distances = [np.linalg.norm(pos - center) for pos in positions]
-            
-            if len(distances) < 4:
-                return 0.0
-            
-            # Compare first half with second half (reversed)
-            mid = len(distances) // 2
-            first_half = distances[:mid]
-            second_half = distances[-mid:][::-1]  # reversed
-            
-            if len(first_half) != len(second_half) or len(first_half) == 0:
-                return 0.0
-            
-            # Calculate correlation between halves
-            if np.std(first_half) > 0 and np.std(second_half) > 0:
-                correlation = np.corrcoef(first_half, second_half)[0, 1]
-                return max(0, correlation) if not np.isnan(correlation) else 0.0
-            else:
-                return 0.0
-        except:
-            return 0.0
+    def preprocess_batch(self, landmarks: np.ndarray, frame_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Box-smooth each coordinate track and make landmarks relative to the wrist, for (N, T, 2, 21, 3) landmarks
+        
+        Frames where the (N, T) `frame_mask` is False are treated as padding:
+        they are zeroed before and after smoothing, so the real frames are
+        smoothed exactly as if the sequence started at its first real frame.
+        """
+        landmarks = np.asarray(landmarks, dtype=np.float32)
+        num_frames = landmarks.shape[1]
+        if frame_mask is not None:
+            frame_mask = frame_mask[:, :, None, None, None]
+            landmarks = np.where(frame_mask, landmarks, np.float32(0))
+        window = self.config['smoothing_window']
+        
+        if num_frames >= window:
+            # np.convolve(..., mode='same') with a box window, on every
+            # coordinate track at once (all-zero tracks stay zero)
+            before = window - 1 - (window - 1) // 2
+            padded = np.zeros((landmarks.shape[0], num_frames + window - 1) + landmarks.shape[2:])
+            padded[:, before:before + num_frames] = landmarks
+            smoothed = np.zeros(landmarks.shape)
+            for offset in range(window):
+                smoothed += padded[:, offset:offset + num_frames] / window
+            landmarks = smoothed.astype(np.float32)
+            if frame_mask is not None:
+                landmarks = np.where(frame_mask, landmarks, np.float32(0))
+        
+        wrist = landmarks[:, :, :, :1, :]
+        has_wrist = np.any(wrist != 0, axis=-1, keepdims=True)
+        return landmarks - np.where(has_wrist, wrist, 0)
     
-    def extract_global_features(self, landmarks_sequence: np.ndarray, frames: List[Dict]) -> List[float]:
-        """Extract global motion features across both hands"""
-        features = []
+    def extract_batch_features(self, landmarks: np.ndarray, hand_counts: np.ndarray,
+                               lengths: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Extract features for N sequences in one vectorized pass
+        
+        `landmarks` is (N, T, 2, 21, 3) as produced by fsl_frame_adapter and
+        `hand_counts` is (N, T). Sequences shorter than T can be passed
+        right-aligned with their `lengths`: only the last lengths[i] frames of
+        row i are used (e.g. several trailing windows of one buffer).
+        Returns an (N, num_features) array in self.feature_names order, or
+        None if any sequence is shorter than 5 frames.
+        """
+        landmarks = np.asarray(landmarks)
+        if landmarks.ndim != 5:
+            return None
         
-        try:
-            # 1. Average hands detected
-            avg_hands = np.mean([len(frame.get('hands', [])) for frame in frames])
-            features.append(avg_hands)
-            
-            # 2. Hand separation change
-            if landmarks_sequence.shape[1] >= 2:
-                separations = []
-                for frame in range(landmarks_sequence.shape[0]):
-                    left_wrist = landmarks_sequence[frame, 0, 0, :2]
-                    right_wrist = landmarks_sequence[frame, 1, 0, :2]
-                    
-                    if not (np.allclose(left_wrist, 0) or np.allclose(right_wrist, 0)):
-                        separation = np.linalg.norm(left_wrist - right_wrist)
-                        separations.append(separation)
-                
-                if len(separations) > 1:
-                    separation_change = abs(separations[-1] - separations[0])
-                    features.append(separation_change)
-                else:
-                    features.append(0)
-            else:
-                features.append(0)
-            
-            # 3. Relative motion (which hand moves more)
-            left_motion = self.calculate_hand_motion(landmarks_sequence, 0)
-            right_motion = self.calculate_hand_motion(landmarks_sequence, 1)
-            total_motion = left_motion + right_motion
-            
-            if total_motion > 0:
-                relative_motion = abs(left_motion - right_motion) / total_motion
-            else:
-                relative_motion = 0
-            features.append(relative_motion)
-            
-            # 4. Dominant hand activity
-            if total_motion > 0:
-                dominant_activity = max(left_motion, right_motion) / total_motion
-            else:
-                dominant_activity = 0
-            features.append(dominant_activity)
-            
-            # 5. Hand synchronization score
-            sync_score = self.calculate_hand_synchronization(landmarks_sequence)
-            features.append(sync_score)
-            
-            # 6. Overall complexity (combination of various factors)
-            complexity = self.calculate_gesture_complexity(landmarks_sequence)
-            features.append(complexity)
-            
-        except Exception as e:
-            print(f"Error in global features: {e}")
-            features = [0] * 6
+        num_sequences, num_frames = landmarks.shape[:2]
+        lengths = np.full(num_sequences, num_frames) if lengths is None else np.asarray(lengths)
+        if num_sequences == 0 or lengths.min() < 5 or lengths.max() > num_frames:
+            return None
         
-        # Ensure exactly 6 features
-        while len(features) < 6:
-            features.append(0)
-        return features[:6]
-    
-    def calculate_hand_motion(self, landmarks_sequence: np.ndarray, hand_idx: int) -> float:
-        """Calculate total motion for a specific hand"""
-        if hand_idx >= landmarks_sequence.shape[1] or landmarks_sequence.shape[0] < 2:
-            return 0.0
+        frame_mask = np.arange(num_frames) >= (num_frames - lengths)[:, None]
+        normalized = self.preprocess_batch(landmarks, frame_mask if lengths.min() < num_frames else None)
+        hands = normalized[..., :2].astype(np.float64)        # (N, T, 2, 21, 2)
+        present = _present(hands)                               # (N, T, 2, 21)
+        nonzero = ~np.all(hands == 0, axis=-1)                  # (N, T, 2, 21)
+        
+        def landmark_distance(a, b):
+            """Per-frame distance between two landmarks and where both exist: (N, T, 2)"""
+            distance = np.linalg.norm(hands[..., a, :] - hands[..., b, :], axis=-1)
+            return distance, present[..., a] & present[..., b]
+        
+        # Wrist tracks, hand axis first: (N, 2, T)
+        wrist_x = hands[..., 0, 0].transpose(0, 2, 1)
+        wrist_y = hands[..., 0, 1].transpose(0, 2, 1)
+        wrist_present = present[..., 0].transpose(0, 2, 1)
+        steps = np.hypot(np.diff(wrist_x, axis=-1), np.diff(wrist_y, axis=-1))
+        step_valid = wrist_present[..., 1:] & wrist_present[..., :-1]
+        
+        groups = []
+        
+        # Spatial features (15 per hand)
+        if self.config['spatial_features']:
+            spans = _masked_mean(*landmark_distance(4, 20), axis=1)
+            
+            finger_tips = [4, 8, 12, 16, 20]
+            tip_gaps = np.linalg.norm(hands[..., finger_tips[1:], :] - hands[..., finger_tips[:-1], :], axis=-1)
+            tip_valid = present[..., finger_tips[1:]] & present[..., finger_tips[:-1]]
+            frame_spreads = _masked_mean(tip_gaps, tip_valid, axis=-1)
+            spreads = _masked_mean(frame_spreads, tip_valid.any(axis=-1), axis=1)
+            
+            vec = hands[..., 9, :] - hands[..., 0, :]
+            angles = np.arctan2(vec[..., 1], vec[..., 0])
+            angle_valid = present[..., 0] & present[..., 9]
+            
+            # Mean over x/y of every landmark, as the per-sequence version does
+            palm = hands.mean(axis=-1)                          # (N, T, 2, 21)
+            palm_valid = _present(palm)[..., None]
+            palm = palm[..., :2]
+            palm_range = np.where(palm_valid, palm, -np.inf).max(axis=1) - np.where(palm_valid, palm, np.inf).min(axis=1)
+            palm_range = np.where(palm_valid.any(axis=1), palm_range, 0)
+            
+            bend_distance = np.linalg.norm(hands[..., [1, 5, 9, 13, 17], :] - hands[..., [4, 8, 12, 16, 20], :], axis=-1)
+            bend_valid = present[..., [1, 5, 9, 13, 17]] & present[..., [4, 8, 12, 16, 20]]
+            
+            groups.append(np.concatenate([
+                spans[..., None],
+                spreads[..., None],
+                _masked_mean(angles, angle_valid, axis=1)[..., None],
+                _masked_std(angles, angle_valid, axis=1)[..., None],
+                _masked_mean(palm, palm_valid, axis=1),
+                _masked_std(palm, palm_valid, axis=1),
+                palm_range,
+                _masked_mean(bend_distance, bend_valid, axis=1)
+            ], axis=-1))
+        
+        # Temporal features (6 per hand), on the valid wrist steps only
+        velocity_order, velocity_mask, velocity_count = _compact(step_valid)
+        velocities = np.take_along_axis(steps, velocity_order, axis=-1)
+        velocity_mean = _masked_mean(velocities, velocity_mask, axis=-1)
+        velocity_std = _masked_std(velocities, velocity_mask, axis=-1)
+        
+        if self.config['temporal_features']:
+            accelerations = np.abs(np.diff(velocities, axis=-1))
+            acceleration_mask = velocity_mask[..., 1:]
+            max_acceleration = np.where(acceleration_mask, accelerations, -np.inf).max(axis=-1)
+            velocity_changes = np.sum(acceleration_mask & (accelerations > velocity_std[..., None] * 0.5), axis=-1)
+            smooth_ratio = np.maximum(0, 1 - velocity_std / (velocity_mean + 1e-8))
+            
+            groups.append(np.stack([
+                velocity_mean,
+                velocity_std,
+                _masked_mean(accelerations, acceleration_mask, axis=-1),
+                np.where(velocity_count > 1, max_acceleration, 0),
+                velocity_changes,
+                np.where(velocity_count > 2, smooth_ratio, 0)
+            ], axis=-1))
+        
+        # Geometric features (2 per hand)
+        if self.config['geometric_features']:
+            groups.append(np.stack([
+                _masked_mean(*landmark_distance(4, 8), axis=1),
+                _masked_mean(*landmark_distance(0, 12), axis=1)
+            ], axis=-1))
+        
+        # Statistical features (4 per hand), over every non-zero landmark
+        if self.config['statistical_features']:
+            coords = hands.transpose(0, 2, 4, 1, 3)             # (N, 2, xy, T, 21)
+            coord_valid = nonzero.transpose(0, 2, 1, 3)[:, :, None]
+            groups.append(np.concatenate([
+                _masked_mean(coords, coord_valid, axis=(-2, -1)),
+                _masked_std(coords, coord_valid, axis=(-2, -1))
+            ], axis=-1))
+        
+        # Trajectory features (8 per hand), on the valid wrist positions only
+        if self.config['trajectory_features']:
+            groups.append(self._batch_trajectory_features(wrist_x, wrist_y, wrist_present))
+        
+        # Each group is (N, 2, k): hand 0's k features come before hand 1's
+        columns = [group.reshape(group.shape[0], -1) for group in groups]
         
-        try:
-            wrist_positions = landmarks_sequence[:, hand_idx, 0, :2]
-            total_motion = 0
-            
-            for i in range(1, len(wrist_positions)):
-                if not (np.allclose(wrist_positions[i], 0) or np.allclose(wrist_positions[i-1], 0)):
-                    motion = np.linalg.norm(wrist_positions[i] - wrist_positions[i-1])
-                    total_motion += motion
-            
-            return total_motion
-        except:
-            return 0.0
+        # Global motion features (6)
+        avg_hands = _masked_mean(np.maximum(np.asarray(hand_counts), 2), frame_mask, axis=1)
+        
+        both_wrists = wrist_present.all(axis=1)
+        separations = np.hypot(wrist_x[:, 0] - wrist_x[:, 1], wrist_y[:, 0] - wrist_y[:, 1])
+        first = both_wrists.argmax(axis=-1)
+        last = num_frames - 1 - both_wrists[:, ::-1].argmax(axis=-1)
+        rows = np.arange(len(separations))
+        separation_change = np.where(both_wrists.sum(axis=-1) > 1,
+                                     np.abs(separations[rows, last] - separations[rows, first]), 0)
+        
+        motion = np.where(step_valid, steps, 0).sum(axis=-1)   # (N, 2)
+        total_motion = motion.sum(axis=-1)
+        relative_motion = _safe_divide(np.abs(motion[:, 0] - motion[:, 1]), total_motion)
+        dominant_activity = _safe_divide(motion.max(axis=-1), total_motion)
+        
+        sync_len = velocity_count.min(axis=-1)
+        sync_mask = np.arange(velocities.shape[-1]) < sync_len[:, None]
+        sync = np.where(sync_len > 2, _masked_corr(velocities[:, 0], velocities[:, 1], sync_mask), 0)
+        
+        landmark_density = _present(normalized).sum(axis=(1, 2, 3)) / (lengths * normalized.shape[2] * normalized.shape[3])
+        motion_complexity = np.minimum(1, np.abs(motion[:, 0] - motion[:, 1]) / 2)
+        tracks = hands.transpose(0, 2, 3, 4, 1)                 # (N, 2, 21, xy, T)
+        track_valid = nonzero.transpose(0, 2, 3, 1)[:, :, :, None]
+        track_std = _masked_std(tracks, track_valid, axis=-1).mean(axis=-1)
+        track_std = np.where(track_valid.sum(axis=-1)[..., 0] > 1, track_std, 0)
+        temporal_changes = np.minimum(1, track_std.sum(axis=(1, 2)) / 10)
+        complexity = (landmark_density + motion_complexity + temporal_changes) / 3
+        
+        columns.append(np.stack([
+            avg_hands, separation_change, relative_motion,
+            dominant_activity, sync, complexity
+        ], axis=-1))
+        
+        return np.concatenate(columns, axis=-1)
     
-    def calculate_hand_synchronization(self, landmarks_sequence: np.ndarray) -> float:
-        """Calculate how synchronized the two hands are"""
-        if landmarks_sequence.shape[1] < 2 or landmarks_sequence.shape[0] < 3:
-            return 0.0
-        
-        try:
-            left_velocities = []
-            right_velocities = []
-            
-            for i in range(1, landmarks_sequence.shape[0]):
-                # Left hand velocity
-                left_pos = landmarks_sequence[i, 0, 0, :2]
-                left_prev = landmarks_sequence[i-1, 0, 0, :2]
-                if not (np.allclose(left_pos, 0) or np.allclose(left_prev, 0)):
-                    left_vel = np.linalg.norm(left_pos - left_prev)
-                    left_velocities.append(left_vel)
-                
-                # Right hand velocity
-                right_pos = landmarks_sequence[i, 1, 0, :2]
-                right_prev = landmarks_sequence[i-1, 1, 0, :2]
-                if not (np.allclose(right_pos, 0) or np.allclose(right_prev, 0)):
-                    right_vel = np.linalg.norm(right_pos - right_prev)
-                    right_velocities.append(right_vel)
-            
-            # Calculate correlation between velocity patterns
-            min_len = min(len(left_velocities), len(right_velocities))
-            if min_len > 2:
-                left_vel = left_velocities[:min_len]
-                right_vel = right_velocities[:min_len]
-                
-                if np.std(left_vel) > 0 and np.std(right_vel) > 0:
-                    correlation = np.corrcoef(left_vel, right_vel)[0, 1]
-                    return max(0, correlation) if not np.isnan(correlation) else 0.0
-            
-            return 0.0
-        except:
-            return 0.0
+    def _batch_trajectory_features(self, xs: np.ndarray, ys: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        """Path-shape features (circularity, corners, symmetry, ...) of (N, 2, T) wrist tracks"""
+        order, mask, count = _compact(valid)
+        xs = np.take_along_axis(xs, order, axis=-1)
+        ys = np.take_along_axis(ys, order, axis=-1)
+        
+        # Circularity: spread of the distances to the path's centre
+        radii = np.hypot(xs - _masked_mean(xs, mask, -1)[..., None], ys - _masked_mean(ys, mask, -1)[..., None])
+        radius_mean = _masked_mean(radii, mask, -1)
+        circularity = np.clip(1 - _safe_divide(_masked_std(radii, mask, -1), radius_mean), 0, 1)
+        circularity = np.where(radius_mean == 0, 0, circularity)
+        
+        # Consecutive segments and the turn between each pair of them
+        dx, dy = np.diff(xs, axis=-1), np.diff(ys, axis=-1)
+        segments = np.hypot(dx, dy)
+        segment_mask = mask[..., 1:]
+        turns, turn_ok = _turn_angles(dx[..., :-1], dy[..., :-1], dx[..., 1:], dy[..., 1:])
+        turn_mask = mask[..., 2:] & turn_ok
+        
+        angularity = np.sum(turn_mask & (turns < 2 * np.pi / 3), axis=-1) / np.maximum(1, count - 2)
+        direction_changes = np.minimum(np.sum(turn_mask & (turns > np.pi / 6), axis=-1), 20) / 20.0
+        
+        # Corners: turns measured over two-frame spans
+        corner_angles, corner_ok = _turn_angles(
+            xs[..., 2:-2] - xs[..., :-4], ys[..., 2:-2] - ys[..., :-4],
+            xs[..., 4:] - xs[..., 2:-2], ys[..., 4:] - ys[..., 2:-2]
+        )
+        corners = np.sum(mask[..., 4:] & corner_ok & (corner_angles > np.pi / 3), axis=-1)
+        corners = np.where(count >= 6, np.minimum(corners, 8), 0)
+        
+        segment_mean = _masked_mean(segments, segment_mask, -1)
+        regularity = np.clip(1 - _safe_divide(_masked_std(segments, segment_mask, -1), segment_mean), 0, 1)
+        regularity = np.where(segment_mean == 0, 0, regularity)
+        
+        last = np.maximum(count - 1, 0)[..., None]
+        direct = np.hypot(np.take_along_axis(xs, last, -1)[..., 0] - xs[..., 0],
+                          np.take_along_axis(ys, last, -1)[..., 0] - ys[..., 0])
+        path_length = np.where(segment_mask, segments, 0).sum(axis=-1)
+        straightness = np.minimum(1, _safe_divide(direct, path_length))
+        
+        cross = np.abs(dx[..., :-1] * dy[..., 1:] - dy[..., :-1] * dx[..., 1:])
+        curvatures = _safe_divide(cross, segments[..., :-1] ** 3)
+        curvature_mask = mask[..., 2:] & (segments[..., :-1] > 0)
+        curvature_variance = _masked_std(curvatures, curvature_mask, -1)
+        
+        # Symmetry: radii of the first half against the reversed second half
+        half = count // 2
+        positions = np.arange(xs.shape[-1])
+        mirrored = np.take_along_axis(radii, np.clip(count[..., None] - 1 - positions, 0, None), axis=-1)
+        symmetry = _masked_corr(radii, mirrored, positions < half[..., None])
+        
+        features = np.stack([
+            circularity, angularity, corners, regularity,
+            direction_changes, straightness, curvature_variance, symmetry
+        ], axis=-1)
+        return np.where((count >= 5)[..., None], features, 0)
     
-    def calculate_gesture_complexity(self, landmarks_sequence: np.ndarray) -> float:
-        """Calculate overall gesture complexity"""
-        try:
-            complexity_factors = []
-            
-            # Factor 1: Number of active landmarks
-            active_landmarks = 0
-            total_possible = landmarks_sequence.shape[0] * landmarks_sequence.shape[1] * landmarks_sequence.shape[2]
-            
-            for frame in range(landmarks_sequence.shape[0]):
-                for hand in range(landmarks_sequence.shape[1]):
-                    for landmark in range(landmarks_sequence.shape[2]):
-                        if not np.allclose(landmarks_sequence[frame, hand, landmark], 0):
-                            active_landmarks += 1
-            
-            if total_possible > 0:
-                landmark_density = active_landmarks / total_possible
-                complexity_factors.append(landmark_density)
-            
-            # Factor 2: Motion variance
-            motion_variances = []
-            for hand in range(landmarks_sequence.shape[1]):
-                hand_motion = self.calculate_hand_motion(landmarks_sequence, hand)
-                motion_variances.append(hand_motion)
-            
-            if motion_variances:
-                motion_complexity = np.std(motion_variances) if len(motion_variances) > 1 else 0
-                complexity_factors.append(min(1, motion_complexity))
-            
-            # Factor 3: Temporal changes
-            temporal_changes = 0
-            for hand in range(landmarks_sequence.shape[1]):
-                for landmark in range(landmarks_sequence.shape[2]):
-                    positions = landmarks_sequence[:, hand, landmark, :2]
-                    valid_positions = positions[~np.all(positions == 0, axis=1)]
-                    
-                    if len(valid_positions) > 1:
-                        position_std = np.mean(np.std(valid_positions, axis=0))
-                        temporal_changes += position_std
-            
-            normalized_temporal = min(1, temporal_changes / 10)  # Normalize
-            complexity_factors.append(normalized_temporal)
-            
-            # Combine factors
-            return np.mean(complexity_factors) if complexity_factors else 0.0
-            
-        except:
-            return 0.0
 
 # CLI interface
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description='Improved FSL Feature Extractor')
-    parser.add_argument('--dataset', required=True, help='Path to dataset JSON file')
+    parser.add_argument('--dataset', required=True, help='Dataset JSON file or landmark dataset directory')
     parser.add_argument('--output', default='fsl_features_improved', help='Output directory')
     
     args = parser.parse_args()
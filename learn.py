@@ -1,16 +1,18 @@
-from flask import Blueprint, render_template, session, redirect, url_for, current_app
+from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify, make_response, Response
+from datetime import datetime, timezone
+from werkzeug.http import is_resource_modified
+
+from learning_catalogue import CATEGORIES, get_catalogue
+from user_store import get_user_by_id
 
 learn_bp = Blueprint('learn', __name__, url_prefix='/learn')
 
-def get_user_by_id(user_id):
-    """Get user by ID from Supabase"""
-    supabase = current_app.config['SUPABASE']
-    try:
-        result = supabase.table('users').select('*').eq('id', user_id).execute()
-        return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error getting user by ID: {e}")
-        return None
+# Seconds the browser may reuse the JSON catalogue before revalidating it
+CATALOGUE_MAX_AGE = 300
+
+# Rendered pages also depend on the templates, which change with a restart
+STARTED_AT = datetime.now(timezone.utc).replace(microsecond=0)
+PAGE_VERSION = STARTED_AT.strftime('%Y%m%d%H%M%S')
 
 @learn_bp.route('/')
 def learn():
@@ -34,51 +36,48 @@ def learn_category(category):
     if not user_data: 
         return redirect(url_for('auth.index'))
 
-    valid_categories = ['alphabet', 'number', 'words']
-    if category not in valid_categories:
+    if category not in CATEGORIES:
         return "Page not found", 404
 
-    supabase = current_app.config['SUPABASE']
-    try:
-        # Fixed: separate order() calls instead of comma-separated
-        response = supabase.table("learning_materials") \
-            .select('class, instruction, image_path, subcategory') \
-            .eq("category", category) \
-            .order("subcategory") \
-            .order("class") \
-            .execute()
-        
-        print(f"Raw response for {category}: {response.data}")  # Debug print
-        
-        if category == 'words':
-            # Group items by subcategory
-            subcategories = {}
-            for row in response.data:
-                subcat = row.get("subcategory", "Other")
-                if subcat not in subcategories:
-                    subcategories[subcat] = []
-                subcategories[subcat].append({
-                    "class": row["class"],
-                    "instruction": row["instruction"],
-                    "image_path": row["image_path"]
-                })
-            items = subcategories
-        else:
-            items = [
-                {
-                    "class": row["class"], 
-                    "instruction": row["instruction"], 
-                    "image_path": row["image_path"]
-                } 
-                for row in response.data
-            ]
-        
-        print(f"Processed items for {category}: {items}")  # Debug print
-        
-    except Exception as e:
-        print(f"Error fetching learning materials: {e}")
-        import traceback
-        traceback.print_exc()  # Print full error traceback
-        items = [] if category != 'words' else {}
-
-    return render_template('learning_materials.html', category=category, items=items)
\ No newline at end of file
+    entry = get_catalogue(category)
+    if entry is None:
+        return render_template('learning_materials.html', category=category,
+                               items=[] if category != 'words' else {})
+
+    # The page is the catalogue rendered through the template, which only
+    # changes with a deploy, so it is versioned by both
+    etag = f"{entry.etag}-{PAGE_VERSION}"
+    last_modified = max(entry.last_modified, STARTED_AT)
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return cacheable(Response(status=304), etag, last_modified, max_age=0)
+
+    response = make_response(render_template('learning_materials.html', category=category, items=entry.page_items()))
+    return cacheable(response, etag, last_modified, max_age=0)
+
+@learn_bp.route('/api/<category>')
+def learn_category_api(category):
+    """The category's materials as JSON, for the learning page to cache"""
+    if not session.get('user_id'):
+        return jsonify({'error': 'Not logged in'}), 401
+
+    if category not in CATEGORIES:
+        return jsonify({'error': 'Unknown category'}), 404
+
+    entry = get_catalogue(category)
+    if entry is None:
+        return jsonify({'error': 'Learning materials unavailable'}), 503
+
+    if not is_resource_modified(request.environ, etag=entry.etag, last_modified=entry.last_modified):
+        return cacheable(Response(status=304), entry.etag, entry.last_modified, max_age=CATALOGUE_MAX_AGE)
+    return cacheable(jsonify(entry.to_json()), entry.etag, entry.last_modified, max_age=CATALOGUE_MAX_AGE)
+
+def cacheable(response, etag, last_modified, max_age):
+    """Attach validators; private because both routes need a session"""
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.private = True
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,122 @@
+from flask import current_app
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# The catalogue only changes when materials are edited, which calls
+# invalidate_catalogue(); the TTL picks up edits made directly in Supabase
+LEARNING_CATALOGUE_TTL = float(os.getenv('LEARNING_CATALOGUE_TTL', '600'))
+
+CATEGORIES = ('alphabet', 'number', 'words')
+
+
+class CatalogueEntry:
+    """One category's materials, in the shapes the page and the API use"""
+
+    def __init__(self, category: str, rows: List[Dict], last_modified: datetime):
+        self.category = category
+        self.items = [
+            {
+                "class": row["class"],
+                "instruction": row["instruction"],
+                "image_path": row["image_path"]
+            }
+            for row in rows
+        ]
+
+        # Words are shown grouped by subcategory, in query order
+        self.subcategories = {}
+        if category == 'words':
+            for row, item in zip(rows, self.items):
+                self.subcategories.setdefault(row.get("subcategory", "Other"), []).append(item)
+
+        self.etag = hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        self.last_modified = last_modified
+        self.expires_at = time.monotonic() + LEARNING_CATALOGUE_TTL
+
+    def page_items(self):
+        """What learning_materials.html iterates over"""
+        return self.subcategories if self.category == 'words' else self.items
+
+    def to_json(self) -> Dict:
+        data = {'category': self.category, 'version': self.etag, 'items': self.items}
+        if self.category == 'words':
+            # A list keeps the subcategory order through JSON serialization
+            data['subcategories'] = [{'name': name, 'items': items} for name, items in self.subcategories.items()]
+        return data
+
+
+class LearningCatalogue:
+    """Per-category cache of the learning_materials table"""
+
+    def __init__(self):
+        self._entries: Dict[str, CatalogueEntry] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, category: str, supabase=None) -> Optional[CatalogueEntry]:
+        """The cached entry for a category, reloaded when expired; None if it cannot be loaded"""
+        with self._lock:
+            entry = self._entries.get(category)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self.hits += 1
+                return entry
+
+            # Loading under the lock means one query per category however
+            # many page views arrive while it runs
+            supabase = supabase or current_app.config['SUPABASE']
+            try:
+                response = supabase.table("learning_materials") \
+                    .select('class, instruction, image_path, subcategory') \
+                    .eq("category", category) \
+                    .order("subcategory") \
+                    .order("class") \
+                    .execute()
+            except Exception as e:
+                print(f"Error fetching learning materials: {e}")
+                # A stale catalogue is better than an empty page
+                return entry
+
+            self.loads += 1
+            now = datetime.now(timezone.utc).replace(microsecond=0)
+            fresh = CatalogueEntry(category, response.data or [], now)
+            if entry is not None and entry.etag == fresh.etag:
+                # Unchanged content keeps its validators, so clients still get 304s
+                fresh.last_modified = entry.last_modified
+            self._entries[category] = fresh
+            return fresh
+
+    def invalidate(self, category: Optional[str] = None):
+        with self._lock:
+            if category is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(category, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'categories': {category: {'items': len(entry.items), 'version': entry.etag,
+                                          'last_modified': entry.last_modified.isoformat()}
+                               for category, entry in self._entries.items()},
+                'loads': self.loads,
+                'hits': self.hits,
+                'ttl_seconds': LEARNING_CATALOGUE_TTL
+            }
+
+
+catalogue = LearningCatalogue()
+
+
+def get_catalogue(category: str, supabase=None) -> Optional[CatalogueEntry]:
+    return catalogue.get(category, supabase)
+
+
+def invalidate_catalogue(category: Optional[str] = None):
+    """Drop cached materials after they were changed (all categories by default)"""
+    catalogue.invalidate(category)
@@ -0,0 +1,417 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Local stand-in for the Supabase client, for load tests and offline runs.
+#
+# The app only talks to the database through the PostgREST query builder
+# (supabase.table(...).select(...).eq(...).execute()), so that builder is
+# the repository interface: LocalClient implements the part of it the app
+# uses over SQLite, and create_app() picks it with DATABASE_BACKEND=sqlite.
+# Each table stores rows as JSON documents, so users, rooms, game_sessions,
+# learning_materials and user_stats need no schema of their own.
+
+LOCAL_DB_PATH = os.getenv('LOCAL_DB_PATH', 'local.db')
+
+# Tables whose primary key is not `id` (upsert conflicts on it)
+PRIMARY_KEYS = {'user_stats': 'user_id'}
+
+# (table, column, unique) expression indexes for the lookups the app makes
+INDEXES = [
+    ('users', 'username', True),
+    ('rooms', 'creator_id', False),
+    ('game_sessions', 'user_id', False),
+    ('game_sessions', 'room_id', False),
+    ('learning_materials', 'category', False),
+    ('user_stats', 'user_id', True),
+]
+
+OPERATORS = {'eq': '=', 'neq': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+
+_NAME = re.compile(r'^\w+$')
+
+
+class LocalStoreError(Exception):
+    pass
+
+
+class LocalResponse(NamedTuple):
+    data: List[Dict]
+    count: Optional[int] = None
+
+
+def _column(name: str) -> str:
+    if not _NAME.match(name):
+        raise LocalStoreError(f"Invalid column name: {name}")
+    return f"json_extract(data, '$.{name}')"
+
+
+def _value(column: str, value: Any) -> Any:
+    """Coerce a filter value the way Postgres would for the column"""
+    # Ids arrive as strings from URLs and PostgREST filter expressions
+    if (column == 'id' or column.endswith('_id')) and isinstance(value, str) and value.lstrip('-').isdigit():
+        return int(value)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def _condition(column: str, op: str, value: Any) -> Tuple[str, List]:
+    expr = _column(column)
+    if op in OPERATORS:
+        return f"{expr} {OPERATORS[op]} ?", [_value(column, value)]
+    if op in ('like', 'ilike'):
+        # SQLite's LIKE is case-insensitive (ASCII); PostgREST also accepts * for %
+        return f"{expr} LIKE ?", [str(value).replace('*', '%')]
+    if op == 'in':
+        values = [_value(column, v) for v in value]
+        if not values:
+            return "0", []
+        return f"{expr} IN ({', '.join('?' * len(values))})", values
+    if op == 'is':
+        value = str(value).lower() if value is not None else 'null'
+        if value == 'null':
+            return f"{expr} IS NULL", []
+        return f"{expr} = ?", [1 if value == 'true' else 0]
+    raise LocalStoreError(f"Unsupported filter operator: {op}")
+
+
+def _split_top_level(expr: str) -> List[str]:
+    """Split a PostgREST logic expression on commas outside parentheses and quotes"""
+    parts, depth, quoted, current = [], 0, False, ''
+    for char in expr:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        if char == ',' and depth == 0 and not quoted:
+            parts.append(current)
+            current = ''
+        else:
+            current += char
+    parts.append(current)
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _logic(expr: str, joiner: str) -> Tuple[str, List]:
+    """SQL for a PostgREST or=(...)/and=(...) condition list"""
+    clauses, params = [], []
+    for part in _split_top_level(expr):
+        match = re.match(r'^(and|or)\((.*)\)$', part)
+        if match:
+            sql, part_params = _logic(match.group(2), match.group(1).upper())
+        else:
+            column, op, value = part.split('.', 2)
+            if value.startswith('"') and value.endswith('"'):
+                value = value[1:-1]
+            elif op == 'in':
+                value = [v.strip().strip('"') for v in value.strip('()').split(',') if v.strip()]
+            sql, part_params = _condition(column, op, value)
+        clauses.append(f"({sql})")
+        params.extend(part_params)
+    return f" {joiner} ".join(clauses), params
+
+
+class LocalQuery:
+    """One PostgREST-style request against a local table"""
+
+    def __init__(self, client: 'LocalClient', table: str):
+        self.client = client
+        self.table = table
+        self._action = 'select'
+        self._columns = '*'
+        self._count = None
+        self._payload = None
+        self._where: List[Tuple[str, List]] = []
+        self._order: List[Tuple[str, bool]] = []
+        self._limit = None
+        self._offset = 0
+
+    # Actions
+    def select(self, columns: str = '*', count: Optional[str] = None):
+        self._columns = columns
+        self._count = count
+        return self
+
+    def insert(self, rows):
+        self._action, self._payload = 'insert', rows
+        return self
+
+    def upsert(self, rows):
+        self._action, self._payload = 'upsert', rows
+        return self
+
+    def update(self, values: Dict):
+        self._action, self._payload = 'update', values
+        return self
+
+    def delete(self):
+        self._action = 'delete'
+        return self
+
+    # Filters
+    def _filter(self, column: str, op: str, value):
+        self._where.append(_condition(column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, 'eq', value)
+
+    def neq(self, column, value):
+        return self._filter(column, 'neq', value)
+
+    def gt(self, column, value):
+        return self._filter(column, 'gt', value)
+
+    def gte(self, column, value):
+        return self._filter(column, 'gte', value)
+
+    def lt(self, column, value):
+        return self._filter(column, 'lt', value)
+
+    def lte(self, column, value):
+        return self._filter(column, 'lte', value)
+
+    def like(self, column, pattern):
+        return self._filter(column, 'like', pattern)
+
+    def ilike(self, column, pattern):
+        return self._filter(column, 'ilike', pattern)
+
+    def in_(self, column, values):
+        return self._filter(column, 'in', list(values))
+
+    def is_(self, column, value):
+        return self._filter(column, 'is', value)
+
+    def or_(self, filters: str):
+        self._where.append(_logic(filters, 'OR'))
+        return self
+
+    # Modifiers
+    def order(self, column: str, desc: bool = False):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def range(self, start: int, end: int):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def _where_sql(self) -> Tuple[str, List]:
+        if not self._where:
+            return '', []
+        return ' WHERE ' + ' AND '.join(f"({sql})" for sql, _ in self._where), \
+            [param for _, params in self._where for param in params]
+
+    def _project(self, row: Dict) -> Dict:
+        if self._columns.strip() == '*':
+            return row
+        return {column: row.get(column) for column in (c.strip() for c in self._columns.split(','))}
+
+    def execute(self) -> LocalResponse:
+        with self.client._lock:
+            self.client._ensure_table(self.table)
+            if self._action == 'select':
+                return self._select()
+            if self._action == 'insert':
+                return LocalResponse(self.client._insert(self.table, self._payload))
+            if self._action == 'upsert':
+                return LocalResponse(self.client._upsert(self.table, self._payload))
+            return self._modify()
+
+    def _select(self) -> LocalResponse:
+        where, params = self._where_sql()
+        sql = f'SELECT data FROM "{self.table}"{where}'
+        if self._order:
+            # Postgres puts NULLs last ascending and first descending
+            sql += ' ORDER BY ' + ', '.join(
+                f"({_column(column)} IS NULL) {'DESC' if desc else 'ASC'}, {_column(column)} {'DESC' if desc else 'ASC'}"
+                for column, desc in self._order
+            )
+        else:
+            sql += ' ORDER BY id'
+        if self._limit is not None or self._offset:
+            sql += f" LIMIT {int(self._limit if self._limit is not None else -1)} OFFSET {int(self._offset)}"
+
+        rows = [self._project(json.loads(data)) for (data,) in self.client._conn.execute(sql, params)]
+        count = None
+        if self._count:
+            count = self.client._conn.execute(f'SELECT count(*) FROM "{self.table}"{where}', params).fetchone()[0]
+        return LocalResponse(rows, count)
+
+    def _modify(self) -> LocalResponse:
+        where, params = self._where_sql()
+        if not where:
+            # PostgREST refuses unfiltered updates and deletes as well
+            raise LocalStoreError(f"{self._action} on {self.table} requires a filter")
+
+        matched = [(row_id, json.loads(data)) for row_id, data in
+                   self.client._conn.execute(f'SELECT id, data FROM "{self.table}"{where} ORDER BY id', params)]
+        with self.client._conn:
+            if self._action == 'delete':
+                self.client._conn.executemany(f'DELETE FROM "{self.table}" WHERE id = ?',
+                                              [(row_id,) for row_id, _ in matched])
+                return LocalResponse([row for _, row in matched])
+
+            updated = [dict(row, **self._payload) for _, row in matched]
+            self.client._conn.executemany(f'UPDATE "{self.table}" SET data = ? WHERE id = ?',
+                                          [(json.dumps(row, default=str), row_id)
+                                           for (row_id, _), row in zip(matched, updated)])
+        return LocalResponse(updated)
+
+
+class LocalRpc:
+    def __init__(self, name: str):
+        self.name = name
+
+    def execute(self):
+        # Callers fall back to plain table queries, as they do when the
+        # function was never created in Supabase
+        raise LocalStoreError(f"function {self.name} does not exist")
+
+
+class LocalClient:
+    """SQLite implementation of the Supabase client calls the app makes"""
+
+    def __init__(self, path: str = LOCAL_DB_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._tables = set()
+
+    def table(self, name: str) -> LocalQuery:
+        if not _NAME.match(name):
+            raise LocalStoreError(f"Invalid table name: {name}")
+        return LocalQuery(self, name)
+
+    def rpc(self, name: str, params: Optional[Dict] = None) -> LocalRpc:
+        return LocalRpc(name)
+
+    def _ensure_table(self, table: str):
+        if table in self._tables:
+            return
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" '
+                           f'(id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL)')
+        for index_table, column, unique in INDEXES:
+            if index_table == table:
+                self._conn.execute(f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS '
+                                   f'"{table}_{column}" ON "{table}" ({_column(column)})')
+        self._tables.add(table)
+
+    def _insert(self, table: str, rows) -> List[Dict]:
+        rows = [rows] if isinstance(rows, dict) else list(rows)
+        key = PRIMARY_KEYS.get(table, 'id')
+        inserted = []
+        with self._conn:  # one transaction, so a bulk insert is all or nothing
+            for row in rows:
+                row = dict(row)
+                row.setdefault('created_at', datetime.now(timezone.utc).isoformat())
+                if key == 'id' and row.get('id') is not None:
+                    row_id = self._conn.execute(f'INSERT INTO "{table}" (id, data) VALUES (?, ?)',
+                                                (row['id'], json.dumps(row, default=str))).lastrowid
+                else:
+                    row_id = self._conn.execute(f'INSERT INTO "{table}" (data) VALUES (?)',
+                                                (json.dumps(row, default=str),)).lastrowid
+                    if key == 'id':
+                        row['id'] = row_id
+                        self._conn.execute(f'UPDATE "{table}" SET data = ? WHERE id = ?',
+                                           (json.dumps(row, default=str), row_id))
+                inserted.append(row)
+        return inserted
+
+    def _upsert(self, table: str, rows) -> List[Dict]:
+        rows = [rows] if isinstance(rows, dict) else list(rows)
+        key = PRIMARY_KEYS.get(table, 'id')
+        written = []
+        for row in rows:
+            existing = self._conn.execute(f'SELECT id, data FROM "{table}" WHERE {_column(key)} = ?',
+                                          (_value(key, row.get(key)),)).fetchone()
+            if existing is None:
+                written.extend(self._insert(table, row))
+                continue
+            merged = dict(json.loads(existing[1]), **row)
+            with self._conn:
+                self._conn.execute(f'UPDATE "{table}" SET data = ? WHERE id = ?',
+                                   (json.dumps(merged, default=str), existing[0]))
+            written.append(merged)
+        return written
+
+
+def _fetch_all(client, table: str, page_size: int = 1000) -> List[Dict]:
+    rows = []
+    while True:
+        page = client.table(table).select('*').order('id').range(len(rows), len(rows) + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+
+# CLI: fill a local database for load tests
+if __name__ == "__main__":
+    import argparse
+    from werkzeug.security import generate_password_hash
+
+    parser = argparse.ArgumentParser(description='Prepare a local SQLite database for DATABASE_BACKEND=sqlite')
+    parser.add_argument('--db', default=LOCAL_DB_PATH, help='SQLite file to fill')
+    parser.add_argument('--copy', nargs='+', metavar='TABLE',
+                        help='Copy tables from the Supabase project in SUPABASE_URL/SUPABASE_KEY')
+    parser.add_argument('--import', dest='import_file', nargs=2, metavar=('TABLE', 'JSON_FILE'),
+                        help='Insert the rows of a JSON array into a table')
+    parser.add_argument('--users', type=int, default=0, help='Create this many test users (loadtest0001, ...)')
+    parser.add_argument('--password', default='loadtest', help='Password for the test users')
+    parser.add_argument('--role', default='Student', help='Role for the test users')
+    args = parser.parse_args()
+
+    client = LocalClient(args.db)
+
+    if args.copy:
+        from dotenv import load_dotenv
+        from supabase import create_client
+
+        load_dotenv()
+        remote = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY'))
+        for table in args.copy:
+            rows = _fetch_all(remote, table)
+            if rows:
+                client.table(table).upsert(rows).execute()
+            print(f"Copied {len(rows)} rows into {table}")
+
+    if args.import_file:
+        table, path = args.import_file
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+        client.table(table).upsert(rows).execute()
+        print(f"Imported {len(rows)} rows into {table}")
+
+    if args.users:
+        # Hashing is slow on purpose, and every test user shares a password
+        password_hash = generate_password_hash(args.password)
+        existing = {user['username'] for user in client.table('users').select('username').execute().data}
+        rows = [{
+            'username': f"loadtest{index:04d}",
+            'password_hash': password_hash,
+            'role': args.role,
+            'profile_picture': None,
+            'grade': None
+        } for index in range(1, args.users + 1) if f"loadtest{index:04d}" not in existing]
+        client.table('users').insert(rows).execute()
+        print(f"Created {len(rows)} test users with password '{args.password}'")
+
+# Usage instructions:
+# python local_store.py --copy learning_materials     (needs SUPABASE_URL and SUPABASE_KEY)
+# python local_store.py --import learning_materials materials.json
+# python local_store.py --users 500 --password loadtest
+# DATABASE_BACKEND=sqlite LOCAL_DB_PATH=local.db gunicorn ...
@@ -1,44 +1,29 @@
-from flask import Blueprint, render_template, session, redirect, url_for, current_app
+from flask import Blueprint, render_template, session, redirect, url_for
 
-room_bp = Blueprint('room', __name__, url_prefix='/room')
-
-def get_user_by_id(user_id):
-    """Get user by ID from Supabase"""
-    supabase = current_app.config['SUPABASE']
-    try:
-        result = supabase.table('users').select('*').eq('id', user_id).execute()
-        return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error getting user by ID: {e}")
-        return None
+from user_store import get_user_by_id, get_user_by_username, get_users_by_usernames
 
-def get_user_by_username(username):
-    """Get user by username from Supabase"""
-    supabase = current_app.config['SUPABASE']
-    try:
-        result = supabase.table('users').select('*').eq('username', username).execute()
-        return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error getting user by username: {e}")
-        return None
+room_bp = Blueprint('room', __name__, url_prefix='/room')
 
-def get_participants_with_profiles(participants):
-    """Get participant data with profile pictures"""
-    participants_data = []
-    for participant_username in participants:
-        user_data = get_user_by_username(participant_username)
-        if user_data:
-            participants_data.append({
-                'username': participant_username,
-                'profile_picture': user_data.get('profile_picture')
-            })
-        else:
+def get_participants_with_profiles(room_data, supabase=None):
+    """Get participant data with profile pictures
+    
+    Profiles (user id and picture) are kept in the room's own "profiles"
+    map, keyed by username, so only participants the room has not seen
+    before are looked up (in one query).
+    """
+    participants = room_data.get("participants", [])
+    profiles = room_data.setdefault("profiles", {})
+    
+    missing = [username for username in participants if username not in profiles]
+    if missing:
+        users = get_users_by_usernames(missing, supabase)
+        for username in missing:
             # Fallback if user not found in database
-            participants_data.append({
-                'username': participant_username,
-                'profile_picture': None
-            })
-    return participants_data
+            user = users.get(username, {})
+            profiles[username] = {'user_id': user.get('id'), 'profile_picture': user.get('profile_picture')}
+    
+    return [{'username': username, 'profile_picture': profiles[username]['profile_picture']}
+            for username in participants]
 
 @room_bp.route(('/<room_code>'), methods=["POST", "GET"])
 def room(room_code):
@@ -70,7 +55,7 @@ def room(room_code):
     room_data = rooms[room_code]
     creator_username = room_data.get("creator", "Unknown")
     
-    participants_with_profiles = get_participants_with_profiles(participants)
+    participants_with_profiles = get_participants_with_profiles(room_data)
     
     creator_data = get_user_by_username(creator_username)
     
@@ -1,13 +1,168 @@
 import numpy as np
 import json
+import copy
 import os
-from typing import Dict, List, Tuple
+import pickle
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report, accuracy_score
+from sklearn.base import clone
 import joblib
 
+from improved_fsl_feature_extractor import ImprovedFSLFeatureExtractor
+from fsl_frame_adapter import PackedSequence, pack_sequence, resample_sequence
+
+
+def _measure_latency_ms(model, rows: np.ndarray) -> float:
+    """Median predict_proba latency for one row per call, as the live predictor sees it"""
+    timings = []
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        model.predict_proba(rows[i:i + 1])
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def _model_size_bytes(model) -> int:
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _evaluate_forest_config(n_estimators: int, max_depth: Optional[int], data: Dict,
+                            latency_rows: int = 50) -> Dict:
+    """Fit one forest configuration and measure accuracy, per-row latency and size"""
+    model = RandomForestClassifier(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        min_samples_split=5,
+        random_state=42,
+        n_jobs=1
+    )
+    
+    start = time.perf_counter()
+    model.fit(data['X_train'], data['y_train'])
+    fit_seconds = time.perf_counter() - start
+    
+    accuracy = accuracy_score(data['y_test'], model.predict(data['X_test']))
+    
+    return {
+        'n_estimators': n_estimators,
+        'max_depth': max_depth,
+        'accuracy': float(accuracy),
+        'latency_ms': _measure_latency_ms(model, data['X_test'][:latency_rows]),
+        'size_bytes': _model_size_bytes(model),
+        'fit_seconds': fit_seconds,
+        'model': model
+    }
+
+
+def _pareto_front(candidates: List[Dict]) -> List[Dict]:
+    """Candidates not dominated on (accuracy up, latency down, size down)"""
+    front = []
+    for c in candidates:
+        dominated = False
+        for other in candidates:
+            if other is c:
+                continue
+            no_worse = (other['accuracy'] >= c['accuracy'] and
+                        other['latency_ms'] <= c['latency_ms'] and
+                        other['size_bytes'] <= c['size_bytes'])
+            better = (other['accuracy'] > c['accuracy'] or
+                      other['latency_ms'] < c['latency_ms'] or
+                      other['size_bytes'] < c['size_bytes'])
+            if no_worse and better:
+                dominated = True
+                break
+        if not dominated:
+            front.append(c)
+    return front
+
+
+def _sample_per_class(X: np.ndarray, y: np.ndarray, per_class: int, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """Random sample of at most per_class rows of every label"""
+    rng = np.random.default_rng(seed)
+    keep = []
+    for label in np.unique(y):
+        idx = np.flatnonzero(y == label)
+        if len(idx) > per_class:
+            idx = rng.choice(idx, per_class, replace=False)
+        keep.append(idx)
+    keep = np.sort(np.concatenate(keep))
+    return X[keep], y[keep]
+
+
+def _split_forest(model: RandomForestClassifier, first_trees: int) -> Tuple[RandomForestClassifier, RandomForestClassifier]:
+    """Split a fitted forest into (first N trees, remaining trees) sub-forests
+    
+    Both share the original tree objects. Since a forest averages its trees'
+    probabilities, the full forest's output is the tree-count weighted mean
+    of the two halves.
+    """
+    head = copy.copy(model)
+    head.estimators_ = model.estimators_[:first_trees]
+    head.n_estimators = len(head.estimators_)
+    head.n_jobs = 1
+    
+    tail = copy.copy(model)
+    tail.estimators_ = model.estimators_[first_trees:]
+    tail.n_estimators = len(tail.estimators_)
+    tail.n_jobs = 1
+    return head, tail
+
+
+def _export_tree_node(tree, node_id: int) -> Dict:
+    """Convert one sklearn tree node (recursively) to the client-side JSON format"""
+    if tree.children_left[node_id] == tree.children_right[node_id]:
+        return {
+            'isLeaf': True,
+            'prediction': int(np.argmax(tree.value[node_id][0])),
+            'samples': int(tree.n_node_samples[node_id])
+        }
+    return {
+        'isLeaf': False,
+        'featureIndex': int(tree.feature[node_id]),
+        'threshold': float(tree.threshold[node_id]),
+        'left': _export_tree_node(tree, tree.children_left[node_id]),
+        'right': _export_tree_node(tree, tree.children_right[node_id]),
+        'samples': int(tree.n_node_samples[node_id])
+    }
+
+
+def export_forest_json(model_pickle: str, output_path: str, max_trees: Optional[int] = None) -> str:
+    """Write the static/models/*/asl_randomforest*.json format from a model pickle
+    
+    The pickle is the dict used by WebSignLanguageDetector (model, scaler,
+    classes). max_trees keeps only the first N trees, which is how the
+    *_small.json variants are produced.
+    """
+    with open(model_pickle, 'rb') as f:
+        model_data = pickle.load(f)
+    
+    model = model_data['model']
+    scaler = model_data['scaler']
+    estimators = model.estimators_[:max_trees] if max_trees else model.estimators_
+    
+    forest = {
+        'trees': [{'root': _export_tree_node(e.tree_, 0)} for e in estimators],
+        'scaler_mean': [float(v) for v in scaler.mean_],
+        'scaler_scale': [float(v) for v in scaler.scale_],
+        'classes': [str(c) for c in model_data['classes']]
+    }
+    
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(forest, f, indent=2)
+    
+    print(f"Exported {len(estimators)} trees to {output_path}")
+    return output_path
+
+
 class SimpleFSLTrainer:
     """
     Simple FSL trainer using only Random Forest
@@ -20,6 +175,30 @@ class SimpleFSLTrainer:
         self.label_encoder = None
         self.feature_names = []
         self.class_names = []
+        self.timings = {}
+        self.feature_cache = None
+        self.model_type = 'random_forest'
+        self.cascade = None
+        # Frame rate the training sequences were recorded at; live buffers are
+        # resampled to it before prediction (see resample_sequence)
+        self.capture_fps = 3.0
+    
+    @contextmanager
+    def _timed(self, stage: str):
+        """Record wall-clock time of a training stage in self.timings"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = time.perf_counter() - start
+            print(f"[{stage}] {self.timings[stage]:.2f}s")
+    
+    def report_timings(self):
+        """Print wall-clock time per stage"""
+        print("\nWall-clock per stage:")
+        for stage, seconds in self.timings.items():
+            print(f"{stage:20}: {seconds:8.2f}s")
+        print(f"{'total':20}: {sum(self.timings.values()):8.2f}s")
         
     def load_features(self, features_dir: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
         """Load features from the feature extraction output"""
@@ -35,9 +214,11 @@ class SimpleFSLTrainer:
         if not os.path.exists(names_file):
             raise FileNotFoundError(f"Feature names file not found: {names_file}")
         
-        # Load numpy arrays
-        X = np.load(features_file)
-        y = np.load(labels_file)
+        # Load numpy arrays (memory-mapped: augmented feature sets can be
+        # larger than memory, and only the rows used for training are read)
+        with self._timed('load_features'):
+            X = np.load(features_file, mmap_mode='r')
+            y = np.load(labels_file, mmap_mode='r')
         
         # Load feature names
         with open(names_file, 'r') as f:
@@ -55,21 +236,58 @@ class SimpleFSLTrainer:
         
         return X, y, feature_names
     
-    def prepare_data(self, X: np.ndarray, y: np.ndarray, test_size: float = 0.2) -> Dict:
-        """Prepare data for training"""
-        # Encode labels
-        self.label_encoder = LabelEncoder()
-        y_encoded = self.label_encoder.fit_transform(y)
+    def load_augmentation_index(self, features_dir: str) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """(sources, copy_index) written by fsl_augmentation, or (None, None) for plain feature sets"""
+        sources_file = os.path.join(features_dir, "sources.npy")
+        copies_file = os.path.join(features_dir, "copy_index.npy")
+        if not (os.path.exists(sources_file) and os.path.exists(copies_file)):
+            return None, None
+        return np.load(sources_file), np.load(copies_file)
+    
+    def prepare_data(self, X: np.ndarray, y: np.ndarray, test_size: float = 0.2,
+                     cache_per_class: int = 50, sources: Optional[np.ndarray] = None,
+                     copy_index: Optional[np.ndarray] = None) -> Dict:
+        """Prepare data for training
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y_encoded, test_size=test_size, random_state=42, stratify=y_encoded
-        )
+        Also keeps a small per-class sample of the raw features, saved with
+        the model so add_sign() can train against old classes later.
         
-        # Scale features
-        self.scaler = StandardScaler()
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        For augmented feature sets pass `sources`/`copy_index` (see
+        load_augmentation_index): recordings are split instead of rows, so no
+        augmented copy of a test recording is trained on, and the test set
+        only holds the un-augmented recordings.
+        """
+        with self._timed('prepare_data'):
+            y = np.asarray(y)
+            if sources is None:
+                self.feature_cache = _sample_per_class(X, y, cache_per_class)
+            else:
+                originals = np.flatnonzero(copy_index == 0)
+                self.feature_cache = _sample_per_class(X[originals], y[originals], cache_per_class)
+            
+            # Encode labels
+            self.label_encoder = LabelEncoder()
+            y_encoded = self.label_encoder.fit_transform(y)
+            
+            # Split data
+            if sources is None:
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y_encoded, test_size=test_size, random_state=42, stratify=y_encoded
+                )
+            else:
+                _, test_sources = train_test_split(
+                    sources[originals], test_size=test_size, random_state=42, stratify=y_encoded[originals]
+                )
+                in_test = np.isin(sources, test_sources)
+                train_rows = np.flatnonzero(~in_test)
+                test_rows = np.flatnonzero(in_test & (copy_index == 0))
+                X_train, X_test = X[train_rows], X[test_rows]
+                y_train, y_test = y_encoded[train_rows], y_encoded[test_rows]
+            
+            # Scale features
+            self.scaler = StandardScaler()
+            X_train_scaled = self.scaler.fit_transform(X_train)
+            X_test_scaled = self.scaler.transform(X_test)
         
         data = {
             'X_train': X_train_scaled,
@@ -83,50 +301,66 @@ class SimpleFSLTrainer:
         
         return data
     
-    def train_model(self, data: Dict, n_estimators: int = 200) -> Dict:
-        """Train Random Forest model"""
-        print(f"\nTraining Random Forest with {n_estimators} trees...")
+    def train_model(self, data: Dict, n_estimators: int = 200, mode: str = 'fast', n_jobs: int = -1) -> Dict:
+        """Train Random Forest model
+        
+        mode='fast' validates with the out-of-bag score of the single fitted
+        forest (no refits). mode='full' additionally runs 5-fold cross
+        validation with the folds fitted in parallel on memory-mapped data.
+        """
+        if mode not in ('fast', 'full'):
+            raise ValueError(f"Unknown training mode: {mode}")
+        
+        print(f"\nTraining Random Forest with {n_estimators} trees ({mode} mode)...")
+        self.model_type = 'random_forest'
+        self.cascade = None
         
-        # Create and train model
+        # Create and train model. Bootstrap + oob_score gives a held-out
+        # estimate from the same fit, replacing the old refit-based CV
         self.model = RandomForestClassifier(
             n_estimators=n_estimators,
             max_depth=20,
             min_samples_split=5,
+            oob_score=True,
             random_state=42,
-            n_jobs=-1
+            n_jobs=n_jobs
         )
         
-        self.model.fit(data['X_train'], data['y_train'])
+        with self._timed('fit'):
+            self.model.fit(data['X_train'], data['y_train'])
         
-        # Make predictions
-        y_pred_train = self.model.predict(data['X_train'])
-        y_pred_test = self.model.predict(data['X_test'])
-        
-        # Calculate accuracies
-        train_accuracy = accuracy_score(data['y_train'], y_pred_train)
-        test_accuracy = accuracy_score(data['y_test'], y_pred_test)
+        with self._timed('evaluate'):
+            y_pred_test = self.model.predict(data['X_test'])
+            test_accuracy = accuracy_score(data['y_test'], y_pred_test)
+            oob_accuracy = float(self.model.oob_score_)
+            
+            # Generate classification report
+            report = classification_report(
+                data['y_test'], y_pred_test, 
+                labels=np.arange(len(self.class_names)),
+                target_names=self.class_names, 
+                output_dict=True,
+                zero_division=0
+            )
         
-        # Cross-validation
-        cv_scores = cross_val_score(self.model, data['X_train'], data['y_train'], cv=5)
-        
-        # Generate classification report
-        report = classification_report(
-            data['y_test'], y_pred_test, 
-            target_names=self.class_names, 
-            output_dict=True
-        )
+        cv_scores = None
+        if mode == 'full':
+            with self._timed('cross_validation'):
+                cv_scores = self.parallel_cross_val(data['X_train'], data['y_train'], cv=5, n_jobs=n_jobs)
         
         results = {
-            'train_accuracy': train_accuracy,
             'test_accuracy': test_accuracy,
-            'cv_mean': cv_scores.mean(),
-            'cv_std': cv_scores.std(),
-            'classification_report': report
+            'oob_accuracy': oob_accuracy,
+            'cv_mean': cv_scores.mean() if cv_scores is not None else None,
+            'cv_std': cv_scores.std() if cv_scores is not None else None,
+            'classification_report': report,
+            'timings': dict(self.timings)
         }
         
-        print(f"Train accuracy: {train_accuracy:.4f}")
+        print(f"OOB accuracy: {oob_accuracy:.4f}")
         print(f"Test accuracy: {test_accuracy:.4f}")
-        print(f"CV accuracy: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
+        if cv_scores is not None:
+            print(f"CV accuracy: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
         
         # Print per-class results
         print(f"\nPer-class results:")
@@ -139,6 +373,226 @@ class SimpleFSLTrainer:
         
         return results
     
+    def parallel_cross_val(self, X: np.ndarray, y: np.ndarray, cv: int = 5, n_jobs: int = -1) -> np.ndarray:
+        """Cross-validate self.model with one worker per fold
+        
+        X is dumped once to a memory-mapped file so the fold workers share it
+        instead of each receiving a pickled copy. Each fold fits its forest
+        single-threaded, so the parallelism is across folds, not nested.
+        """
+        estimator = clone(self.model).set_params(n_jobs=1, oob_score=False)
+        mmap_dir = tempfile.mkdtemp(prefix='fsl_cv_')
+        try:
+            X_path = os.path.join(mmap_dir, 'X_train.mmap')
+            joblib.dump(np.ascontiguousarray(X), X_path)
+            X_shared = joblib.load(X_path, mmap_mode='r')
+            return cross_val_score(estimator, X_shared, y, cv=cv, n_jobs=n_jobs)
+        finally:
+            shutil.rmtree(mmap_dir, ignore_errors=True)
+    
+    def select_model(self, data: Dict,
+                     tree_grid: Sequence[int] = (10, 25, 50, 100, 200),
+                     depth_grid: Sequence[Optional[int]] = (8, 12, 16, 20),
+                     accuracy_tolerance: float = 0.01,
+                     latency_budget_ms: float = 5.0,
+                     n_jobs: int = -1,
+                     report_path: Optional[str] = None) -> Dict:
+        """Sweep forest size/depth and keep the smallest model that is good enough
+        
+        Every (n_estimators, max_depth) pair is fitted in parallel and scored
+        on test accuracy, median single-row predict_proba latency and pickled
+        size. The chosen model is the smallest one whose accuracy is within
+        accuracy_tolerance of the best candidate and whose latency fits
+        latency_budget_ms. If nothing fits the budget, the fastest candidate
+        within tolerance is used. Sets self.model and returns the report.
+        """
+        configs = [(trees, depth) for trees in tree_grid for depth in depth_grid]
+        print(f"\nSweeping {len(configs)} forest configurations...")
+        
+        with self._timed('model_sweep'):
+            candidates = joblib.Parallel(n_jobs=n_jobs)(
+                joblib.delayed(_evaluate_forest_config)(trees, depth, data)
+                for trees, depth in configs
+            )
+        
+        best_accuracy = max(c['accuracy'] for c in candidates)
+        accurate = [c for c in candidates if c['accuracy'] >= best_accuracy - accuracy_tolerance]
+        within_budget = [c for c in accurate if c['latency_ms'] <= latency_budget_ms]
+        
+        if within_budget:
+            chosen = min(within_budget, key=lambda c: (c['size_bytes'], c['latency_ms']))
+        else:
+            print(f"Warning: no model within {accuracy_tolerance} of best accuracy meets "
+                  f"the {latency_budget_ms}ms budget, using the fastest one")
+            chosen = min(accurate, key=lambda c: (c['latency_ms'], c['size_bytes']))
+        
+        front = _pareto_front(candidates)
+        
+        print(f"\n{'trees':>5} {'depth':>5} {'accuracy':>8} {'latency':>10} {'size':>10}  pareto")
+        for c in sorted(candidates, key=lambda c: (c['n_estimators'], c['max_depth'] or 0)):
+            marker = '*' if c in front else ''
+            if c is chosen:
+                marker += ' <- selected'
+            print(f"{c['n_estimators']:5d} {str(c['max_depth']):>5} {c['accuracy']:8.4f} "
+                  f"{c['latency_ms']:8.3f}ms {c['size_bytes'] / 1024:8.1f}KB  {marker}")
+        
+        self.model = chosen['model']
+        self.model_type = 'random_forest'
+        self.cascade = None
+        
+        def summary(c):
+            return {k: v for k, v in c.items() if k != 'model'}
+        
+        report = {
+            'accuracy_tolerance': accuracy_tolerance,
+            'latency_budget_ms': latency_budget_ms,
+            'best_accuracy': best_accuracy,
+            'selected': summary(chosen),
+            'pareto_front': [summary(c) for c in front],
+            'candidates': [summary(c) for c in candidates]
+        }
+        
+        if report_path:
+            with open(report_path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Pareto report written to {report_path}")
+        
+        return report
+    
+    def distill(self, data: Dict, student: str = 'forest', augment_copies: int = 5,
+                noise_scale: float = 0.15, hard_label_weight: float = 0.1, random_state: int = 42) -> Dict:
+        """Replace the trained forest (the teacher) with a small student that mimics it
+        
+        The student is fitted to the teacher's predict_proba on the training
+        set plus augmented rows (Gaussian jitter in scaled feature space and
+        interpolations between random pairs of rows). Soft targets are
+        expressed as one weighted copy of each row per class, so any sklearn
+        classifier with sample_weight support works and the student loads
+        through SimpleFSLPredictor like the forest does.
+        
+        student: 'forest' (10 trees, depth 8), 'boosted' (gradient-boosted
+        stumps) or 'linear' (multinomial logistic regression).
+        """
+        if self.model is None:
+            raise ValueError("Train the teacher model before distilling")
+        
+        students = {
+            'forest': lambda: RandomForestClassifier(n_estimators=10, max_depth=8, random_state=random_state, n_jobs=1),
+            'boosted': lambda: GradientBoostingClassifier(n_estimators=100, max_depth=1, learning_rate=0.3,
+                                                          random_state=random_state),
+            'linear': lambda: LogisticRegression(max_iter=2000, C=1.0)
+        }
+        if student not in students:
+            raise ValueError(f"Unknown student type: {student}")
+        
+        teacher = self.model
+        rng = np.random.default_rng(random_state)
+        X_train, y_train = data['X_train'], data['y_train']
+        num_classes = len(teacher.classes_)
+        
+        with self._timed('distill_augment'):
+            augmented = [X_train]
+            for _ in range(augment_copies):
+                augmented.append(X_train + rng.normal(0, noise_scale, size=X_train.shape))
+                pairs = rng.integers(0, len(X_train), size=len(X_train))
+                mix = rng.uniform(0, 1, size=(len(X_train), 1))
+                augmented.append(mix * X_train + (1 - mix) * X_train[pairs])
+            X_aug = np.vstack(augmented)
+            
+            soft = teacher.predict_proba(X_aug)
+            # Real training rows also keep a little weight on their true label
+            soft[:len(X_train)] *= (1 - hard_label_weight)
+            soft[np.arange(len(X_train)), y_train] += hard_label_weight
+            
+            rows, classes = np.nonzero(soft > 1e-6)
+            X_fit = X_aug[rows]
+            y_fit = teacher.classes_[classes]
+            weights = soft[rows, classes]
+        
+        with self._timed('distill_fit'):
+            model = students[student]()
+            model.fit(X_fit, y_fit, sample_weight=weights)
+        
+        if len(model.classes_) != num_classes:
+            raise ValueError("Student did not see every class; increase augment_copies or hard_label_weight")
+        
+        with self._timed('distill_evaluate'):
+            X_test = data['X_test']
+            teacher_proba = teacher.predict_proba(X_test)
+            student_proba = model.predict_proba(X_test)
+            
+            report = {
+                'student': student,
+                'fidelity': float(np.mean(student_proba.argmax(axis=1) == teacher_proba.argmax(axis=1))),
+                'mean_abs_proba_diff': float(np.mean(np.abs(student_proba - teacher_proba))),
+                'teacher_accuracy': float(accuracy_score(data['y_test'], teacher_proba.argmax(axis=1))),
+                'student_accuracy': float(accuracy_score(data['y_test'], student_proba.argmax(axis=1))),
+                'teacher_latency_ms': _measure_latency_ms(teacher, X_test[:50]),
+                'student_latency_ms': _measure_latency_ms(model, X_test[:50]),
+                'teacher_size_bytes': _model_size_bytes(teacher),
+                'student_size_bytes': _model_size_bytes(model),
+                'training_rows': int(len(X_aug))
+            }
+        
+        print(f"\nDistilled '{student}' student from {len(X_aug)} rows:")
+        print(f"Fidelity (agrees with teacher): {report['fidelity']:.4f}")
+        print(f"Accuracy teacher/student: {report['teacher_accuracy']:.4f} / {report['student_accuracy']:.4f}")
+        print(f"Latency teacher/student: {report['teacher_latency_ms']:.3f}ms / {report['student_latency_ms']:.3f}ms")
+        print(f"Size teacher/student: {report['teacher_size_bytes'] / 1024:.1f}KB / "
+              f"{report['student_size_bytes'] / 1024:.1f}KB")
+        
+        self.model = model
+        self.model_type = f"distilled_{student}"
+        self.cascade = None
+        return report
+    
+    def calibrate_cascade(self, data: Dict, stage1_trees: int = 10, target_agreement: float = 0.99) -> Dict:
+        """Calibrate an early-exit cascade for the trained forest
+        
+        Stage 1 is the forest's first stage1_trees trees. On the held-out
+        set, pick the lowest stage-1 confidence threshold at which the
+        predictions stage 1 would answer on its own agree with the full
+        forest at least target_agreement of the time. The result is saved
+        in model_metadata.json and applied by SimpleFSLPredictor.
+        """
+        if not isinstance(self.model, RandomForestClassifier):
+            raise ValueError("Cascades need a Random Forest model")
+        if not 0 < stage1_trees < len(self.model.estimators_):
+            raise ValueError(f"stage1_trees must be between 1 and {len(self.model.estimators_) - 1}")
+        
+        with self._timed('calibrate_cascade'):
+            stage1, _ = _split_forest(self.model, stage1_trees)
+            X = data['X_test']
+            stage1_proba = stage1.predict_proba(X)
+            stage1_conf = stage1_proba.max(axis=1)
+            agrees = stage1_proba.argmax(axis=1) == self.model.predict_proba(X).argmax(axis=1)
+            
+            # Walk thresholds from the most to the least confident prediction
+            # and keep the lowest one whose accepted set is still accurate enough
+            order = np.argsort(-stage1_conf, kind='stable')
+            running_agreement = np.cumsum(agrees[order]) / np.arange(1, len(order) + 1)
+            threshold = 1.0 + 1e-9
+            for i in range(len(order)):
+                # Only cut between distinct confidence values
+                if i + 1 < len(order) and stage1_conf[order[i + 1]] == stage1_conf[order[i]]:
+                    continue
+                if running_agreement[i] >= target_agreement:
+                    threshold = float(stage1_conf[order[i]])
+            
+            accepted = stage1_conf >= threshold
+            self.cascade = {
+                'stage1_trees': stage1_trees,
+                'threshold': threshold,
+                'target_agreement': target_agreement,
+                'expected_stage1_rate': float(accepted.mean()),
+                'calibration_agreement': float(agrees[accepted].mean()) if accepted.any() else None,
+                'calibration_rows': int(len(X))
+            }
+        
+        print(f"\nCascade: stage 1 = {stage1_trees} trees, threshold {threshold:.3f}, "
+              f"answers {accepted.mean():.1%} of {len(X)} held-out rows on its own")
+        return self.cascade
+    
     def get_feature_importance(self, top_n: int = 20) -> List[Tuple[str, float]]:
         """Get top N most important features"""
         if self.model is None:
@@ -172,12 +626,19 @@ class SimpleFSLTrainer:
         
         os.makedirs(output_dir, exist_ok=True)
         
-        # Save Random Forest model
-        joblib.dump(self.model, os.path.join(output_dir, "random_forest_model.pkl"))
+        model_file = f"{self.model_type}_model.pkl"
         
-        # Save preprocessing objects
-        joblib.dump(self.scaler, os.path.join(output_dir, "scaler.pkl"))
-        joblib.dump(self.label_encoder, os.path.join(output_dir, "label_encoder.pkl"))
+        with self._timed('save_model'):
+            # Save Random Forest model (or the distilled student)
+            joblib.dump(self.model, os.path.join(output_dir, model_file))
+            
+            # Save preprocessing objects
+            joblib.dump(self.scaler, os.path.join(output_dir, "scaler.pkl"))
+            joblib.dump(self.label_encoder, os.path.join(output_dir, "label_encoder.pkl"))
+        
+            if self.feature_cache is not None:
+                X_cache, y_cache = self.feature_cache
+                np.savez_compressed(os.path.join(output_dir, "feature_cache.npz"), X=X_cache, y=y_cache)
         
         # Save metadata
         metadata = {
@@ -185,27 +646,140 @@ class SimpleFSLTrainer:
             'class_names': self.class_names,
             'num_features': len(self.feature_names),
             'num_classes': len(self.class_names),
-            'model_type': 'random_forest'
+            'model_type': self.model_type,
+            'model_file': model_file,
+            'version': 1,
+            'capture_fps': self.capture_fps
         }
+        if self.cascade:
+            metadata['cascade'] = self.cascade
         
         with open(os.path.join(output_dir, "model_metadata.json"), 'w') as f:
             json.dump(metadata, f, indent=2)
         
         print(f"\nModel saved to {output_dir}")
         print("Files created:")
-        print("- random_forest_model.pkl")
+        print(f"- {model_file}")
         print("- scaler.pkl") 
         print("- label_encoder.pkl")
+        if self.feature_cache is not None:
+            print("- feature_cache.npz")
         print("- model_metadata.json")
         
         return output_dir
+    
+    def add_sign(self, base_model_dir: str, sign_name: str, X_new: np.ndarray,
+                 output_dir: Optional[str] = None, features_dir: Optional[str] = None,
+                 n_estimators: int = 50, negatives_per_class: int = 50, n_jobs: int = -1) -> str:
+        """Teach an existing model one new sign without retraining the base forest
+        
+        Trains a small one-vs-rest add-on forest on the new sign's features
+        against a cached sample of every sign the model already knows, then
+        publishes a new versioned model directory: the base artifacts are
+        copied unchanged and the add-on is listed in model_metadata.json,
+        where SimpleFSLPredictor picks it up.
+        
+        X_new holds raw (unscaled) feature rows for the new sign. The old
+        samples come from base_model_dir/feature_cache.npz, or from
+        features_dir for models saved before the cache existed.
+        """
+        with open(os.path.join(base_model_dir, "model_metadata.json"), 'r') as f:
+            metadata = json.load(f)
+        
+        if sign_name in metadata['class_names']:
+            raise ValueError(f"Model in {base_model_dir} already supports '{sign_name}'")
+        if X_new.ndim != 2 or X_new.shape[1] != metadata['num_features']:
+            raise ValueError(f"Expected features of shape (n, {metadata['num_features']}), got {X_new.shape}")
+        
+        version = metadata.get('version', 1) + 1
+        if output_dir is None:
+            output_dir = f"{base_model_dir.rstrip(os.sep)}_v{version}"
+        
+        with self._timed('load_cache'):
+            cache_file = os.path.join(base_model_dir, "feature_cache.npz")
+            if os.path.exists(cache_file):
+                cache = np.load(cache_file, allow_pickle=False)
+                X_old, y_old = cache['X'], cache['y']
+            elif features_dir:
+                X_old = np.load(os.path.join(features_dir, "features.npy"))
+                y_old = np.load(os.path.join(features_dir, "labels.npy"))
+            else:
+                raise FileNotFoundError(
+                    f"No feature_cache.npz in {base_model_dir}; pass features_dir with the original features"
+                )
+            X_old, y_old = _sample_per_class(X_old, y_old, negatives_per_class)
+            scaler = joblib.load(os.path.join(base_model_dir, "scaler.pkl"))
+        
+        with self._timed('fit_addon'):
+            X = scaler.transform(np.vstack([X_old, X_new]))
+            y = np.concatenate([np.zeros(len(X_old), dtype=int), np.ones(len(X_new), dtype=int)])
+            
+            addon = RandomForestClassifier(
+                n_estimators=n_estimators,
+                max_depth=20,
+                min_samples_split=5,
+                class_weight='balanced',
+                oob_score=True,
+                random_state=42,
+                n_jobs=n_jobs
+            )
+            addon.fit(X, y)
+            addon.set_params(n_jobs=1)
+            print(f"Add-on '{sign_name}': {len(X_new)} new vs {len(X_old)} cached samples, "
+                  f"OOB accuracy {addon.oob_score_:.4f}")
+        
+        with self._timed('publish'):
+            os.makedirs(output_dir, exist_ok=True)
+            for name in os.listdir(base_model_dir):
+                if name.endswith('.pkl'):
+                    shutil.copy2(os.path.join(base_model_dir, name), os.path.join(output_dir, name))
+            
+            addon_file = f"addon_v{version}.pkl"
+            joblib.dump(addon, os.path.join(output_dir, addon_file))
+            
+            y_cache = np.concatenate([y_old.astype(str), np.full(len(X_new), sign_name)])
+            np.savez_compressed(os.path.join(output_dir, "feature_cache.npz"),
+                                X=np.vstack([X_old, X_new]), y=y_cache)
+            
+            metadata['addons'] = metadata.get('addons', []) + [
+                {'class_name': sign_name, 'model_file': addon_file}
+            ]
+            metadata['class_names'] = metadata['class_names'] + [sign_name]
+            metadata['num_classes'] = len(metadata['class_names'])
+            metadata['base_version'] = metadata.get('version', 1)
+            metadata['version'] = version
+            
+            with open(os.path.join(output_dir, "model_metadata.json"), 'w') as f:
+                json.dump(metadata, f, indent=2)
+        
+        print(f"Published model v{version} with '{sign_name}' to {output_dir}")
+        return output_dir
+
+
+class FSLPrediction(NamedTuple):
+    """Compact prediction: encoded class index, confidence (0-1) and optional top-k"""
+    class_index: int
+    confidence: float
+    top_k: Tuple[Tuple[int, float], ...] = ()
 
 
 class SimpleFSLPredictor:
     """
     Simple predictor for FSL motion signs using Random Forest
+    
+    Owns a single feature extractor and reuses preallocated feature/scaling
+    buffers across calls, so steady-state predictions only allocate what
+    predict_proba itself needs.
     """
     
+    # Trailing windows (frames) scored by predict_multiscale, shortest first,
+    # the confidence a shorter window needs to answer early, and the buffer
+    # size from which live views show every answer, early or not. All can be
+    # overridden per model with a 'multiscale' entry in model_metadata.json.
+    MULTISCALE_WINDOWS = (10, 15, 20, 30)
+    MULTISCALE_THRESHOLDS = {10: 0.85, 15: 0.75, 20: 0.65}
+    DECISION_WINDOW = 15
+    
     def __init__(self, model_dir: str):
         self.model_dir = model_dir
         self.model = None
@@ -213,6 +787,24 @@ class SimpleFSLPredictor:
         self.label_encoder = None
         self.feature_names = []
         self.class_names = []
+        self.extractor = ImprovedFSLFeatureExtractor()
+        self.addons = []
+        self.version = 1
+        self.model_type = 'random_forest'
+        self.cascade = None
+        self._stage1 = None
+        self._stage2 = None
+        self._stage_hits = {'stage1': 0, 'full': 0}
+        self.multiscale_windows = list(self.MULTISCALE_WINDOWS)
+        self.multiscale_thresholds = dict(self.MULTISCALE_THRESHOLDS)
+        self.decision_window = self.DECISION_WINDOW
+        self.capture_fps = 3.0
+        self.shadow = None  # fsl_shadow.ShadowEvaluator for a candidate model, set by the app
+        self._labels = []
+        self._features = None
+        self._scaled = None
+        self._scaler_mean = None
+        self._scaler_scale = None
         self.load_model()
     
     def load_model(self):
@@ -226,10 +818,47 @@ class SimpleFSLPredictor:
             self.class_names = metadata['class_names']
             
             # Load model and preprocessing objects
-            self.model = joblib.load(os.path.join(self.model_dir, "random_forest_model.pkl"))
+            self.model_type = metadata.get('model_type', 'random_forest')
+            model_file = metadata.get('model_file', "random_forest_model.pkl")
+            self.model = joblib.load(os.path.join(self.model_dir, model_file))
             self.scaler = joblib.load(os.path.join(self.model_dir, "scaler.pkl"))
             self.label_encoder = joblib.load(os.path.join(self.model_dir, "label_encoder.pkl"))
             
+            # One-vs-rest add-on forests for signs added after the base model (see add_sign)
+            self.addons = [
+                joblib.load(os.path.join(self.model_dir, addon['model_file']))
+                for addon in metadata.get('addons', [])
+            ]
+            self.version = metadata.get('version', 1)
+            
+            # Early-exit cascade (see SimpleFSLTrainer.calibrate_cascade)
+            self.cascade = metadata.get('cascade')
+            if self.cascade and isinstance(self.model, RandomForestClassifier):
+                self._stage1, self._stage2 = _split_forest(self.model, self.cascade['stage1_trees'])
+            else:
+                self.cascade = None
+            
+            # Models saved before capture_fps was recorded were trained on the
+            # client's ~3 FPS capture
+            self.capture_fps = metadata.get('capture_fps', 3.0)
+            
+            multiscale = metadata.get('multiscale', {})
+            self.multiscale_windows = sorted(int(w) for w in multiscale.get('windows', self.MULTISCALE_WINDOWS))
+            self.multiscale_thresholds = {
+                int(w): float(t) for w, t in multiscale.get('thresholds', self.MULTISCALE_THRESHOLDS).items()
+            }
+            self.decision_window = int(multiscale.get('decision_window', self.DECISION_WINDOW))
+            
+            # Preallocate buffers and cache the scaler parameters so predict()
+            # does not go through StandardScaler.transform's validation and copies
+            num_features = len(self.feature_names)
+            self._features = np.zeros((1, num_features), dtype=np.float64)
+            self._scaled = np.zeros((1, num_features), dtype=np.float64)
+            self._scaler_mean = np.asarray(self.scaler.mean_, dtype=np.float64)
+            self._scaler_scale = np.asarray(self.scaler.scale_, dtype=np.float64)
+            self._labels = [str(label) for label in self.label_encoder.classes_]
+            self._labels += [addon['class_name'] for addon in metadata.get('addons', [])]
+            
             print(f"Model loaded successfully from {self.model_dir}")
             print(f"Supports {len(self.class_names)} classes: {self.class_names}")
             
@@ -237,55 +866,286 @@ class SimpleFSLPredictor:
             print(f"Error loading model: {e}")
             raise
     
+    def resample(self, sequence_frames: Union[List[Dict], PackedSequence]) -> PackedSequence:
+        """Pack frames and resample them onto the model's capture frame rate
+        
+        Frames without timestamps (e.g. recorded datasets) are only packed.
+        """
+        return resample_sequence(pack_sequence(sequence_frames), self.capture_fps,
+                                 max_frames=self.multiscale_windows[-1])
+    
     def extract_features_from_sequence(self, sequence_frames: List[Dict]):
         """Extract features from a sequence using the same extractor as training"""
         try:
-            from improved_fsl_feature_extractor import ImprovedFSLFeatureExtractor
-            
-            extractor = ImprovedFSLFeatureExtractor()
-            features = extractor.extract_sequence_features(sequence_frames)
-            
-            return features
+            return self.extractor.extract_sequence_features(self.resample(sequence_frames), out=self._features[0])
         except Exception as e:
             print(f"Error extracting features: {e}")
             return None
     
-    def predict(self, sequence_frames: List[Dict]) -> Dict:
-        """Predict FSL sign from sequence frames"""
-        if not sequence_frames or len(sequence_frames) < 5:
+    def _base_proba(self, scaled: np.ndarray, stage_hits: Optional[Dict[str, int]] = None) -> np.ndarray:
+        """Base model probabilities for scaled feature rows, through the cascade if configured
+        
+        Cascade stage counts go to `stage_hits` when given (callers on other
+        threads pass their own dict) and to this predictor's own otherwise.
+        """
+        if self._stage1 is None:
+            return self.model.predict_proba(scaled)
+        
+        stage_hits = self._stage_hits if stage_hits is None else stage_hits
+        probs = self._stage1.predict_proba(scaled)
+        escalate = probs.max(axis=1) < self.cascade['threshold']
+        stage_hits['stage1'] += int(len(probs) - escalate.sum())
+        if not escalate.any():
+            return probs
+        
+        # Escalate: only the remaining trees are evaluated, then combined
+        # with stage 1 exactly as the full forest would average them
+        stage_hits['full'] += int(escalate.sum())
+        n1, n2 = self._stage1.n_estimators, self._stage2.n_estimators
+        rest = self._stage2.predict_proba(scaled[escalate])
+        probs[escalate] = (probs[escalate] * n1 + rest * n2) / (n1 + n2)
+        return probs
+    
+    def cascade_stats(self) -> Optional[Dict]:
+        """How often each cascade stage produced the answer, or None without a cascade"""
+        if self.cascade is None:
+            return None
+        total = sum(self._stage_hits.values())
+        return {
+            'stage1_trees': self.cascade['stage1_trees'],
+            'threshold': self.cascade['threshold'],
+            'predictions': total,
+            'stage1_hits': self._stage_hits['stage1'],
+            'full_forest_hits': self._stage_hits['full'],
+            'stage1_rate': self._stage_hits['stage1'] / total if total else 0.0
+        }
+    
+    def _predict_rows_proba(self, scaled: np.ndarray, stage_hits: Optional[Dict[str, int]] = None) -> np.ndarray:
+        """Class probabilities (rows x classes) for already scaled feature rows"""
+        probs = self._base_proba(scaled, stage_hits)
+        if not self.addons:
+            return probs
+        
+        # Each add-on scores its sign against everything else; those scores
+        # take their share of the probability mass and the base classes
+        # split what is left
+        addon_probs = np.column_stack([addon.predict_proba(scaled)[:, 1] for addon in self.addons])
+        total = addon_probs.sum(axis=1, keepdims=True)
+        addon_probs = np.where(total > 1, addon_probs / np.maximum(total, 1), addon_probs)
+        return np.concatenate([probs * (1 - addon_probs.sum(axis=1, keepdims=True)), addon_probs], axis=1)
+    
+    def _predict_scaled_proba(self) -> np.ndarray:
+        """Class probabilities for the features currently in self._features"""
+        np.subtract(self._features, self._scaler_mean, out=self._scaled)
+        np.divide(self._scaled, self._scaler_scale, out=self._scaled)
+        return self._predict_rows_proba(self._scaled)[0]
+    
+    def class_name(self, class_index: int) -> str:
+        """Map an encoded class index back to its sign name"""
+        return self._labels[class_index]
+    
+    def predict_compact(self, sequence_frames: List[Dict], top_k: int = 0) -> Optional[FSLPrediction]:
+        """Predict FSL sign and return only the class index, confidence and top-k
+        
+        Returns None if the sequence is too short, the model is not loaded or
+        feature extraction fails.
+        """
+        if not sequence_frames or len(sequence_frames) < 5 or self.model is None:
+            return None
+        
+        if self.extract_features_from_sequence(sequence_frames) is None:
+            return None
+        
+        probs = self._predict_scaled_proba()
+        class_index = int(probs.argmax())
+        if self.shadow is not None:
+            self.shadow.submit(self._features[0], self._labels[class_index], float(probs[class_index]))
+        
+        top = ()
+        if top_k > 0:
+            k = min(top_k, len(probs))
+            candidates = np.argpartition(probs, -k)[-k:]
+            candidates = candidates[np.argsort(probs[candidates])[::-1]]
+            top = tuple((int(i), float(probs[i])) for i in candidates)
+        
+        return FSLPrediction(class_index, float(probs[class_index]), top)
+    
+    def predict_proba(self, sequence_frames: List[Dict]) -> Optional[Dict[str, float]]:
+        """Full class -> probability (0-100) map, for callers that need all classes"""
+        if not sequence_frames or len(sequence_frames) < 5 or self.model is None:
+            return None
+        
+        if self.extract_features_from_sequence(sequence_frames) is None:
+            return None
+        
+        probs = self._predict_scaled_proba()
+        
+        return {self._labels[i]: float(prob * 100) for i, prob in enumerate(probs)}
+    
+    def predict_multiscale(self, sequence_frames: Union[List[Dict], PackedSequence]) -> Dict:
+        """Predict from several trailing windows of the same buffer in one batch
+        
+        Each window in self.multiscale_windows that is shorter than the buffer,
+        plus the whole buffer (capped at the longest window), is featurized and
+        scored in a single vectorized pass. The shortest window that reaches
+        its confidence threshold answers ('early_decision': True); otherwise
+        the longest window does, as predict() would. While the buffer is still
+        shorter than decision_window, the whole buffer also has to reach the
+        threshold of the longest configured window it covers to count as an
+        early decision.
+        """
+        if not sequence_frames:
             return {'prediction': 'insufficient_data', 'confidence': 0.0}
         
         if self.model is None:
             return {'prediction': 'model_not_loaded', 'confidence': 0.0}
         
         try:
-            # Extract features
-            features = self.extract_features_from_sequence(sequence_frames)
+            packed = self.resample(sequence_frames)
+            if len(packed) < self.multiscale_windows[0]:
+                return {'prediction': 'insufficient_data', 'confidence': 0.0}
+            
+            longest = min(len(packed), self.multiscale_windows[-1])
+            windows = [w for w in self.multiscale_windows if w < longest] + [longest]
+            
+            # Every row sees the same trailing frames; `lengths` masks off
+            # what lies outside its window
+            landmarks = packed.landmarks[-longest:]
+            features = self.extractor.extract_batch_features(
+                np.broadcast_to(landmarks, (len(windows),) + landmarks.shape),
+                np.broadcast_to(packed.hand_counts[-longest:], (len(windows), longest)),
+                lengths=np.array(windows)
+            )
             if features is None:
                 return {'prediction': 'feature_extraction_failed', 'confidence': 0.0}
             
-            # Scale features
-            features_scaled = self.scaler.transform(features.reshape(1, -1))
+            probs = self._predict_rows_proba((features - self._scaler_mean) / self._scaler_scale)
+            best = probs.argmax(axis=1)
+            confidence = probs[np.arange(len(windows)), best]
             
-            # Make prediction
-            prediction_probs = self.model.predict_proba(features_scaled)[0]
-            predicted_class_idx = np.argmax(prediction_probs)
-            confidence = float(prediction_probs[predicted_class_idx])
+            last = len(windows) - 1
+            chosen = last
+            early = False
+            for i, window in enumerate(windows):
+                # From the decision window on, the whole buffer answers anyway
+                if i == last and window >= self.decision_window:
+                    break
+                covered = [w for w in self.multiscale_thresholds if w <= window]
+                threshold = self.multiscale_thresholds[max(covered)] if covered else None
+                if threshold is not None and confidence[i] >= threshold:
+                    chosen = i
+                    early = True
+                    break
             
-            # Convert back to original label
-            predicted_sign = self.label_encoder.inverse_transform([predicted_class_idx])[0]
+            if self.shadow is not None:
+                self.shadow.submit(features[chosen], self._labels[best[chosen]], float(confidence[chosen]))
             
-            # Get all class probabilities
-            all_probabilities = {
-                self.class_names[i]: float(prob * 100) 
-                for i, prob in enumerate(prediction_probs)
+            return {
+                'prediction': self._labels[best[chosen]],
+                'confidence': float(confidence[chosen]) * 100,
+                'model_used': self.model_type,
+                'window': windows[chosen],
+                'early_decision': early
             }
             
+        except Exception as e:
+            print(f"Prediction error: {e}")
+            return {'prediction': 'prediction_error', 'confidence': 0.0}
+    
+    def predict_proba_batch(self, landmarks: np.ndarray, hand_counts: Optional[np.ndarray] = None,
+                            lengths: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Class probabilities (N x classes, 0-1) for N packed sequences
+        
+        landmarks is a right-aligned (N, T, 2, 21, 3) batch as built by
+        pack_batch; hand_counts defaults to the hands present in each frame
+        and lengths to T. Sequences are used as recorded (no resampling).
+        Returns None if any sequence is shorter than 5 frames.
+        """
+        landmarks = np.asarray(landmarks, dtype=np.float32)
+        if hand_counts is None:
+            hand_counts = np.any(landmarks != 0, axis=(3, 4)).sum(axis=-1)
+        features = self.extractor.extract_batch_features(landmarks, hand_counts, lengths=lengths)
+        if features is None:
+            return None
+        return self._predict_rows_proba((features - self._scaler_mean) / self._scaler_scale)
+    
+    def predict_batch(self, landmarks: np.ndarray, hand_counts: Optional[np.ndarray] = None,
+                      lengths: Optional[np.ndarray] = None) -> List[Dict]:
+        """predict() for a batch of packed sequences (see predict_proba_batch)
+        
+        All sequences are featurized together and scored with one
+        predict_proba call. Sequences shorter than 5 frames get
+        'insufficient_data' without failing the rest of the batch.
+        """
+        landmarks = np.asarray(landmarks, dtype=np.float32)
+        num_sequences, num_frames = landmarks.shape[:2]
+        lengths = np.full(num_sequences, num_frames) if lengths is None else np.asarray(lengths)
+        
+        if self.model is None:
+            return [{'prediction': 'model_not_loaded', 'confidence': 0.0} for _ in range(num_sequences)]
+        
+        results = [{'prediction': 'insufficient_data', 'confidence': 0.0} for _ in range(num_sequences)]
+        rows = np.flatnonzero((lengths >= 5) & (lengths <= num_frames))
+        if not rows.size:
+            return results
+        
+        try:
+            probs = self.predict_proba_batch(landmarks[rows], None if hand_counts is None else np.asarray(hand_counts)[rows],
+                                             lengths[rows])
+            if probs is None:
+                for row in rows:
+                    results[row] = {'prediction': 'feature_extraction_failed', 'confidence': 0.0}
+                return results
+            
+            best = probs.argmax(axis=1)
+            for row, class_index, confidence in zip(rows, best, probs[np.arange(len(rows)), best]):
+                results[row] = {
+                    'prediction': self._labels[class_index],
+                    'confidence': float(confidence) * 100,
+                    'model_used': self.model_type
+                }
+            
+        except Exception as e:
+            print(f"Prediction error: {e}")
+            for row in rows:
+                results[row] = {'prediction': 'prediction_error', 'confidence': 0.0}
+        
+        return results
+    
+    def predict(self, sequence_frames: List[Dict], include_probabilities: bool = False) -> Dict:
+        """Predict FSL sign from sequence frames
+        
+        The full `all_probabilities` map is only built when
+        include_probabilities is True.
+        """
+        if not sequence_frames or len(sequence_frames) < 5:
+            return {'prediction': 'insufficient_data', 'confidence': 0.0}
+        
+        if self.model is None:
+            return {'prediction': 'model_not_loaded', 'confidence': 0.0}
+        
+        try:
+            if include_probabilities:
+                all_probabilities = self.predict_proba(sequence_frames)
+                if all_probabilities is None:
+                    return {'prediction': 'feature_extraction_failed', 'confidence': 0.0}
+                
+                predicted_sign = max(all_probabilities, key=all_probabilities.get)
+                return {
+                    'prediction': predicted_sign,
+                    'confidence': all_probabilities[predicted_sign],
+                    'model_used': self.model_type,
+                    'all_probabilities': all_probabilities
+                }
+            
+            result = self.predict_compact(sequence_frames)
+            if result is None:
+                return {'prediction': 'feature_extraction_failed', 'confidence': 0.0}
+            
             return {
-                'prediction': predicted_sign,
-                'confidence': confidence * 100,  # Convert to percentage
-                'model_used': 'random_forest',
-                'all_probabilities': all_probabilities
+                'prediction': self._labels[result.class_index],
+                'confidence': result.confidence * 100,  # Convert to percentage
+                'model_used': self.model_type
             }
             
         except Exception as e:
@@ -298,14 +1158,73 @@ if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description='Simple FSL Random Forest Trainer')
-    parser.add_argument('--features-dir', required=True, help='Directory with extracted features')
+    parser.add_argument('--features-dir', help='Directory with extracted features')
     parser.add_argument('--output-dir', default='fsl_models', help='Output directory for model')
     parser.add_argument('--trees', type=int, default=200, help='Number of trees in Random Forest')
+    parser.add_argument('--mode', choices=['fast', 'full'], default='fast',
+                        help='fast: out-of-bag validation only; full: also parallel 5-fold CV')
+    parser.add_argument('--jobs', type=int, default=-1, help='Parallel workers (-1 = all cores)')
+    parser.add_argument('--sweep', action='store_true',
+                        help='Sweep forest size/depth and keep the smallest model within budget')
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.01,
+                        help='Allowed accuracy drop from the best swept model')
+    parser.add_argument('--latency-budget-ms', type=float, default=5.0,
+                        help='Per-row inference latency budget for the swept model')
+    parser.add_argument('--sweep-report', help='Write the Pareto report JSON to this path')
+    parser.add_argument('--cascade-trees', type=int,
+                        help='Calibrate an early-exit cascade whose first stage uses this many trees')
+    parser.add_argument('--capture-fps', type=float, default=3.0,
+                        help='Frame rate the dataset was recorded at (live frames are resampled to it)')
+    parser.add_argument('--distill', choices=['forest', 'boosted', 'linear'],
+                        help='After training, replace the forest with a distilled student of this type')
+    parser.add_argument('--export-json', metavar='MODEL_PICKLE',
+                        help='Export a model pickle (e.g. model_alphabet_compare.p) to client-side JSON and exit')
+    parser.add_argument('--json-output', help='Output path for --export-json')
+    parser.add_argument('--json-trees', type=int,
+                        help='Keep only the first N trees (e.g. 10 for asl_randomforest_small.json)')
+    parser.add_argument('--add-sign', metavar='SIGN',
+                        help='Add one sign to an existing model (see --base-model-dir) and exit')
+    parser.add_argument('--base-model-dir', default='fsl_movement_model', help='Model to extend with --add-sign')
+    parser.add_argument('--sign-dataset', help='Dataset JSON with recorded sequences for --add-sign')
+    parser.add_argument('--sign-features', help='features.npy for --add-sign (instead of --sign-dataset)')
     
     args = parser.parse_args()
     
+    if args.export_json:
+        if not args.json_output:
+            parser.error('--export-json requires --json-output')
+        export_forest_json(args.export_json, args.json_output, max_trees=args.json_trees)
+        raise SystemExit(0)
+    
+    if args.add_sign:
+        trainer = SimpleFSLTrainer()
+        if args.sign_features:
+            X_new = np.load(args.sign_features)
+        elif args.sign_dataset:
+            with open(args.sign_dataset, 'r') as f:
+                sequences = json.load(f).get(args.add_sign, [])
+            extractor = ImprovedFSLFeatureExtractor()
+            with trainer._timed('extract_features'):
+                rows = [extractor.extract_sequence_features(seq['frames']) for seq in sequences]
+            rows = [r for r in rows if r is not None]
+            if not rows:
+                parser.error(f"No usable sequences for '{args.add_sign}' in {args.sign_dataset}")
+            X_new = np.array(rows)
+        else:
+            parser.error('--add-sign requires --sign-dataset or --sign-features')
+        
+        trainer.add_sign(args.base_model_dir, args.add_sign, X_new,
+                         output_dir=args.output_dir if args.output_dir != 'fsl_models' else None,
+                         features_dir=args.features_dir, n_jobs=args.jobs)
+        trainer.report_timings()
+        raise SystemExit(0)
+    
+    if not args.features_dir:
+        parser.error('--features-dir is required for training')
+    
     # Initialize trainer
     trainer = SimpleFSLTrainer()
+    trainer.capture_fps = args.capture_fps
     
     try:
         # Load features
@@ -314,11 +1233,31 @@ if __name__ == "__main__":
         
         # Prepare data
         print("Preparing data...")
-        data = trainer.prepare_data(X, y)
+        sources, copy_index = trainer.load_augmentation_index(args.features_dir)
+        data = trainer.prepare_data(X, y, sources=sources, copy_index=copy_index)
         
         # Train model
-        print("Training Random Forest model...")
-        results = trainer.train_model(data, n_estimators=args.trees)
+        if args.sweep:
+            print("Selecting Random Forest model...")
+            report = trainer.select_model(
+                data,
+                accuracy_tolerance=args.accuracy_tolerance,
+                latency_budget_ms=args.latency_budget_ms,
+                n_jobs=args.jobs,
+                report_path=args.sweep_report
+            )
+            results = {'test_accuracy': report['selected']['accuracy']}
+        else:
+            print("Training Random Forest model...")
+            results = trainer.train_model(data, n_estimators=args.trees, mode=args.mode, n_jobs=args.jobs)
+        
+        if args.cascade_trees and not args.distill:
+            trainer.calibrate_cascade(data, stage1_trees=args.cascade_trees)
+        
+        if args.distill:
+            print("Distilling model...")
+            report = trainer.distill(data, student=args.distill)
+            results['test_accuracy'] = report['student_accuracy']
         
         # Show feature importance
         trainer.get_feature_importance(top_n=15)
@@ -328,6 +1267,7 @@ if __name__ == "__main__":
         
         print(f"\nTraining completed successfully!")
         print(f"Final test accuracy: {results['test_accuracy']:.4f}")
+        trainer.report_timings()
         
         # Test the predictor
         print("\nTesting predictor...")
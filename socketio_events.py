@@ -2,46 +2,22 @@ from flask import session, current_app, request, jsonify
 from flask_socketio import emit, join_room, leave_room, send
 import numpy as np
 
+import os
 import time
+import uuid
 import cv2
 import base64
 import io
 from PIL import Image
 
-def get_user_by_id(user_id, supabase_client):
-    """Get user by ID from Supabase"""
-    try:
-        result = supabase_client.table('users').select('*').eq('id', user_id).execute()
-        return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error getting user by ID: {e}")
-        return None
+from fsl_frame_adapter import FrameBuffer
+from user_store import get_user_by_id
+from room import get_participants_with_profiles
+from words_store import words_store
+from write_queue import write_queue
 
-def get_user_by_username(username, supabase_client):
-    """Get user by username from Supabase"""
-    try:
-        result = supabase_client.table('users').select('*').eq('username', username).execute()
-        return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error getting user by username: {e}")
-        return None
-
-def get_participants_with_profiles(participants, supabase):
-    """Get participant data with profile pictures"""
-    participants_data = []
-    for participant_username in participants:
-        user_data = get_user_by_username(participant_username, supabase)
-        if user_data:
-            participants_data.append({
-                'username': participant_username,
-                'profile_picture': user_data.get('profile_picture')
-            })
-        else:
-            participants_data.append({
-                'username': participant_username,
-                'profile_picture': None
-            })
-    return participants_data
+# Seconds score updates are collected before one leaderboard broadcast per room
+LEADERBOARD_TICK = float(os.getenv('LEADERBOARD_TICK', '0.2'))
 
 def normalize_hand_landmarks(landmarks):
     """Normalize landmarks relative to wrist position and hand scale (same as training)"""
@@ -144,6 +120,12 @@ def init_all_socketio_events(socketio, supabase, detector=None):
     
     from home import rooms, game_states
     
+    # Game instances and results are written by the queue's background task
+    write_queue.start(socketio, supabase)
+    
+    # Clients holding the word list refetch it after an admin edit
+    words_store.add_listener(lambda version, words: socketio.emit('words_updated', {'version': version}))
+    
     @socketio.on('connect')
     def handle_connect():
         user_id = session.get('user_id')
@@ -200,10 +182,16 @@ def init_all_socketio_events(socketio, supabase, detector=None):
             if user_id and "camera_status" in rooms[room] and user_id in rooms[room]["camera_status"]:
                 del rooms[room]["camera_status"][user_id]
 
+            # Departed players drop out of the next leaderboard delta
+            board = rooms[room].get("leaderboard")
+            if board is not None and board["scores"].pop(user_id, None) is not None:
+                schedule_leaderboard(socketio, room, board)
+
             if name in rooms[room].get("participants", []):
                 rooms[room]["participants"].remove(name)
+                rooms[room].get("profiles", {}).pop(name, None)
                 
-                participants_with_profiles = get_participants_with_profiles(rooms[room]["participants"], supabase)
+                participants_with_profiles = get_participants_with_profiles(rooms[room], supabase)
                 emit('participants_updated', {
                     'participants': participants_with_profiles
                 }, room=room)
@@ -244,7 +232,7 @@ def init_all_socketio_events(socketio, supabase, detector=None):
             "camera_ready": False
         }
 
-        participants_with_profiles = get_participants_with_profiles(rooms[room]["participants"], supabase)
+        participants_with_profiles = get_participants_with_profiles(rooms[room], supabase)
         emit('participants_updated', {'participants': participants_with_profiles}, room=room)
 
         send({"name": name, "message": "has entered the room"}, to=room)
@@ -253,6 +241,11 @@ def init_all_socketio_events(socketio, supabase, detector=None):
         model_loaded = detector.model_loaded if detector else False
         emit('status', {'message': 'Connected - Server processing', 'model_loaded': model_loaded}, to=request.sid)
 
+        # Deltas only repeat entries that change, so a (re)joining player or
+        # spectator starts from the full board
+        if rooms[room].get("leaderboard") is not None:
+            emit('leaderboard_update', leaderboard_snapshot(rooms[room]), to=request.sid)
+
         # Send game settings to new joiner (including learning material)
         game_type = rooms[room].get('game_type')
         duration = rooms[room].get('duration', 30)
@@ -353,6 +346,8 @@ def init_all_socketio_events(socketio, supabase, detector=None):
         
         if ready_users == total_users and total_users > 0:
             rooms[room]["scores_saved"] = False
+            rooms[room]["leaderboard"] = new_leaderboard()
+            emit('leaderboard_update', {'seq': 0, 'reset': True, 'changes': [], 'removed': []}, room=room)
             save_game_instance_to_db(room)
             emit('start_game_countdown', room=room)
             print(f"Game started in room {room}")
@@ -399,13 +394,25 @@ def init_all_socketio_events(socketio, supabase, detector=None):
     @socketio.on('score_update')
     def handle_score_update(data):
         user_id = session.get('user_id')
-        user_data = get_user_by_id(user_id, supabase)
-        username = user_data['username'] if user_data else 'Unknown'
         room = session.get("room")
         score = data.get("score")
 
-        if room and username:
-            emit('leaderboard_update', {'username': username, 'score': score}, room=room)
+        if not room or room not in rooms:
+            return
+        if isinstance(score, bool) or not isinstance(score, (int, float)):
+            return
+
+        # Names are resolved from the room's profiles once per broadcast
+        board = rooms[room].setdefault("leaderboard", new_leaderboard())
+        board["scores"][user_id] = score
+        schedule_leaderboard(socketio, room, board)
+
+    @socketio.on('leaderboard_resync')
+    def handle_leaderboard_resync():
+        """A client that missed a delta (seq gap) asks for the full board"""
+        room = session.get("room")
+        if room in rooms and rooms[room].get("leaderboard") is not None:
+            emit('leaderboard_update', leaderboard_snapshot(rooms[room]), to=request.sid)
 
     @socketio.on('room_creator_leaving')
     def handle_room_creator_leaving():
@@ -484,6 +491,11 @@ def init_all_socketio_events(socketio, supabase, detector=None):
                 if user_id in handle_process_fsl_frame.no_hands_counter:
                     del handle_process_fsl_frame.no_hands_counter[user_id]
             
+            # Clean up frame-rate control state
+            if hasattr(handle_process_fsl_frame, 'frame_intervals'):
+                handle_process_fsl_frame.frame_intervals.pop(user_id, None)
+                handle_process_fsl_frame.last_frame_times.pop(user_id, None)
+            
             print(f"Cleaned up FSL session for user {user_id}")
 
     @socketio.on('get_supported_signs')
@@ -526,6 +538,20 @@ def init_all_socketio_events(socketio, supabase, detector=None):
         
         start_time = time.time()
         
+        # Frame-rate control: frames arriving sooner than this user's current
+        # minimum interval are dropped before decoding. The predictor resamples
+        # buffers onto its capture frame rate, so accuracy does not depend on
+        # how many frames are accepted.
+        if not hasattr(handle_process_fsl_frame, 'frame_intervals'):
+            handle_process_fsl_frame.frame_intervals = {}
+            handle_process_fsl_frame.last_frame_times = {}
+        
+        interval = handle_process_fsl_frame.frame_intervals.get(
+            user_id, current_app.config.get('FSL_MIN_FRAME_INTERVAL', 0.0))
+        if start_time - handle_process_fsl_frame.last_frame_times.get(user_id, 0) < interval:
+            return
+        handle_process_fsl_frame.last_frame_times[user_id] = start_time
+        
         try:
             image_data = data['image'].split(',')[1]
             image_bytes = base64.b64decode(image_data)
@@ -535,7 +561,17 @@ def init_all_socketio_events(socketio, supabase, detector=None):
             
             landmarks_data = extract_fsl_landmarks_from_frame(frame)
             
+            if current_app.config.get('FSL_ADAPTIVE_FRAME_RATE', True):
+                handle_process_fsl_frame.frame_intervals[user_id] = adapt_frame_interval(
+                    interval, time.time() - start_time, current_app.config)
+            
             if landmarks_data:
+                # Use the client's capture time (ms) so network jitter does not
+                # distort the resampling grid
+                client_timestamp = data.get('timestamp')
+                if isinstance(client_timestamp, (int, float)):
+                    landmarks_data['timestamp'] = client_timestamp / 1000.0
+                
                 # Initialize motion buffer and counters for this user if not exists
                 if not hasattr(handle_process_fsl_frame, 'user_buffers'):
                     handle_process_fsl_frame.user_buffers = {}
@@ -544,7 +580,7 @@ def init_all_socketio_events(socketio, supabase, detector=None):
                     handle_process_fsl_frame.frame_counters = {}
                 
                 if user_id not in handle_process_fsl_frame.user_buffers:
-                    handle_process_fsl_frame.user_buffers[user_id] = []
+                    handle_process_fsl_frame.user_buffers[user_id] = FrameBuffer(capacity=30)
                     handle_process_fsl_frame.frame_counters[user_id] = 0
 
                 # Initialize no_hands_streak tracker
@@ -554,25 +590,36 @@ def init_all_socketio_events(socketio, supabase, detector=None):
                 # Reset no-hands streak since we detected hands
                 handle_process_fsl_frame.no_hands_streak[user_id] = 0
                 
+                # Frames are packed into arrays once here; the buffer keeps the last 30
                 handle_process_fsl_frame.user_buffers[user_id].append(landmarks_data)
                 
-                if len(handle_process_fsl_frame.user_buffers[user_id]) > 30:
-                    handle_process_fsl_frame.user_buffers[user_id].pop(0)
-                
-                buffer_size = len(handle_process_fsl_frame.user_buffers[user_id])
+                # Progress and decisions count frames on the model's time
+                # grid, which is what predict_multiscale scores (the raw count
+                # differs when the client or the adaptive interval changes the rate)
+                predictor = current_app.fsl_predictor
+                motion = predictor.resample(handle_process_fsl_frame.user_buffers[user_id].sequence())
+                buffer_size = len(motion)
                 
                 handle_process_fsl_frame.frame_counters[user_id] += 1
                 frame_count = handle_process_fsl_frame.frame_counters[user_id]
                 
+                # Predictions start at the shortest multi-scale window; below
+                # the decision window only a confident early decision is shown
+                min_window = predictor.multiscale_windows[0]
+                decision_window = predictor.decision_window
+                
+                def emit_collecting():
+                    emit('prediction_result', {
+                        'prediction': f'Collecting motion ({buffer_size}/{decision_window})',
+                        'confidence': 0.0,
+                        'processing_time': time.time() - start_time,
+                        'buffer_size': buffer_size
+                    })
+                
                 # Collecting phase: show progress
-                if buffer_size < 15:
-                    if buffer_size % 3 == 0:  # Update every 3 frames
-                        emit('prediction_result', {
-                            'prediction': f'Collecting motion ({buffer_size}/15)',
-                            'confidence': 0.0,
-                            'processing_time': time.time() - start_time,
-                            'buffer_size': buffer_size
-                        })
+                if buffer_size < min_window:
+                    if frame_count % 3 == 0:  # Update every 3 frames
+                        emit_collecting()
                     return
                 
                 # Prediction phase: only predict every 3 frames
@@ -581,10 +628,14 @@ def init_all_socketio_events(socketio, supabase, detector=None):
                 
                 # Make prediction
                 try:
-                    sequence_frames = handle_process_fsl_frame.user_buffers[user_id].copy()
-                    prediction_result = current_app.fsl_predictor.predict(sequence_frames)
+                    # Already on the grid, so resampling it again changes nothing
+                    prediction_result = predictor.predict_multiscale(motion)
                     processing_time = time.time() - start_time
                     
+                    if buffer_size < decision_window and not prediction_result.get('early_decision'):
+                        emit_collecting()
+                        return
+                    
                     # Send result to client
                     result = {
                         'prediction': prediction_result['prediction'],
@@ -592,7 +643,7 @@ def init_all_socketio_events(socketio, supabase, detector=None):
                         'model_used': prediction_result.get('model_used', 'random_forest'),
                         'processing_time': processing_time,
                         'buffer_size': buffer_size,
-                        'all_probabilities': prediction_result.get('all_probabilities', {})
+                        'window': prediction_result.get('window', buffer_size)
                     }
                     
                     emit('prediction_result', result)
@@ -618,7 +669,7 @@ def init_all_socketio_events(socketio, supabase, detector=None):
                 if handle_process_fsl_frame.no_hands_streak[user_id] >= 5:
                     if hasattr(handle_process_fsl_frame, 'user_buffers') and user_id in handle_process_fsl_frame.user_buffers:
                         old_size = len(handle_process_fsl_frame.user_buffers[user_id])
-                        handle_process_fsl_frame.user_buffers[user_id] = []
+                        handle_process_fsl_frame.user_buffers[user_id].clear()
                         handle_process_fsl_frame.frame_counters[user_id] = 0
                         print(f"Cleared buffer ({old_size} frames) - no hands for 5 frames")
                     
@@ -642,6 +693,66 @@ def init_all_socketio_events(socketio, supabase, detector=None):
 
 ###########################################################################################################
 
+def new_leaderboard():
+    """Per-room leaderboard: latest scores by user id, and what clients were last sent"""
+    return {"scores": {}, "sent": {}, "seq": 0, "scheduled": False}
+
+def rank_leaderboard(scores, names):
+    """(user_id, username, score, rank) highest score first; equal scores share a rank"""
+    ordered = sorted(scores.items(), key=lambda item: (-item[1], names.get(item[0], ''), str(item[0])))
+    ranked = []
+    for position, (user_id, score) in enumerate(ordered, 1):
+        rank = ranked[-1][3] if ranked and ranked[-1][2] == score else position
+        ranked.append((user_id, names.get(user_id, 'Unknown'), score, rank))
+    return ranked
+
+def leaderboard_names(room_data):
+    """user_id -> username from the room's profiles map"""
+    return {profile['user_id']: username for username, profile in room_data.get("profiles", {}).items()}
+
+def leaderboard_snapshot(room_data):
+    """The whole board as a reset update at the current seq"""
+    board = room_data["leaderboard"]
+    return {
+        'seq': board["seq"],
+        'reset': True,
+        'changes': [{'user_id': user_id, 'username': username, 'score': score, 'rank': rank}
+                    for user_id, username, score, rank in rank_leaderboard(board["scores"], leaderboard_names(room_data))],
+        'removed': []
+    }
+
+def schedule_leaderboard(socketio, room, board):
+    """The first change in a tick schedules the broadcast; later ones ride along"""
+    if not board["scheduled"]:
+        board["scheduled"] = True
+        socketio.start_background_task(broadcast_leaderboard, socketio, room, board)
+
+def broadcast_leaderboard(socketio, room, board):
+    """After one tick, send the room the entries whose score or rank changed, and who left"""
+    from home import rooms
+    
+    socketio.sleep(LEADERBOARD_TICK)
+    board["scheduled"] = False
+    
+    # The room closed, or a new game replaced this leaderboard
+    if rooms.get(room, {}).get("leaderboard") is not board:
+        return
+    
+    names = leaderboard_names(rooms[room])
+    changes = []
+    for user_id, username, score, rank in rank_leaderboard(board["scores"], names):
+        if board["sent"].get(user_id) != (score, rank):
+            board["sent"][user_id] = (score, rank)
+            changes.append({'user_id': user_id, 'username': username, 'score': score, 'rank': rank})
+    
+    removed = [user_id for user_id in board["sent"] if user_id not in board["scores"]]
+    for user_id in removed:
+        del board["sent"][user_id]
+    
+    if changes or removed:
+        board["seq"] += 1
+        socketio.emit('leaderboard_update', {'seq': board["seq"], 'changes': changes, 'removed': removed}, to=room)
+
 def check_camera_readiness(room, rooms):
     """Check camera readiness for game start"""
     if room not in rooms or "camera_status" not in rooms[room]:
@@ -676,8 +787,6 @@ def save_game_results(room):
         return
     
     try:
-        supabase = current_app.config['SUPABASE']
-        
         # Check if all participants have sent their scores
         expected_participants = len(rooms[room].get("participants", []))
         actual_scores = len(rooms[room]["final_scores"])
@@ -687,33 +796,31 @@ def save_game_results(room):
             print(f"Waiting for more scores in room {room}")
             return
         
-        # Get the most recent room record
-        room_result = supabase.table('rooms').select('*').eq('room_code', room).order('created_at', desc=True).limit(1).execute()
-        
-        if not room_result.data:
+        # Key of this game's `rooms` row, queued by save_game_instance_to_db;
+        # the write queue fills in its id once the row is inserted
+        game_key = rooms[room].get("game_key")
+        if not game_key:
             return
         
-        room_id = room_result.data[0]['id']
-        creator_id = room_result.data[0]['creator_id']
+        creator_id = rooms[room].get('creator_id')
         creator_participated = rooms[room].get('creator_participated', True)
 
-        # Save all scores
+        # Queue all scores
         for user_id, final_score in rooms[room]["final_scores"].items():
             if user_id == creator_id and not creator_participated:
                 print(f"Skipping creator {user_id} - did not participate")
                 continue
                 
-            supabase.table('game_sessions').insert({
+            write_queue.enqueue('game_sessions', {
                 'user_id': user_id,
-                'room_id': room_id,
                 'score': final_score
-            }).execute()
+            }, refs={'room_id': game_key})
 
         # Mark as saved and clear for next game
         rooms[room]["scores_saved"] = True
         rooms[room]["final_scores"] = {}
 
-        print(f"All scores saved and cleared for room {room}")
+        print(f"All scores queued and cleared for room {room}")
             
     except Exception as e:
         print(f"Error saving game results: {e}")
@@ -722,24 +829,22 @@ def save_game_instance_to_db(room):
     """Save a new game instance when game starts"""
     from home import rooms
     try:
-        supabase = current_app.config['SUPABASE']
-        
-        # Get room creator info
-        creator_username = rooms[room].get("creator", "Unknown")
-        creator_data = get_user_by_username(creator_username, supabase) if creator_username != "Unknown" else None
-        creator_id = creator_data['id'] if creator_data else None
+        # The creator's id was stored when the room was created
+        creator_id = rooms[room].get("creator_id")
         learning_material = rooms[room].get("learning_material", "alphabet")
 
-        # Insert new game instance
-        supabase.table('rooms').insert({
+        # Queue the new game instance; its results reference it by key
+        game_key = f"rooms:{room}:{uuid.uuid4().hex}"
+        write_queue.enqueue('rooms', {
             'room_code': room,
             'game_type': rooms[room].get('game_type', 'Unknown'),
             'duration': rooms[room].get('duration', 30),
             'total_participants': len(rooms[room].get('participants', [])),
             'creator_id': creator_id,
             'learning_material': learning_material
-        }).execute()
-        print(f"New game instance saved for room {room}")
+        }, key=game_key)
+        rooms[room]["game_key"] = game_key
+        print(f"New game instance queued for room {room}")
         
         rooms[room].pop("learning_material", None)
         
@@ -750,6 +855,23 @@ def save_game_instance_to_db(room):
 #########################################
 # word related
 
+def adapt_frame_interval(interval, elapsed, config):
+    """
+    Next minimum interval between accepted FSL frames for one user: back off
+    while decoding + landmark extraction takes longer than the time budget,
+    and recover toward FSL_MIN_FRAME_INTERVAL once it is comfortably faster
+    """
+    min_interval = config.get('FSL_MIN_FRAME_INTERVAL', 0.0)
+    max_interval = config.get('FSL_MAX_FRAME_INTERVAL', 1.0)
+    budget = config.get('FSL_FRAME_TIME_BUDGET', 0.25)
+    
+    if elapsed > budget:
+        # Clients send every ~333 ms, so anything below that drops nothing
+        return min(max_interval, max(interval, 0.3) + 0.1)
+    if elapsed < budget / 2:
+        return max(min_interval, interval - 0.05)
+    return interval
+
 def extract_fsl_landmarks_from_frame(frame):
     """
     Extract hand landmarks from frame using MediaPipe
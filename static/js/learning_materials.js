@@ -99,7 +99,7 @@ document.addEventListener('DOMContentLoaded', async function() {
             console.error('❌ Client-side processing NOT active - check initialization');
         }
     }
-    initializeItems();
+    await initializeItems();
 });
 
 function initializeFSLWordsSocket() {
@@ -427,9 +427,48 @@ function back() {
     window.location.href = `${window.location.origin}/learn/`;
 }
 
-function initializeItems() {
+async function initializeItems() {
+    /*Build the item list from the cached catalogue API, falling back to the page buttons*/
+
     const classButtons = document.querySelectorAll('.class-btn');
     currentItems = [];
+
+    try {
+        // The browser reuses this for a few minutes, then revalidates it by ETag
+        const response = await fetch(`/learn/api/${encodeURIComponent(currentCategory)}`, {
+            credentials: 'same-origin'
+        });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const catalogue = await response.json();
+
+        const items = catalogue.subcategories
+            ? catalogue.subcategories.flatMap(subcategory => subcategory.items)
+            : catalogue.items;
+        const categoryTitle = document.querySelector('h1.category').textContent.trim();
+        const buttonsByClass = new Map();
+        classButtons.forEach(button => buttonsByClass.set(button.textContent.trim(), button));
+
+        items.forEach(item => {
+            const button = buttonsByClass.get(item.class);
+            if (button) {
+                currentItems.push({
+                    class: item.class,
+                    instruction: item.instruction,
+                    image_path: item.image_path,
+                    category: categoryTitle,
+                    buttonElement: button
+                });
+            }
+        });
+        console.log(`Loaded catalogue version ${catalogue.version}`);
+    } catch (error) {
+        console.warn('Catalogue API unavailable, reading items from the page:', error);
+        currentItems = [];
+    }
+
+    if (currentItems.length > 0) {
+        return;
+    }
     
     classButtons.forEach((button, index) => {
         const onclick = button.getAttribute('onclick');
@@ -250,32 +250,23 @@ function setupRoomSocketHandlers() {
         }, 1000);
     }); 
 
-    // Leaderboard updates
+    // Leaderboard updates: the server sends only the entries whose score or
+    // rank changed since its last broadcast (at most one per tick), and the
+    // players who left
     socketio.on('leaderboard_update', function(data) {
-        const list = document.getElementById('leaderboard-list');
-        const existingRows = list.getElementsByClassName('leaderboard-row');
-
-        let found = false;
-
-        for (let row of existingRows) {
-            const usernameSpan = row.querySelector('.username');
-            if (usernameSpan && usernameSpan.textContent === data.username) {
-                const scoreSpan = row.querySelector('.score');
-                scoreSpan.textContent = data.score;
-                found = true;
-                break;
-            }
-        }
-
-        if (!found) {
-            const newRow = document.createElement('div');
-            newRow.className = 'leaderboard-row';
-            newRow.innerHTML = `
-                <span class="username">${data.username}</span>
-                <span class="score">${data.score}</span>
-            `;
-            list.appendChild(newRow);
+        if (data.reset) {
+            leaderboardEntries.clear();
+        } else if (data.seq <= leaderboardSeq) {
+            return;  // already covered by a newer snapshot
+        } else if (data.seq !== leaderboardSeq + 1) {
+            // Missed a delta: entries that did not change since would stay stale
+            socketio.emit('leaderboard_resync');
+            return;
         }
+        leaderboardSeq = data.seq;
+        (data.removed || []).forEach(userId => leaderboardEntries.delete(userId));
+        data.changes.forEach(entry => leaderboardEntries.set(entry.user_id, entry));
+        renderLeaderboard();
     });
 
     // Room deletion
@@ -346,6 +337,8 @@ function endGameCleanup() {
 }
 
 const messages = document.getElementById("messages");
+const leaderboardEntries = new Map();  // user_id -> {user_id, username, score, rank}
+let leaderboardSeq = 0;
 const startGameButton = document.getElementById('startgameBtn');
 const gamemodediv = document.querySelector('.gamemode');
 const btn_prev = document.getElementById('btn_prev');
@@ -900,6 +893,30 @@ function openGameModeOverlay() {
     }
 }
 
+function renderLeaderboard() {
+    const list = document.getElementById('leaderboard-list');
+    const entries = Array.from(leaderboardEntries.values())
+        .sort((a, b) => a.rank - b.rank || a.username.localeCompare(b.username));
+
+    list.innerHTML = '';
+    entries.forEach(entry => {
+        const row = document.createElement('div');
+        row.className = 'leaderboard-row';
+
+        const usernameSpan = document.createElement('span');
+        usernameSpan.className = 'username';
+        usernameSpan.textContent = entry.username;
+
+        const scoreSpan = document.createElement('span');
+        scoreSpan.className = 'score';
+        scoreSpan.textContent = entry.score;
+
+        row.appendChild(usernameSpan);
+        row.appendChild(scoreSpan);
+        list.appendChild(row);
+    });
+}
+
 function closeLeaderboard() {
     document.getElementById('leaderboard').style.display = 'none';
     const list = document.getElementById('leaderboard-list');
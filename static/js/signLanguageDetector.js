@@ -171,6 +171,13 @@ class SignLanguageDetector {
             }
         });
 
+        // An admin edited the word list; refresh it if this game uses it
+        this.socketio.on('words_updated', () => {
+            if (this.words) {
+                this.loadWords(true);
+            }
+        });
+
         this.socketio.on('error', (data) => {
             console.error('Server error:', data.message);
             if (this.elements.statusDiv) {
@@ -337,9 +344,12 @@ class SignLanguageDetector {
         }
     }
 
-    async loadWords() { // for fill in blanks
+    async loadWords(revalidate = false) { // for fill in blanks
         try {
-            const response = await fetch('/static/models/words.json');
+            // Cacheable copy of the admin-managed list; after a words_updated
+            // notice the browser revalidates it by ETag instead of reusing it
+            const response = await fetch('/api/words', { cache: revalidate ? 'no-cache' : 'default' });
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
             const data = await response.json();
             this.words = data; // Store the whole object
             console.log(`Loaded ${this.words.words.length} words for Fill in the Blanks`);
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, session, redirect, url_for, current_app
+from flask import Blueprint, render_template, session, redirect, url_for
 import cv2
 import mediapipe as mp
 import pickle
@@ -6,6 +6,8 @@ import numpy as np
 from collections import deque
 import os
 
+from user_store import get_user_by_id
+
 translator_bp = Blueprint('translator', __name__, url_prefix='/main')
 
 class WebSignLanguageDetector:
@@ -93,6 +95,76 @@ class WebSignLanguageDetector:
 
         return np.concatenate([raw_features, additional_features])
 
+    def extract_batch_features(self, hands):
+        """Vectorized extract_features_from_hand for (N, 21, 3) landmark arrays -> (N, 80)"""
+        coords = np.asarray(hands, dtype=np.float64)
+        coords = coords - coords[:, :1]
+        scale = np.linalg.norm(coords[:, 9] - coords[:, 0], axis=-1)
+        coords = coords / np.where(scale > 0, scale, 1)[:, None, None]
+        
+        finger_tips = [4, 8, 12, 16, 20]
+        tips = coords[:, finger_tips]
+        wrist_distances = np.linalg.norm(tips - coords[:, :1], axis=-1)
+        first, second = np.triu_indices(len(finger_tips), k=1)
+        tip_distances = np.linalg.norm(tips[:, first] - tips[:, second], axis=-1)
+        hand_width = coords[:, :, 0].max(axis=1) - coords[:, :, 0].min(axis=1)
+        hand_height = coords[:, :, 1].max(axis=1) - coords[:, :, 1].min(axis=1)
+        
+        return np.concatenate([
+            coords.reshape(len(coords), -1), wrist_distances, tip_distances,
+            hand_width[:, None], hand_height[:, None]
+        ], axis=1)
+    
+    def validate_batch(self, hands):
+        """Vectorized validate_hand_detection for (N, 21, 3) landmark arrays -> (N,) bool"""
+        coords = np.asarray(hands, dtype=np.float64)
+        hand_span = coords.max(axis=1) - coords.min(axis=1)
+        span_ok = np.all((hand_span[:, :2] >= 0.05) & (hand_span[:, :2] <= 0.8), axis=1)
+        distances = np.linalg.norm(np.diff(coords, axis=1), axis=-1)
+        return span_ok & (distances.mean(axis=1) >= 0.01)
+    
+    def predict_batch(self, landmarks):
+        """
+        Score many frames at once: (N, 2, 21, 3) or single-hand (N, 21, 3)
+        landmarks, missing hands as zeros. Hands are validated and combined as
+        in process_frame, then scored with one predict_proba call. Frames are
+        independent, so the live smoothing window is not applied.
+        """
+        landmarks = np.asarray(landmarks, dtype=np.float64)
+        if landmarks.ndim == 3:
+            landmarks = landmarks[:, None]
+        num_frames, num_hands = landmarks.shape[:2]
+        
+        if not self.model_loaded:
+            return [{'prediction': 'Model not available', 'confidence': 0.0} for _ in range(num_frames)]
+        
+        flat = landmarks.reshape(-1, 21, 3)
+        valid = (np.any(flat != 0, axis=(1, 2)) & self.validate_batch(flat)).reshape(num_frames, num_hands)
+        
+        # process_frame skips invalid hands: valid ones move to the front, and
+        # a single hand is paired with zeros
+        order = np.argsort(~valid, axis=1, kind='stable')[:, :2]
+        hand_features = self.extract_batch_features(
+            np.take_along_axis(landmarks, order[:, :, None, None], axis=1).reshape(-1, 21, 3)
+        ).reshape(num_frames, -1, 80)
+        hand_count = valid.sum(axis=1)
+        features = np.zeros((num_frames, 2, 80))
+        features[:, :hand_features.shape[1]] = hand_features
+        features[hand_count < 2, 1] = 0
+        
+        results = [{'prediction': 'No gesture', 'confidence': 0.0} for _ in range(num_frames)]
+        rows = np.flatnonzero(hand_count > 0)
+        if rows.size:
+            probs = self.model.predict_proba(self.scaler.transform(features[rows].reshape(len(rows), -1)))
+            top = probs.argmax(axis=1)
+            labels = self.label_encoder.inverse_transform(top)
+            for row, label, confidence in zip(rows, labels, probs[np.arange(len(rows)), top]):
+                results[row] = {
+                    'prediction': self.custom_class_names.get(label, label),
+                    'confidence': float(confidence)
+                }
+        return results
+    
     def validate_hand_detection(self, landmarks):
         coords = np.array([(lm.x, lm.y, lm.z) for lm in landmarks])
         hand_span = np.max(coords, axis=0) - np.min(coords, axis=0)
@@ -111,7 +183,10 @@ class WebSignLanguageDetector:
     def process_frame(self, frame):
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         results = self.hands.process(rgb_frame)
-        
+        return self.process_results(results)
+    
+    def process_results(self, results):
+        """Letter prediction from MediaPipe Hands results (live frames and video transcription)"""
         prediction = "No gesture"
         confidence = 0.0
         landmarks_data = []
@@ -211,16 +286,6 @@ class WebSignLanguageDetector:
 # Initialize detector
 detector = WebSignLanguageDetector()
 
-def get_user_by_id(user_id):
-    """Get user by ID from Supabase"""
-    supabase = current_app.config['SUPABASE']
-    try:
-        result = supabase.table('users').select('*').eq('id', user_id).execute()
-        return result.data[0] if result.data else None
-    except Exception as e:
-        print(f"Error getting user by ID: {e}")
-        return None
-
 # Routes
 @translator_bp.route('/')
 def main():
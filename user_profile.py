@@ -2,121 +2,70 @@ from flask import Blueprint, render_template, session, redirect, url_for, curren
 from datetime import datetime
 from dateutil import parser
 
+import user_store
+from concurrency import run_parallel
+from user_stats import empty_stats, get_user_stats
+
 profile_bp = Blueprint('profile', __name__, url_prefix='/profile')
 
 
 def get_user_by_id(user_id):
-    """Get user by ID from Supabase"""
-    supabase = current_app.config['SUPABASE']
-    try:
-        result = supabase.table('users').select('*').eq('id', user_id).execute()
-        user = result.data[0]
+    """Get user by ID with a display-formatted created_at"""
+    user = user_store.get_user_by_id(user_id)
+    if user:
         user["created_at"] = format_created_at(user["created_at"])
-        return user
-    except Exception as e:
-        print(f"Error getting user by ID: {e}")
-        return None
+    return user
 
 def get_user_by_username(username):
-    """Get user by username from Supabase"""
-    supabase = current_app.config['SUPABASE']
-    try:
-        result = supabase.table('users').select('*').eq('username', username).execute()
-        if result.data:
-            user = result.data[0]
-            user["created_at"] = format_created_at(user["created_at"])
-            print("User data from Supabase:", user)
-            return user
-        return None
-    except Exception as e:
-        print(f"Error getting user by username: {e}")
-        return None
+    """Get user by username with a display-formatted created_at"""
+    user = user_store.get_user_by_username(username)
+    if user:
+        user["created_at"] = format_created_at(user["created_at"])
+    return user
 
 @profile_bp.route('/<username>')
 def profile(username):
-    supabase = current_app.config['SUPABASE']
-    
     # Check if user is logged in
     session_user_id = session.get('user_id')
     if not session_user_id:
         return redirect(url_for('auth.index'))
     
-    # Get the LOGGED-IN user's data (for navbar)
-    logged_in_user = get_user_by_id(session_user_id)
+    def load_requested_user():
+        # The requested user's profile (for main content) and their stats;
+        # one cached read, as the stats record is kept up to date as results are written
+        user = get_user_by_username(username)
+        if not user:
+            return None, None
+        return user, get_user_stats(user['id']) or empty_stats()
+
+    # The LOGGED-IN user's data (for navbar) loads alongside the profile
+    fetched = run_parallel({
+        'logged_in_user': lambda: get_user_by_id(session_user_id),
+        'requested_user': load_requested_user
+    })
+
+    logged_in_user = fetched.get('logged_in_user')
     if not logged_in_user:
         return redirect(url_for('auth.index'))
 
-    # Get the requested user's profile (for main content)
-    requested_user = get_user_by_username(username)
+    requested_user, stats = fetched.get('requested_user', (None, None))
     if not requested_user:
         return "User not found", 404
 
-    user_id = requested_user['id']
+    # ✅ KEEP BOTH: raw timestamp for sorting, formatted for display
+    all_sessions = []
+    for game in stats["recent"][:10]:
+        game["created_at_raw"] = game["created_at"]
+        game["created_at"] = format_created_at(game["created_at"])
+        all_sessions.append(game)
 
-    # Get game sessions
-    user_game_sessions = supabase.table("game_sessions") \
-        .select("*") \
-        .eq("user_id", user_id) \
-        .order("created_at", desc=True) \
-        .limit(10) \
-        .execute().data
-    
-    # Get rooms created by the user
-    created_rooms = supabase.table("rooms") \
-        .select("*") \
-        .eq("creator_id", user_id) \
-        .order("created_at", desc=True) \
-        .limit(10) \
-        .execute().data
-
-    # Combine room IDs
-    session_room_ids = [s["room_id"] for s in user_game_sessions]
-    created_room_ids = [r["id"] for r in created_rooms]
-    all_room_ids = list(set(session_room_ids + created_room_ids))
-
-    # Get all room data
-    user_rooms_history = []
-    if all_room_ids:
-        user_rooms_history = supabase.table("rooms").select("*").in_("id", all_room_ids).execute().data
-        
-    rooms_by_id = {r["id"]: r for r in user_rooms_history}
-
-    # Process game sessions
-    for s in user_game_sessions:
-        s["room"] = rooms_by_id.get(s["room_id"])
-        # ✅ KEEP BOTH: raw timestamp for sorting, formatted for display
-        s["created_at_raw"] = s["created_at"]  # Keep original timestamp
-        s["created_at"] = format_created_at(s["created_at"])  # Format for display
-        s["is_creator"] = False
-        s["learning_material"] = s["room"]["learning_material"] if s["room"] else None
-
-    # Create sessions for created rooms
-    created_room_sessions = []
-    for room in created_rooms:
-        if room["id"] not in session_room_ids:
-            created_room_sessions.append({
-                "room_id": room["id"],
-                "room": room,
-                "score": None,
-                "created_at_raw": room["created_at"],  # Keep original
-                "created_at": format_created_at(room["created_at"]),  # Format for display
-                "is_creator": True,
-                "learning_material": room.get("learning_material")
-            })
-
-    # Combine and sort by RAW timestamp
-    all_sessions = user_game_sessions + created_room_sessions
-    all_sessions.sort(key=lambda x: x["created_at_raw"], reverse=True)
-    
-    all_sessions = all_sessions[:10]
+    user_rooms_history = [game["room"] for game in all_sessions if game["room"]]
 
-    # Calculate stats
-    scores = [s["score"] for s in user_game_sessions if "score" in s and s["score"] is not None]
-    avg_score = round(sum(scores) / len(scores), 2) if scores else 0
-    best_score = max(scores) if scores else 0
+    avg_score = round(stats["score_total"] / stats["score_count"], 2) if stats["score_count"] else 0
+    best_score = stats["best_score"] if stats["best_score"] is not None else 0
     
-    total_games_participated = len(user_game_sessions)
-    total_games_created = len(created_room_sessions)
+    total_games_participated = stats["games_participated"]
+    total_games_created = stats["games_created"]
     total_games = total_games_participated + total_games_created
 
     return render_template(
@@ -129,7 +78,8 @@ def profile(username):
         best_score=best_score,
         games_played=total_games,
         games_participated=total_games_participated,
-        games_created=total_games_created
+        games_created=total_games_created,
+        material_counts=stats["materials"]
     )
 
 @profile_bp.route('/room/<int:room_id>')
@@ -139,27 +89,30 @@ def room_details(room_id):
     if not user_id:
         return redirect(url_for('auth.index'))
     
-    user_data = get_user_by_id(user_id)
+    # The logged-in user, the room info and its participants (game sessions
+    # that joined this room) are independent, so they load together
+    fetched = run_parallel({
+        'user': lambda: get_user_by_id(user_id),
+        'room': lambda: supabase.table("rooms").select("*").eq("id", room_id).execute().data,
+        'game_sessions': lambda: supabase.table("game_sessions").select("*").eq("room_id", room_id).execute().data
+    })
+
+    user_data = fetched.get('user')
     if not user_data:
         return redirect(url_for('auth.index'))
 
-    # Get the room info
-    room_result = supabase.table("rooms").select("*").eq("id", room_id).execute()
-    if not room_result.data:
+    if fetched.errors:
+        return "Error loading room", 500
+    if not fetched.get('room'):
         return "Room not found", 404
-    room = room_result.data[0]
-
-    # Get the creator's user info
-    creator_result = supabase.table("users").select("username").eq("id", room["creator_id"]).execute()
-    creator_username = creator_result.data[0]["username"] if creator_result.data else "Unknown"
-
-    # Get participants (game sessions that joined this room)
-    game_sessions = supabase.table("game_sessions").select("*").eq("room_id", room_id).execute().data
+    room = fetched.get('room')[0]
+    game_sessions = fetched.get('game_sessions') or []
 
-    # Replace user_id with actual usernames for participants
-    user_ids = list({s["user_id"] for s in game_sessions})
+    # Usernames for the creator and the participants in one query
+    user_ids = list({s["user_id"] for s in game_sessions} | {room["creator_id"]})
     users = supabase.table("users").select("id, username").in_("id", user_ids).execute().data
     users_by_id = {u["id"]: u["username"] for u in users}
+    creator_username = users_by_id.get(room["creator_id"], "Unknown")
 
     for s in game_sessions:
         s["username"] = users_by_id.get(s["user_id"], "Unknown")
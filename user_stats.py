@@ -0,0 +1,335 @@
+from flask import current_app
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from write_queue import write_queue
+
+# Entries kept in a user's recent history; the profile shows 10, the rest
+# backfill the list when a creator entry turns into a played game
+RECENT_GAMES = 20
+USER_STATS_TTL = float(os.getenv('USER_STATS_TTL', '300'))
+USER_STATS_CACHE_SIZE = 1024
+
+# Room fields copied into history entries
+ROOM_FIELDS = ('id', 'room_code', 'game_type', 'learning_material', 'duration',
+               'total_participants', 'creator_id', 'created_at')
+
+# Per-user statistics, kept in the user_stats table:
+#
+#     create table user_stats (
+#         user_id    <type of users.id> primary key references users(id) on delete cascade,
+#         stats      jsonb not null,
+#         updated_at timestamptz not null default now()
+#     );
+#
+# `stats` holds games_participated, games_created (rooms the user created
+# but did not play in), score_count, score_total, best_score, materials
+# (games per learning material) and recent (the latest RECENT_GAMES games,
+# newest first). Rows are updated as the write queue inserts rooms and
+# game_sessions, rebuilt from the full history when missing, and rebuilt
+# again when an admin deletes a room or game session.
+#
+# Updates to one user's row are serialized by that user's lock, which is
+# held across the Supabase calls; _lock only guards the in-process caches
+# and is never held during I/O.
+
+_cache = OrderedDict()  # user_id -> (expires_at, stats)
+_rooms = OrderedDict()  # room_id -> room row, for sessions written after their room
+_lock = threading.Lock()
+_user_locks = {}  # user_id -> [lock, holders and waiters]
+
+
+@contextmanager
+def _user_lock(user_id):
+    """Serialize stats updates for one user; other users are not blocked"""
+    with _lock:
+        entry = _user_locks.setdefault(user_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _user_locks[user_id]
+
+
+def empty_stats() -> Dict:
+    return {
+        'games_participated': 0,
+        'games_created': 0,
+        'score_count': 0,
+        'score_total': 0,
+        'best_score': None,
+        'materials': {},
+        'recent': []
+    }
+
+
+def _room_summary(room: Optional[Dict]) -> Optional[Dict]:
+    return {field: room.get(field) for field in ROOM_FIELDS} if room else None
+
+
+def _remember_room(room: Dict):
+    with _lock:
+        _rooms[room['id']] = _room_summary(room)
+        _rooms.move_to_end(room['id'])
+        while len(_rooms) > USER_STATS_CACHE_SIZE:
+            _rooms.popitem(last=False)
+
+
+def _add_created_room(stats: Dict, room: Dict):
+    # A row rebuilt from history may already count what the write queue
+    # reports afterwards; new rooms and sessions are the newest, so they
+    # are in `recent` if counted
+    if any(entry['room_id'] == room['id'] for entry in stats['recent']):
+        return
+    stats['games_created'] += 1
+    material = room.get('learning_material') or 'unknown'
+    stats['materials'][material] = stats['materials'].get(material, 0) + 1
+    stats['recent'].append({
+        'room_id': room['id'],
+        'room': _room_summary(room),
+        'score': None,
+        'created_at': room['created_at'],
+        'is_creator': True,
+        'learning_material': room.get('learning_material')
+    })
+
+
+def _add_session(stats: Dict, game_session: Dict, room: Optional[Dict]):
+    if game_session.get('id') is not None and any(
+            not entry['is_creator'] and entry.get('id') == game_session['id'] for entry in stats['recent']):
+        return
+    # A creator who also played counts as a participant of their room, as
+    # the profile always listed it
+    if room and room.get('creator_id') == game_session['user_id']:
+        stats['games_created'] = max(0, stats['games_created'] - 1)
+        stats['recent'] = [entry for entry in stats['recent']
+                           if not (entry['is_creator'] and entry['room_id'] == room['id'])]
+    else:
+        material = (room or {}).get('learning_material') or 'unknown'
+        stats['materials'][material] = stats['materials'].get(material, 0) + 1
+
+    stats['games_participated'] += 1
+    score = game_session.get('score')
+    if score is not None:
+        stats['score_count'] += 1
+        stats['score_total'] += score
+        stats['best_score'] = score if stats['best_score'] is None else max(stats['best_score'], score)
+
+    stats['recent'].append({
+        'id': game_session.get('id'),
+        'room_id': game_session['room_id'],
+        'room': _room_summary(room),
+        'score': score,
+        'created_at': game_session['created_at'],
+        'is_creator': False,
+        'learning_material': (room or {}).get('learning_material')
+    })
+
+
+def _trim_recent(stats: Dict):
+    stats['recent'].sort(key=lambda entry: entry['created_at'], reverse=True)
+    del stats['recent'][RECENT_GAMES:]
+
+
+def _fetch_all(query_factory, page_size: int = 1000) -> List[Dict]:
+    rows = []
+    while True:
+        page = query_factory().range(len(rows), len(rows) + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+
+def rebuild_user_stats(supabase, user_id) -> Dict:
+    """Compute a user's stats from their full game history"""
+    sessions = _fetch_all(lambda: supabase.table('game_sessions').select('id, user_id, room_id, score, created_at')
+                          .eq('user_id', user_id).order('created_at').order('id'))
+    created_rooms = _fetch_all(lambda: supabase.table('rooms').select('*')
+                               .eq('creator_id', user_id).order('created_at').order('id'))
+
+    rooms = {room['id']: room for room in created_rooms}
+    missing = sorted({s['room_id'] for s in sessions if s['room_id'] is not None} - set(rooms))
+    for start in range(0, len(missing), 200):
+        for room in supabase.table('rooms').select('*').in_('id', missing[start:start + 200]).execute().data or []:
+            rooms[room['id']] = room
+
+    stats = empty_stats()
+    for room in created_rooms:
+        _add_created_room(stats, room)
+    for game_session in sessions:
+        _add_session(stats, game_session, rooms.get(game_session['room_id']))
+    _trim_recent(stats)
+    return stats
+
+
+def _cached(user_id) -> Optional[Dict]:
+    with _lock:
+        entry = _cache.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            _cache.move_to_end(user_id)
+            return entry[1]
+        return None
+
+
+def _load(supabase, user_id) -> Optional[Dict]:
+    """Cached or stored stats for a user, or None if there is no row yet"""
+    stats = _cached(user_id)
+    if stats is not None:
+        return stats
+
+    result = supabase.table('user_stats').select('stats').eq('user_id', user_id).execute()
+    if not result.data:
+        return None
+    _put(user_id, result.data[0]['stats'])
+    return result.data[0]['stats']
+
+
+def _put(user_id, stats: Dict):
+    with _lock:
+        _cache[user_id] = (time.monotonic() + USER_STATS_TTL, stats)
+        _cache.move_to_end(user_id)
+        while len(_cache) > USER_STATS_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _save(supabase, user_id, stats: Dict):
+    _put(user_id, stats)
+    try:
+        supabase.table('user_stats').upsert({
+            'user_id': user_id,
+            'stats': stats,
+            'updated_at': datetime.utcnow().isoformat()
+        }).execute()
+    except Exception as e:
+        # The cached copy still serves this process; the row is rebuilt later
+        print(f"Error saving user stats for {user_id}: {e}")
+
+
+def get_user_stats(user_id, supabase=None) -> Optional[Dict]:
+    """A user's stats, from the cache, the user_stats table, or rebuilt from history"""
+    supabase = supabase or current_app.config['SUPABASE']
+    try:
+        stats = _cached(user_id)
+        if stats is not None:
+            return copy.deepcopy(stats)
+
+        with _user_lock(user_id):
+            try:
+                stats = _load(supabase, user_id)
+            except Exception as e:
+                print(f"Error loading user stats for {user_id}: {e}")
+                stats = None
+            if stats is None:
+                stats = rebuild_user_stats(supabase, user_id)
+                _save(supabase, user_id, stats)
+            return copy.deepcopy(stats)
+    except Exception as e:
+        print(f"Error getting user stats: {e}")
+        return None
+
+
+def _update(supabase, user_id, apply):
+    """Apply an increment to a user's stored stats (a missing row is rebuilt instead)"""
+    with _user_lock(user_id):
+        try:
+            stats = _load(supabase, user_id)
+        except Exception as e:
+            print(f"Error loading user stats for {user_id}: {e}")
+            stats = None
+
+        if stats is None:
+            # The history already contains the rows just written
+            stats = rebuild_user_stats(supabase, user_id)
+        else:
+            stats = copy.deepcopy(stats)
+            apply(stats)
+            _trim_recent(stats)
+        _save(supabase, user_id, stats)
+
+
+def on_rooms_written(supabase, rooms: List[Dict]):
+    for room in rooms:
+        _remember_room(room)
+        if room.get('creator_id') is not None:
+            _update(supabase, room['creator_id'], lambda stats, room=room: _add_created_room(stats, room))
+
+
+def on_game_sessions_written(supabase, game_sessions: List[Dict]):
+    for game_session in game_sessions:
+        with _lock:
+            room = _rooms.get(game_session['room_id'])
+        if room is None and game_session['room_id'] is not None:
+            result = supabase.table('rooms').select('*').eq('id', game_session['room_id']).execute()
+            room = result.data[0] if result.data else None
+            if room:
+                _remember_room(room)
+        _update(supabase, game_session['user_id'],
+                lambda stats, game_session=game_session, room=room: _add_session(stats, game_session, room))
+
+
+def invalidate_user_stats(user_ids, supabase=None, room_id=None):
+    """
+    Rebuild users' stored stats from their history after rows were deleted
+
+    Increments only ever add, so deleting a room or game session leaves the
+    affected users' rows counting it until they are rebuilt here.
+    """
+    supabase = supabase or current_app.config['SUPABASE']
+    if room_id is not None:
+        with _lock:
+            _rooms.pop(room_id, None)
+
+    for user_id in {user_id for user_id in user_ids if user_id is not None}:
+        try:
+            with _user_lock(user_id):
+                with _lock:
+                    _cache.pop(user_id, None)
+                _save(supabase, user_id, rebuild_user_stats(supabase, user_id))
+        except Exception as e:
+            # Dropping the row makes the next profile view rebuild it instead
+            print(f"Error rebuilding user stats for {user_id}: {e}")
+            try:
+                supabase.table('user_stats').delete().eq('user_id', user_id).execute()
+            except Exception as e:
+                print(f"Error dropping user stats for {user_id}: {e}")
+
+
+write_queue.add_listener('rooms', on_rooms_written)
+write_queue.add_listener('game_sessions', on_game_sessions_written)
+
+
+# CLI: backfill every user's row from their history
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description='Rebuild the user_stats table from game history')
+    parser.add_argument('--user-id', help='Only rebuild this user')
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY'))
+
+    user_ids = [args.user_id] if args.user_id else [
+        user['id'] for user in _fetch_all(lambda: client.table('users').select('id').order('id'))
+    ]
+    for index, user_id in enumerate(user_ids, 1):
+        stats = rebuild_user_stats(client, user_id)
+        _save(client, user_id, stats)
+        print(f"[{index}/{len(user_ids)}] {user_id}: {stats['games_participated']} played, "
+              f"{stats['games_created']} created")
+
+# Usage instructions:
+# python user_stats.py              (backfill all users)
+# python user_stats.py --user-id 42
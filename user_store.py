@@ -0,0 +1,161 @@
+from flask import current_app
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Seconds a cached user row is served before it is fetched again, and the
+# number of rows kept. Writes through admin.py invalidate immediately; the
+# TTL bounds staleness for changes made outside this process.
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '60'))
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '2048'))
+
+
+class UserCache:
+    """TTL + LRU cache of user rows by id, with a username -> id index"""
+
+    def __init__(self, ttl: float = USER_CACHE_TTL, max_size: int = USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._users = OrderedDict()  # id -> (expires_at, row)
+        self._ids_by_username = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id=None, username: Optional[str] = None) -> Optional[Dict]:
+        """A copy of the cached row for user_id or username, or None if absent/expired"""
+        with self._lock:
+            if user_id is None:
+                user_id = self._ids_by_username.get(username)
+            entry = self._users.get(str(user_id)) if user_id is not None else None
+
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(str(user_id))
+                self.misses += 1
+                return None
+
+            self._users.move_to_end(str(user_id))
+            self.hits += 1
+            # Callers annotate and reformat the rows they get back
+            return copy.deepcopy(entry[1])
+
+    def put(self, user: Dict):
+        with self._lock:
+            key = str(user['id'])
+            self._remove(key)
+            self._users[key] = (time.monotonic() + self.ttl, copy.deepcopy(user))
+            if user.get('username') is not None:
+                self._ids_by_username[user['username']] = key
+            while len(self._users) > self.max_size:
+                self._remove(next(iter(self._users)))
+
+    def invalidate(self, user_id=None, username: Optional[str] = None):
+        with self._lock:
+            if user_id is None:
+                user_id = self._ids_by_username.get(username)
+            if user_id is not None:
+                self._remove(str(user_id))
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+            self._ids_by_username.clear()
+
+    def _remove(self, key: str):
+        entry = self._users.pop(key, None)
+        if entry is not None:
+            username = entry[1].get('username')
+            if self._ids_by_username.get(username) == key:
+                del self._ids_by_username[username]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._users),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'invalidations': self.invalidations
+            }
+
+
+user_cache = UserCache()
+
+
+def get_user_by_id(user_id, supabase=None) -> Optional[Dict]:
+    """Get user by ID, from the cache or Supabase"""
+    user = user_cache.get(user_id=user_id)
+    if user is not None:
+        return user
+
+    supabase = supabase or current_app.config['SUPABASE']
+    try:
+        result = supabase.table('users').select('*').eq('id', user_id).execute()
+    except Exception as e:
+        print(f"Error getting user by ID: {e}")
+        return None
+
+    if not result.data:
+        return None
+    user_cache.put(result.data[0])
+    return copy.deepcopy(result.data[0])
+
+
+def get_user_by_username(username: str, supabase=None) -> Optional[Dict]:
+    """Get user by exact username, from the cache or Supabase"""
+    user = user_cache.get(username=username)
+    if user is not None:
+        return user
+
+    supabase = supabase or current_app.config['SUPABASE']
+    try:
+        result = supabase.table('users').select('*').eq('username', username).execute()
+    except Exception as e:
+        print(f"Error getting user by username: {e}")
+        return None
+
+    if not result.data:
+        return None
+    user_cache.put(result.data[0])
+    return copy.deepcopy(result.data[0])
+
+
+def get_users_by_usernames(usernames: List[str], supabase=None) -> Dict[str, Dict]:
+    """username -> user for every username that exists, with one query for all cache misses"""
+    users = {}
+    missing = []
+    for username in dict.fromkeys(usernames):
+        user = user_cache.get(username=username)
+        if user is not None:
+            users[username] = user
+        else:
+            missing.append(username)
+
+    if not missing:
+        return users
+
+    supabase = supabase or current_app.config['SUPABASE']
+    try:
+        result = supabase.table('users').select('*').in_('username', missing).execute()
+    except Exception as e:
+        print(f"Error getting users by username: {e}")
+        return users
+
+    for user in result.data or []:
+        user_cache.put(user)
+        users[user['username']] = copy.deepcopy(user)
+    return users
+
+
+def invalidate_user(user_id=None, username: Optional[str] = None):
+    """Drop a user's cached row after it was changed or deleted"""
+    user_cache.invalidate(user_id=user_id, username=username)
@@ -0,0 +1,438 @@
+from flask import Blueprint, request, session, jsonify
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from fsl_frame_adapter import FrameBuffer, pack_hand_landmarks
+from user_store import get_user_by_id
+
+transcribe_bp = Blueprint('transcribe', __name__, url_prefix='/api/transcribe')
+
+LETTER_MODEL_PATH = './model_alphabet_compare.p'
+WORD_MODEL_DIR = 'fsl_movement_model'
+
+# Labels WebSignLanguageDetector reports when it has no letter
+NO_LETTER = ('No gesture', 'Hand detected', 'Model not available', 'Error')
+
+# Same no-hands reset as process_fsl_frame (5 frames at ~3 FPS)
+NO_HANDS_RESET_SECONDS = 5 / 3.0
+
+# Per-process state, created once per pool worker by _init_worker
+_worker = {}
+
+
+def _init_worker(mode: str, letter_model_path: str, word_model_dir: str):
+    """Load the models and one persistent MediaPipe tracker in a pool worker"""
+    if mode in ('letters', 'both'):
+        import translator
+        letters = translator.detector
+        if os.path.abspath(letters.model_path) != os.path.abspath(letter_model_path):
+            letters = translator.WebSignLanguageDetector(model_path=letter_model_path)
+        _worker['letters'] = letters
+        _worker['hands'] = letters.hands
+    else:
+        import mediapipe as mp
+        _worker['hands'] = mp.solutions.hands.Hands(
+            static_image_mode=False,
+            max_num_hands=2,
+            min_detection_confidence=0.7,
+            min_tracking_confidence=0.5
+        )
+
+    if mode in ('words', 'both'):
+        from simple_fsl_trainer import SimpleFSLPredictor
+        _worker['words'] = SimpleFSLPredictor(word_model_dir)
+
+
+def _transcribe_chunk(video_path: str, start_frame: int, own_start_frame: int, end_frame: int,
+                      step: int, word_stride: int) -> Dict:
+    """
+    Decode frames [start_frame, end_frame) and return raw letter/word events
+
+    Frames before own_start_frame only warm up the tracker, the letter
+    smoothing and the word buffer; their events belong to the previous chunk.
+    """
+    import cv2
+
+    capture = cv2.VideoCapture(video_path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    capture.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    hands = _worker['hands']
+    letters_detector = _worker.get('letters')
+    predictor = _worker.get('words')
+    if letters_detector:
+        letters_detector.prediction_window.clear()
+        letters_detector.confidence_window.clear()
+
+    buffer = None
+    if predictor:
+        history_seconds = predictor.multiscale_windows[-1] / predictor.capture_fps
+        buffer = FrameBuffer(capacity=math.ceil(history_seconds * fps / step) + 1)
+
+    letters, words = [], []
+    decoded = processed = 0
+    last_hands_time = None
+
+    for frame_index in range(start_frame, end_frame):
+        # Only every step-th frame (on a grid shared by all chunks) is decoded in full
+        if frame_index % step:
+            if not capture.grab():
+                break
+            decoded += 1
+            continue
+
+        ok, frame = capture.read()
+        if not ok:
+            break
+        decoded += 1
+        processed += 1
+        timestamp = frame_index / fps
+        owned = frame_index >= own_start_frame
+
+        results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+        if letters_detector:
+            result = letters_detector.process_results(results)
+            if owned:
+                letters.append((timestamp, result['prediction'], result['confidence']))
+
+        if predictor:
+            if results.multi_hand_landmarks:
+                buffer.append(pack_hand_landmarks(results.multi_hand_landmarks, timestamp))
+                last_hands_time = timestamp
+            elif last_hands_time is not None and timestamp - last_hands_time >= NO_HANDS_RESET_SECONDS:
+                buffer.clear()
+                last_hands_time = None
+
+            if owned and processed % word_stride == 0 and len(buffer) >= predictor.multiscale_windows[0]:
+                result = predictor.predict_multiscale(buffer.sequence())
+                if 'window' in result:
+                    span = result['window'] / predictor.capture_fps
+                    words.append((timestamp, result['prediction'], result['confidence'] / 100.0, span))
+
+    capture.release()
+    return {'letters': letters, 'words': words, 'decoded': decoded, 'processed': processed}
+
+
+def _stitch(events: List[tuple], kind: str, min_confidence: float, max_gap: float,
+            min_events: int = 1) -> List[Dict]:
+    """Merge consecutive events with the same label into timed segments
+
+    Events are (timestamp, label, confidence) or, for words, (timestamp,
+    label, confidence, span). No-letter labels and events under
+    min_confidence are dropped; a gap longer than max_gap starts a new
+    segment. Check with: python -m doctest video_transcriber.py
+
+    >>> letters = [(0.0, 'A', 0.9), (0.3, 'A', 0.7), (0.6, 'No gesture', 0.0),
+    ...            (0.9, 'A', 0.8), (2.0, 'A', 0.9), (2.3, 'B', 0.4)]
+    >>> for s in _stitch(letters, 'letter', min_confidence=0.5, max_gap=0.5):
+    ...     print(s['label'], s['start'], s['end'], s['confidence'])
+    A 0.0 0.3 0.8
+    A 0.9 0.9 0.8
+    A 2.0 2.0 0.9
+    >>> [s['start'] for s in _stitch(letters, 'letter', 0.5, 0.5, min_events=2)]
+    [0.0]
+
+    A word starts where its window does, but never before the previous segment ends:
+
+    >>> words = [(3.0, 'hello', 0.8, 2.0), (3.5, 'hello', 0.9, 2.0), (4.0, 'thanks', 0.7, 2.0)]
+    >>> for s in _stitch(words, 'word', min_confidence=0.5, max_gap=1.0):
+    ...     print(s['type'], s['label'], s['start'], s['end'], s['confidence'])
+    word hello 1.0 3.5 0.85
+    word thanks 3.5 4.0 0.7
+    """
+    segments = []
+    current = None
+
+    for event in events:
+        timestamp, label, confidence = event[:3]
+        if label in NO_LETTER or confidence < min_confidence:
+            continue
+
+        if current and current['label'] == label and timestamp - current['end'] <= max_gap:
+            current['end'] = timestamp
+            current['confidences'].append(confidence)
+            continue
+
+        # Word events cover the window that produced them
+        start = timestamp - event[3] if len(event) > 3 else timestamp
+        if current and start < current['end']:
+            start = current['end']
+        current = {'type': kind, 'label': label, 'start': start, 'end': timestamp, 'confidences': [confidence]}
+        segments.append(current)
+
+    return [
+        {
+            'type': segment['type'],
+            'label': segment['label'],
+            'start': round(segment['start'], 3),
+            'end': round(segment['end'], 3),
+            'confidence': round(float(sum(segment['confidences']) / len(segment['confidences'])), 4)
+        }
+        for segment in segments if len(segment['confidences']) >= min_events
+    ]
+
+
+def transcribe_video(video_path: str, mode: str = 'both', workers: Optional[int] = None,
+                     chunk_seconds: float = 30.0, overlap_seconds: Optional[float] = None,
+                     sample_fps: float = 10.0, letter_model_path: str = LETTER_MODEL_PATH,
+                     word_model_dir: str = WORD_MODEL_DIR, min_letter_confidence: float = 0.7,
+                     min_word_confidence: float = 0.5) -> Dict:
+    """
+    Transcribe a signing video into a timeline of letters and/or words
+
+    The video is split into chunks that are decoded and processed in a
+    process pool. Each chunk starts `overlap_seconds` early to warm up the
+    tracker and the word buffer (default: 10 s for words, the longest
+    prediction window at 3 FPS, and 1 s for letters only). Events from the
+    warm-up are discarded, and the chunk results are stitched into one
+    transcript.
+    """
+    import cv2
+
+    if mode not in ('letters', 'words', 'both'):
+        raise ValueError(f"Unknown mode: {mode}")
+
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    capture.release()
+    if total_frames <= 0:
+        raise ValueError(f"Video has no frames: {video_path}")
+
+    if overlap_seconds is None:
+        overlap_seconds = 1.0 if mode == 'letters' else 10.0
+
+    step = max(1, round(fps / sample_fps))
+    word_stride = max(1, round(fps / step))  # one word prediction per second of video
+    chunk_frames = max(step, int(chunk_seconds * fps) // step * step)
+    overlap_frames = int(overlap_seconds * fps) // step * step
+    chunks = [
+        (max(0, start - overlap_frames), start, min(total_frames, start + chunk_frames))
+        for start in range(0, total_frames, chunk_frames)
+    ]
+    workers = workers or min(len(chunks), os.cpu_count() or 1)
+
+    print(f"Transcribing {video_path}: {total_frames} frames at {fps:.1f} FPS, "
+          f"{len(chunks)} chunks on {workers} workers")
+
+    start_time = time.time()
+    # spawn: MediaPipe and the gevent-patched server process do not survive fork
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker,
+                             initargs=(mode, letter_model_path, word_model_dir)) as pool:
+        futures = [
+            pool.submit(_transcribe_chunk, video_path, first, own, end, step, word_stride)
+            for first, own, end in chunks
+        ]
+        results = [future.result() for future in futures]
+    elapsed = time.time() - start_time
+
+    letters = [event for result in results for event in result['letters']]
+    words = [event for result in results for event in result['words']]
+    frame_gap = step / fps
+    segments = (
+        _stitch(letters, 'letter', min_letter_confidence, max_gap=3 * frame_gap, min_events=3) +
+        _stitch(words, 'word', min_word_confidence, max_gap=2 * word_stride * frame_gap)
+    )
+    segments.sort(key=lambda segment: segment['start'])
+
+    decoded = sum(result['decoded'] for result in results)
+    processed = sum(result['processed'] for result in results)
+
+    return {
+        'video': os.path.basename(video_path),
+        'duration': round(total_frames / fps, 3),
+        'mode': mode,
+        'segments': segments,
+        'throughput': {
+            'workers': workers,
+            'chunks': len(chunks),
+            'frames_decoded': decoded,
+            'frames_processed': processed,
+            'elapsed_seconds': round(elapsed, 3),
+            'decoded_fps': round(decoded / elapsed, 1) if elapsed else 0.0,
+            'processed_fps': round(processed / elapsed, 1) if elapsed else 0.0
+        }
+    }
+
+
+# ===== HTTP API =====
+# Transcriptions run as a CLI subprocess (with its own process pool), so the
+# gevent server only polls for the result and keeps serving sockets
+
+# Each job is a subprocess with its own worker pool, so only teachers and
+# admins may start them, a few at a time
+MAX_RUNNING_JOBS = int(os.getenv('TRANSCRIBE_MAX_JOBS', '1'))
+MAX_JOBS_PER_USER = int(os.getenv('TRANSCRIBE_MAX_JOBS_PER_USER', '1'))
+# Uploads are checked against this before the body is read and saved
+TRANSCRIBE_MAX_BYTES = int(os.getenv('TRANSCRIBE_MAX_BYTES', str(500 * 1024 * 1024)))
+TRANSCRIBE_ROLES = ('Admin', 'Teacher')
+TRANSCRIBE_WORKERS = int(os.getenv('TRANSCRIBE_WORKERS', '0'))
+JOB_TTL_SECONDS = 3600
+
+transcription_jobs = {}
+
+
+def _job_status(job: Dict) -> str:
+    """Refresh a job from its subprocess and return its status"""
+    if job['status'] == 'running' and job['process'].poll() is not None:
+        try:
+            if job['process'].returncode == 0:
+                with open(job['output_path'], 'r') as f:
+                    job['result'] = json.load(f)
+                job['status'] = 'done'
+            else:
+                with open(job['log_path'], 'r') as f:
+                    job['error'] = f.read()[-2000:]
+                job['status'] = 'failed'
+        except Exception as e:
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        finally:
+            shutil.rmtree(job['work_dir'], ignore_errors=True)
+    return job['status']
+
+
+def _purge_jobs():
+    """Forget finished jobs older than JOB_TTL_SECONDS"""
+    now = time.time()
+    for job_id, job in list(transcription_jobs.items()):
+        if _job_status(job) != 'running' and now - job['created'] > JOB_TTL_SECONDS:
+            del transcription_jobs[job_id]
+
+
+@transcribe_bp.route('', methods=['POST'])
+def start_transcription():
+    """Upload a video (multipart field 'video') and start transcribing it"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    user = get_user_by_id(user_id)
+    if not user or user.get('role') not in TRANSCRIBE_ROLES:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    # Reading request.files spools the whole body, so the size is checked first
+    if request.content_length is None:
+        return jsonify({'error': 'Content-Length required'}), 411
+    if request.content_length > TRANSCRIBE_MAX_BYTES:
+        return jsonify({'error': f'Video larger than {TRANSCRIBE_MAX_BYTES} bytes'}), 413
+
+    video = request.files.get('video')
+    if not video or not video.filename:
+        return jsonify({'error': 'No video uploaded'}), 400
+
+    mode = request.form.get('mode', 'both')
+    if mode not in ('letters', 'words', 'both'):
+        return jsonify({'error': f'Unknown mode: {mode}'}), 400
+
+    _purge_jobs()
+    running = [job for job in transcription_jobs.values() if job['status'] == 'running']
+    if sum(1 for job in running if job['user_id'] == user_id) >= MAX_JOBS_PER_USER:
+        return jsonify({'error': 'You already have a transcription running'}), 429
+    if len(running) >= MAX_RUNNING_JOBS:
+        return jsonify({'error': 'Transcription busy, try again later'}), 429
+
+    try:
+        job_id = uuid.uuid4().hex
+        work_dir = tempfile.mkdtemp(prefix='transcribe_')
+        video_path = os.path.join(work_dir, 'video' + os.path.splitext(video.filename)[1])
+        video.save(video_path)
+
+        output_path = os.path.join(work_dir, 'transcript.json')
+        log_path = os.path.join(work_dir, 'transcribe.log')
+        command = [sys.executable, os.path.abspath(__file__), '--video', video_path,
+                   '--mode', mode, '--output', output_path]
+        if TRANSCRIBE_WORKERS:
+            command += ['--workers', str(TRANSCRIBE_WORKERS)]
+
+        with open(log_path, 'w') as log:
+            process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)))
+
+        transcription_jobs[job_id] = {
+            'user_id': user_id,
+            'status': 'running',
+            'process': process,
+            'work_dir': work_dir,
+            'output_path': output_path,
+            'log_path': log_path,
+            'created': time.time()
+        }
+        return jsonify({'job_id': job_id, 'status': 'running'}), 202
+
+    except Exception as e:
+        print(f"Error starting transcription: {e}")
+        return jsonify({'error': 'Failed to start transcription'}), 500
+
+
+@transcribe_bp.route('/<job_id>', methods=['GET'])
+def transcription_status(job_id):
+    """Status of a transcription job, with the transcript once it is done"""
+    user_id = session.get('user_id')
+    job = transcription_jobs.get(job_id)
+    if not user_id or not job or job['user_id'] != user_id:
+        return jsonify({'error': 'Job not found'}), 404
+
+    status = _job_status(job)
+    response = {'job_id': job_id, 'status': status}
+    if status == 'done':
+        response['result'] = job['result']
+    elif status == 'failed':
+        response['error'] = job.get('error', 'Transcription failed')
+    return jsonify(response)
+
+
+# CLI interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Transcribe a signing video into letters and words')
+    parser.add_argument('--video', required=True, help='Path to the video file')
+    parser.add_argument('--mode', choices=['letters', 'words', 'both'], default='both')
+    parser.add_argument('--output', help='Write the transcript JSON here (default: stdout)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per core)')
+    parser.add_argument('--chunk-seconds', type=float, default=30.0, help='Video seconds per chunk')
+    parser.add_argument('--overlap-seconds', type=float, help='Warm-up before each chunk')
+    parser.add_argument('--sample-fps', type=float, default=10.0, help='Frames per second run through MediaPipe')
+    parser.add_argument('--letter-model', default=LETTER_MODEL_PATH)
+    parser.add_argument('--word-model-dir', default=WORD_MODEL_DIR)
+
+    args = parser.parse_args()
+
+    transcript = transcribe_video(
+        args.video,
+        mode=args.mode,
+        workers=args.workers,
+        chunk_seconds=args.chunk_seconds,
+        overlap_seconds=args.overlap_seconds,
+        sample_fps=args.sample_fps,
+        letter_model_path=args.letter_model,
+        word_model_dir=args.word_model_dir
+    )
+
+    throughput = transcript['throughput']
+    print(f"Decoded {throughput['frames_decoded']} frames in {throughput['elapsed_seconds']}s "
+          f"({throughput['decoded_fps']} FPS decoded, {throughput['processed_fps']} FPS through MediaPipe)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(transcript, f, indent=2)
+    else:
+        print(json.dumps(transcript, indent=2))
+
+# Usage instructions:
+# python video_transcriber.py --video lesson.mp4 --output lesson_transcript.json --workers 4
@@ -0,0 +1,153 @@
+from flask import Blueprint, Response, request
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from werkzeug.http import is_resource_modified
+
+WORDS_PATH = os.path.join('static', 'models', 'words.json')
+
+# Seconds browsers may reuse /api/words before revalidating; edits are also
+# pushed to connected clients as 'words_updated'
+WORDS_MAX_AGE = 60
+
+words_bp = Blueprint('words', __name__, url_prefix='/api/words')
+
+
+class VersionConflict(Exception):
+    """The caller edited a version of the list that is no longer current"""
+
+
+class WordsStore:
+    """
+    The Fill in the Blanks word list, kept in memory
+
+    Reads serve a pre-serialized copy with its version (a hash of the
+    content). Edits run under a lock, are written to a temporary file that
+    replaces words.json in one rename, and then notify listeners with the
+    new version and words.
+    """
+
+    def __init__(self, path: str = WORDS_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._listeners: List[Callable] = []
+        self._words: Optional[List[Dict]] = None
+        self.version = None
+        self.last_modified = None
+        self.body = None
+
+    def _set(self, words: List[Dict], last_modified: datetime):
+        """Swap in a new list and its serialized form (caller holds the lock)"""
+        self._words = words
+        self.body = json.dumps({'words': words}, ensure_ascii=False)
+        self.version = hashlib.sha1(self.body.encode('utf-8')).hexdigest()
+        self.last_modified = last_modified.replace(microsecond=0)
+
+    def _ensure_loaded(self):
+        if self._words is not None:
+            return
+        with self._lock:
+            if self._words is not None:
+                return
+            with open(self.path, 'r', encoding='utf-8') as f:
+                words = json.load(f)['words']
+            self._set(words, datetime.fromtimestamp(os.path.getmtime(self.path), timezone.utc))
+
+    def snapshot(self) -> Tuple[str, str, datetime]:
+        """(serialized {"words": [...]}, version, last modified)"""
+        self._ensure_loaded()
+        with self._lock:
+            return self.body, self.version, self.last_modified
+
+    def words(self) -> List[Dict]:
+        self._ensure_loaded()
+        with self._lock:
+            return [dict(word) for word in self._words]
+
+    def _persist(self, words: List[Dict]):
+        """Write words.json through a temporary file in the same directory (caller holds the lock)"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix='.words-', suffix='.json', dir=directory)
+        try:
+            # mkstemp creates the file private; keep the served file's permissions
+            if os.path.exists(self.path):
+                os.chmod(temp_path, os.stat(self.path).st_mode & 0o777)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'words': words}, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _edit(self, change: Callable[[List[Dict]], None], expected_version: Optional[str] = None) -> str:
+        self._ensure_loaded()
+        with self._lock:
+            if expected_version is not None and expected_version != self.version:
+                raise VersionConflict(f"Words changed since version {expected_version}")
+            words = [dict(word) for word in self._words]
+            change(words)
+            # The file is replaced before memory, so a failed write changes nothing
+            self._persist(words)
+            self._set(words, datetime.now(timezone.utc))
+            version = self.version
+
+        self._notify(version, words)
+        return version
+
+    def add(self, word: str, emoji: str, expected_version: Optional[str] = None) -> str:
+        """Append a word; returns the new version"""
+        return self._edit(lambda words: words.append({'word': word, 'emoji': emoji}), expected_version)
+
+    def update(self, index: int, word: str, emoji: str, expected_version: Optional[str] = None) -> str:
+        """Replace the word at index (IndexError if there is none); returns the new version"""
+        def change(words):
+            if not 0 <= index < len(words):
+                raise IndexError('Index out of range')
+            words[index] = {'word': word, 'emoji': emoji}
+        return self._edit(change, expected_version)
+
+    def delete(self, index: int, expected_version: Optional[str] = None) -> str:
+        """Remove the word at index (IndexError if there is none); returns the new version"""
+        def change(words):
+            if not 0 <= index < len(words):
+                raise IndexError('Index out of range')
+            words.pop(index)
+        return self._edit(change, expected_version)
+
+    def add_listener(self, callback: Callable):
+        """Call callback(version, words) after every edit"""
+        self._listeners.append(callback)
+
+    def _notify(self, version: str, words: List[Dict]):
+        for listener in self._listeners:
+            try:
+                listener(version, words)
+            except Exception as e:
+                print(f"Words listener error: {e}")
+
+
+words_store = WordsStore()
+
+
+@words_bp.route('', methods=['GET'])
+def get_words():
+    """The word list, revalidated by ETag instead of re-downloaded"""
+    body, version, last_modified = words_store.snapshot()
+
+    if not is_resource_modified(request.environ, etag=version, last_modified=last_modified):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(version)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = WORDS_MAX_AGE
+    return response
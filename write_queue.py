@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+# Pending writes survive a restart through this journal; it is replayed by
+# the first flush after startup
+WRITE_QUEUE_JOURNAL = os.getenv('WRITE_QUEUE_JOURNAL', 'write_queue_journal.jsonl')
+WRITE_QUEUE_INTERVAL = float(os.getenv('WRITE_QUEUE_INTERVAL', '1.0'))
+
+# Ids returned for keyed rows (e.g. a game's `rooms` row) are kept this long
+# so rows queued later (its game_sessions) can still reference them
+RESOLVED_KEY_TTL = 24 * 3600
+
+
+class WriteBehindQueue:
+    """
+    Durable write-behind queue for Supabase inserts
+
+    enqueue() appends the row to a local journal and returns immediately;
+    a background task flushes queued rows in order, as one bulk insert per
+    run of rows for the same table. A row can be given a key, and later
+    rows can reference the id the database returns for it through `refs`
+    ({column: key}), so they never need a lookup. A failed batch is retried
+    with exponential backoff; after max_attempts its first row is moved to
+    a dead-letter file, together with any rows that reference it.
+    """
+
+    def __init__(self, journal_path: str = WRITE_QUEUE_JOURNAL, batch_size: int = 500,
+                 max_attempts: int = 8, max_backoff: float = 60.0):
+        self.journal_path = journal_path
+        self.dead_letter_path = journal_path + '.dead'
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._pending: List[Dict] = []
+        self._resolved: Dict[str, Dict] = {}  # key -> {'id', 'at'}
+        self._dead_keys = set()
+        self._failures = 0
+        self._retry_at = 0.0
+        self._started = False
+        self._listeners: Dict[str, List[Callable]] = {}
+        self.counts = {'enqueued': 0, 'written': 0, 'batches': 0, 'failures': 0, 'dead': 0}
+        self._replay()
+
+    def _replay(self):
+        """Load the pending rows and resolved keys left by a previous run"""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                if entry['op'] == 'job':
+                    self._pending.append(entry['job'])
+                elif entry['op'] == 'resolved':
+                    self._resolved[entry['key']] = {'id': entry['id'], 'at': entry['at']}
+        if self._pending:
+            print(f"Write queue: replaying {len(self._pending)} pending writes from {self.journal_path}")
+
+    def _append(self, entries: List[Dict]):
+        with open(self.journal_path, 'a') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, default=str) + '\n')
+            f.flush()
+
+    def _compact(self):
+        """Rewrite the journal with only what is still needed (caller holds the lock)"""
+        now = time.time()
+        self._resolved = {key: value for key, value in self._resolved.items()
+                          if now - value['at'] < RESOLVED_KEY_TTL}
+        temp_path = self.journal_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            for key, value in self._resolved.items():
+                f.write(json.dumps({'op': 'resolved', 'key': key, **value}) + '\n')
+            for job in self._pending:
+                f.write(json.dumps({'op': 'job', 'job': job}, default=str) + '\n')
+        os.replace(temp_path, self.journal_path)
+
+    def enqueue(self, table: str, row: Dict, key: Optional[str] = None,
+                refs: Optional[Dict[str, str]] = None) -> str:
+        """Queue one insert; returns the job id"""
+        job = {'id': uuid.uuid4().hex, 'table': table, 'row': row}
+        if key:
+            job['key'] = key
+        if refs:
+            job['refs'] = refs
+        with self._lock:
+            self._append([{'op': 'job', 'job': job}])
+            self._pending.append(job)
+            self.counts['enqueued'] += 1
+        return job['id']
+
+    def _next_batch(self) -> List[Dict]:
+        """Leading run of same-table jobs whose references are all resolved (caller holds the lock)"""
+        batch = []
+        for job in self._pending:
+            if batch and (job['table'] != batch[0]['table'] or len(batch) >= self.batch_size):
+                break
+            if any(ref not in self._resolved for ref in job.get('refs', {}).values()):
+                break
+            batch.append(job)
+        return batch
+
+    def _dead_letter(self, jobs: List[Dict], reason: str):
+        """Move jobs, and any queued jobs referencing their keys, to the dead-letter file (caller holds the lock)"""
+        dead = list(jobs)
+        self._dead_keys.update(job['key'] for job in jobs if job.get('key'))
+        for job in self._pending:
+            if job not in dead and any(ref in self._dead_keys for ref in job.get('refs', {}).values()):
+                dead.append(job)
+                if job.get('key'):
+                    self._dead_keys.add(job['key'])
+
+        with open(self.dead_letter_path, 'a') as f:
+            for job in dead:
+                f.write(json.dumps({'job': job, 'reason': reason, 'at': time.time()}, default=str) + '\n')
+        dead_ids = {job['id'] for job in dead}
+        self._pending = [job for job in self._pending if job['id'] not in dead_ids]
+        self.counts['dead'] += len(dead)
+        print(f"Write queue: {len(dead)} writes moved to {self.dead_letter_path}: {reason}")
+
+    def flush(self, supabase) -> int:
+        """Write queued rows until the queue is empty or a batch fails; returns rows written"""
+        written = 0
+        while True:
+            with self._lock:
+                batch = self._next_batch()
+                if not batch:
+                    head = self._pending[0] if self._pending else None
+                    # The head waits on a key no queued row will ever provide
+                    # (dead-lettered, or expired from the journal)
+                    queued_keys = {job['key'] for job in self._pending if job.get('key')}
+                    if head and any(ref not in self._resolved and ref not in queued_keys
+                                    for ref in head.get('refs', {}).values()):
+                        self._dead_letter([head], 'referenced row was never written')
+                        self._compact()
+                        continue
+                    return written
+
+                table = batch[0]['table']
+                rows = [
+                    dict(job['row'], **{column: self._resolved[ref]['id'] for column, ref in job.get('refs', {}).items()})
+                    for job in batch
+                ]
+
+            try:
+                result = supabase.table(table).insert(rows).execute()
+            except Exception as e:
+                with self._lock:
+                    self._failures += 1
+                    self.counts['failures'] += 1
+                    if self._failures >= self.max_attempts:
+                        self._dead_letter(batch[:1], str(e))
+                        self._failures = 0
+                        self._compact()
+                    else:
+                        self._retry_at = time.time() + min(self.max_backoff, 2 ** self._failures)
+                print(f"Write queue: insert into {table} failed ({len(rows)} rows): {e}")
+                return written
+
+            with self._lock:
+                self._failures = 0
+                now = time.time()
+                # PostgREST returns inserted rows in request order
+                for job, data in zip(batch, result.data or []):
+                    if job.get('key'):
+                        self._resolved[job['key']] = {'id': data['id'], 'at': now}
+                batch_ids = {job['id'] for job in batch}
+                self._pending = [job for job in self._pending if job['id'] not in batch_ids]
+                self._compact()
+                self.counts['written'] += len(batch)
+                self.counts['batches'] += 1
+            written += len(batch)
+
+            for listener in self._listeners.get(table, []):
+                try:
+                    listener(supabase, result.data or [])
+                except Exception as e:
+                    print(f"Write queue listener error ({table}): {e}")
+
+    def add_listener(self, table: str, callback: Callable):
+        """Call callback(supabase, inserted_rows) after every batch written to table"""
+        self._listeners.setdefault(table, []).append(callback)
+
+    def start(self, socketio, supabase, interval: float = WRITE_QUEUE_INTERVAL):
+        """Run flush() every `interval` seconds in a SocketIO background task"""
+        if self._started or supabase is None:
+            return
+        self._started = True
+
+        def run():
+            while True:
+                socketio.sleep(interval)
+                if self._pending and time.time() >= self._retry_at:
+                    try:
+                        self.flush(supabase)
+                    except Exception as e:
+                        print(f"Write queue flush error: {e}")
+
+        socketio.start_background_task(run)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.counts,
+                'pending': len(self._pending),
+                'consecutive_failures': self._failures,
+                'retry_in_seconds': max(0.0, round(self._retry_at - time.time(), 1)) if self._failures else 0.0
+            }
+
+
+write_queue = WriteBehindQueue()